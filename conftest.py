@@ -0,0 +1 @@
+# Lets pytest import the `src` package from the tests/ folder.
@@ -0,0 +1,50 @@
+import argparse
+import sys
+from src import (
+    BENCH_BASELINE, BENCH_REPEATS, BENCH_THRESHOLD,
+    run_benchmarks, save_results, load_results, compare_results, print_comparison,
+    available_backends, check_backend
+)
+
+def main():
+    parser = argparse.ArgumentParser(description="Times the physics, solver, target generators and renderers.")
+    parser.add_argument("--quick", action="store_true", help="small sizes only (a few seconds)")
+    parser.add_argument("--repeats", type=int, default=BENCH_REPEATS)
+    parser.add_argument("--select", help="only cases whose name contains this")
+    parser.add_argument("--save", nargs="?", const=BENCH_BASELINE, help=f"write the results (default {BENCH_BASELINE})")
+    parser.add_argument("--compare", nargs="?", const=BENCH_BASELINE, help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=BENCH_THRESHOLD, help="allowed slowdown (0.2 = 20%%)")
+    parser.add_argument("--check-backends", action="store_true",
+                        help="only cross-check the compiled kernel backends against numpy")
+    args = parser.parse_args()
+
+    if args.check_backends:
+        compiled = available_backends()[1:]
+        if not compiled:
+            print("No compiled kernel backend installed (pip install numba), nothing to check.")
+        ok = True
+        for backend in compiled:
+            for dtype, tol in (("float64", 1e-12), ("float32", 1e-5)):
+                for n, error, counts_match in check_backend(backend, dtype=dtype):
+                    good = error <= tol and counts_match
+                    ok &= good
+                    print(f"{backend} {dtype} N={n:<6} repulsion error {error:.1e}, "
+                          f"collision counts / pairs {'match' if counts_match else 'DIFFER'}{'' if good else '  FAILED'}")
+        sys.exit(0 if ok else 1)
+
+    print(f"--- Benchmarks{' [quick]' if args.quick else ''} ---")
+    report = run_benchmarks(quick=args.quick, repeats=args.repeats, select=args.select)
+
+    if args.save:
+        save_results(report, args.save)
+        print(f"Saved results to {args.save}")
+
+    if args.compare:
+        print(f"\n--- Compared to {args.compare} ---")
+        rows = compare_results(load_results(args.compare), report, args.threshold)
+        # Non-zero exit status on regressions, so scripts / CI can catch them
+        if print_comparison(rows, args.threshold) > 0:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+import sys
+import numpy as np
+from src import (
+    N_DRONES, TASK_LIMITS,
+    get_target_points, get_text_points, LiveSimulation, live_preview, run_headless
+)
+
+def main():
+    # --headless: no window, just report sim steps/s vs render fps
+    headless = "--headless" in sys.argv
+    print(f"--- Live Preview (Task 2 transition){' [headless]' if headless else ''} ---")
+
+    # 1. SETUP (same inputs as main_task2.py)
+    start = get_target_points("Data/input/name.jpg", n_drones=N_DRONES, z_height=10.0, scale=0.4)
+    targets = get_text_points("Happy New Year!", n_drones=len(start), z_height=10.0, scale=0.4)
+
+    # 2. PHYSICS ON A BACKGROUND THREAD
+    sim = LiveSimulation(start.copy(), np.zeros_like(start), targets, realtime=not headless)
+
+    # 3. VIEWER (draws the newest state, never blocks the physics)
+    if headless:
+        run_headless(sim, TASK_LIMITS["task2"], duration=10.0)
+    else:
+        live_preview(sim, TASK_LIMITS["task2"])
+
+if __name__ == "__main__":
+    main()
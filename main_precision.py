@@ -0,0 +1,30 @@
+import argparse
+import sys
+import numpy as np
+from src import N_DRONES, SOLVER, PRECISION_TOL, compare_precision
+
+def main():
+    parser = argparse.ArgumentParser(description="Checks float32 simulations against float64 on the standard tasks.")
+    parser.add_argument("--tasks", nargs="+", default=["task1", "task2", "task3"], choices=["task1", "task2", "task3"])
+    parser.add_argument("--time", type=float, help="shorten each show to this many seconds")
+    parser.add_argument("--drones", type=int, default=N_DRONES)
+    parser.add_argument("--solver", default=SOLVER)
+    parser.add_argument("--tol", type=float, default=PRECISION_TOL, help="allowed final error difference (m)")
+    args = parser.parse_args()
+
+    print(f"--- Precision check: float32 vs float64 ({args.solver}, {args.drones} drones) ---")
+    failed = []
+    for task in args.tasks:
+        results = compare_precision(task, duration=args.time, n_drones=args.drones, solver=args.solver,
+                                    dtype=np.float32, tol=args.tol)
+        if not results[-1]["passed"]:
+            failed.append(task)
+
+    # Non-zero exit status when float32 is not good enough somewhere
+    if failed:
+        print(f"float32 FAILED on: {', '.join(failed)}")
+        sys.exit(1)
+    print("float32 passed on every task.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import os
+from src import N_WORKERS, param_grid, run_sweep
+
+def main():
+    print(f"--- Starting Physics Parameter Sweep ---")
+
+    # 1. PARAMETER GRID
+    # Every combination is simulated for every scenario below.
+    grid = param_grid(
+        k_p=[0.5, 1.0, 2.0],
+        k_d=[2.0, 4.0],
+        k_rep=[100.0, 200.0],
+        r_safe=[1.2],
+        v_max=[5.0],
+    )
+
+    # 2. RUN (one process per core)
+    os.makedirs("Data/output", exist_ok=True)
+    run_sweep(
+        grid,
+        scenarios=("task1", "task2", "task3"),
+        seeds=(0,),
+        total_time=20.0,
+        workers=N_WORKERS,
+        out_path="Data/output/sweep_results.csv",
+    )
+    print("All Done! Check 'Data/output/sweep_results.csv'.")
+
+if __name__ == "__main__":
+    main()
@@ -1,75 +1,68 @@
-import numpy as np
 import os
+import sys
 from src import (
-    N_DRONES, DT, TASK_LIMITS,
-    get_text_points, extract_video_targets,
-    rk4_step, animate_swarm, animate_swarm_2d, count_collisions # <--- Added Import
+    TASK_LIMITS, TELEMETRY, CHECKPOINT_DIR, telemetry,
+    ShowEngine, Text, Video, render_videos
 )
 
+CHECKPOINT = os.path.join(CHECKPOINT_DIR, "task3.npz")
+
 def main():
-    print(f"--- Starting Task 3: Dynamic Video Tracking ---")
-    
-    # 1. SETUP
-    video_path = "Data/input/video.mp4"
-    
-    # 2. LOAD VIDEO TARGETS
-    print("Extracting video frames...")
+    # --resume: continue the physics from the last checkpoint of an interrupted run
+    resume = "--resume" in sys.argv
+    print(f"--- Starting Task 3: Dynamic Video Tracking{' [resume]' if resume else ''} ---")
+
+    # 1. SHOW: start on "Happy New Year", then follow the ball
+    # Frames are decoded on a background thread while the physics runs
+    # (or read straight from Data/cache when this video was processed before).
+    # Scale 0.8 for both to prevent overcrowding; 100 physics steps per video frame.
+    greeting = Text("Happy New Year!", scale=0.8)
+    show = [Video("Data/input/video.mp4", scale=0.8, sample_rate=3, coherent=True, frame_steps=100)]
+    engine = ShowEngine(show, start=greeting, crash_limit=0.2, checkpoint=CHECKPOINT)
+
     try:
-        # Ensure scale is consistent (0.8 or similar) to prevent overcrowding
-        video_frames = extract_video_targets(video_path, n_drones=N_DRONES, scale=0.8, sample_rate=3)
+        print("Opening video stream...")
+        engine.load()
     except Exception as e:
         print(f"Error: {e}")
         return
+    if show[0].n_frames is None:
+        print("Streaming frames from a live source (length unknown).")
+    else:
+        print(f"Streaming ~{show[0].n_frames} frames from video.")
 
-    num_video_frames = len(video_frames)
-    if num_video_frames == 0:
+    # 2. SIMULATION (on-disk float32 trajectory, one frame every RECORD_EVERY steps)
+    # The full state is checkpointed every CHECKPOINT_EVERY steps; a resumed
+    # run reopens the trajectory file and carries on bit for bit.
+    if resume and os.path.exists(CHECKPOINT):
+        engine.restore(CHECKPOINT, reopen_recorder=True)
+        recorder = engine.recorder
+    else:
+        if resume:
+            print(f"No checkpoint at {CHECKPOINT}, starting from the beginning.")
+        recorder = engine.record_to("Data/output/task3_history.npy")
+    if TELEMETRY:
+        telemetry.enable("Data/output/task3_telemetry.jsonl")
+    if engine.n_steps() is not None:
+        print(f"Simulating {engine.n_steps()} steps (approx {engine.n_steps() * engine.dt:.1f} seconds)...")
+    engine.run()
+    if TELEMETRY:
+        print(telemetry.report())
+        telemetry.close()
+
+    if recorder.count <= 1:
         print("No moving object detected in video!")
         return
 
-    print(f"Loaded {num_video_frames} frames from video.")
-
-    # 3. INITIALIZATION (Start at "Happy New Year")
-    print("Initializing at 'Happy New Year'...")
-    start_targets = get_text_points("Happy New Year!", n_drones=N_DRONES, scale=0.8)
-    
-    positions = start_targets.copy()
-    velocities = np.zeros((N_DRONES, 3))
-    
-    history = [positions.copy()]
-    
-    # 4. SIMULATION LOOP
-    # Sync Physics to Video FPS (approx 3-4 steps per frame)
-    steps_per_frame = 100
-    
-    total_steps = num_video_frames * steps_per_frame
-    print(f"Simulating {total_steps} steps (approx {total_steps * DT:.1f} seconds)...")
-
-    for frame_idx in range(num_video_frames):
-        # Update the target to the current video frame
-        current_target = video_frames[frame_idx]
-        
-        # Run physics for a tiny bit of time to catch up to the frame
-        for step in range(steps_per_frame):
-            positions, velocities = rk4_step(positions, velocities, current_target, DT)
-            history.append(positions.copy())
-
-            # --- COLLISION CHECK (Every Physics Step) ---
-            crashes = count_collisions(positions, limit=0.2)
-            if crashes > 0:
-                print(f"CRASH: {crashes} pairs collided at Frame {frame_idx}, Step {step}!")
-            
-        if frame_idx % 100 == 0:
-            print(f"Progress: {frame_idx / num_video_frames * 100:.0f}%")
-
-    # 5. SAVE
-    if crashes == 0:
-        print("No crashes detected during the simulation.")
+    # 3. SAVE
     print("Saving videos...")
     os.makedirs("Data/output", exist_ok=True)
-    
-    animate_swarm(history, TASK_LIMITS["task3"], filename="Data/output/task3_video_3d.mp4")
-    animate_swarm_2d(history, TASK_LIMITS["task3"], filename="Data/output/task3_video_2d.mp4")
+
+    render_videos(recorder.positions, TASK_LIMITS["task3"],
+                  filename_3d="Data/output/task3_video_3d.mp4", filename_2d="Data/output/task3_video_2d.mp4",
+                  skip_frames=1, dt=recorder.frame_dt)
+    recorder.close()
     print("Done! Check Data/output folder.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
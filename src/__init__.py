@@ -7,9 +7,26 @@
 
 from .config import *
 from .preprocessing import get_target_points, get_text_points
-from .physics import compute_forces, velocity_saturation, count_collisions
-from .solver import rk4_step
+from .glyphs import GlyphAtlas, glyph_text_points
+from .sampling import sample_points, blue_noise_sample
+from .physics import PhysicsParams, compute_forces, velocity_saturation, saturate_velocities, count_collisions, min_separation, scan_collisions, swarm_metrics
+from .solver import rk4_step, RK4Stepper, IMEXStepper, ActiveSetStepper, make_stepper, dopri5_step, AdaptiveIntegrator, AdaptiveStepper
+from .backends import get_backend, set_backend, set_kernel_threads, available_backends, check_backend
+from .convergence import ConvergenceMonitor
+from .neighbors import NeighborList, find_pairs
 from .visualizer import animate_swarm, animate_swarm_2d
-from .video_processing import extract_video_targets
+from .renderer import render_videos, render_frame_2d, render_frame_3d
+from .live import LiveSimulation, StateBuffer, live_preview, run_headless
+from .recorder import TrajectoryRecorder, load_trajectory
+from .telemetry import telemetry, Telemetry
+from .flightlog import FlightLogWriter, FlightLogReader, open_flight_log
+from .assignment import assign_targets, assignment
+from .video_processing import extract_video_targets, iter_video_targets, VideoTargetStream
+from .cache import TargetCache, cached_target_points, cached_text_points, cached_video_targets, cached_video_stream
+from .sweep import run_scenario, run_sweep, param_grid
+from .show import ShowEngine, Phase, Image, Text, Video, Frames, Hold, Transition, run_show, resume_show, branch_show
+from .checkpoint import save_checkpoint, load_checkpoint
+from .precision import compare_precision, standard_show
+from .benchmark import run_benchmarks, save_results, load_results, compare_results, print_comparison
 
 
@@ -0,0 +1,135 @@
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import maximum_bipartite_matching
+from scipy.spatial import cKDTree
+from scipy.spatial.distance import cdist
+from .config import ASSIGN_OBJECTIVE, ASSIGN_EXACT_LIMIT
+
+OBJECTIVES = ("sum", "sum_sq", "max")
+
+
+def _cost_matrix(positions, targets, objective):
+    metric = "sqeuclidean" if objective == "sum_sq" else "euclidean"
+    return cdist(positions, targets, metric=metric)
+
+
+def _hungarian(cost):
+    """ Exact min-sum assignment; returns the target column of every row. """
+    rows, cols = linear_sum_assignment(cost)
+    perm = np.empty(cost.shape[0], dtype=np.int64)
+    perm[rows] = cols
+    return perm
+
+
+def _has_full_matching(dist, threshold):
+    """ True if every drone can get its own target at most `threshold` away. """
+    graph = csr_matrix(dist <= threshold)
+    return np.all(maximum_bipartite_matching(graph, perm_type='column') >= 0)
+
+
+def _bottleneck(dist):
+    """
+    Exact min-max assignment: binary search for the smallest distance
+    threshold that still admits a full matching, then the min-sum matching
+    among the edges under that threshold (so the rest of the swarm does not
+    take detours). The search bisects the distances between the bounds with
+    a median selection each round, instead of sorting all N^2 of them.
+    """
+    # Every drone needs some target: its nearest one bounds the answer from below
+    lo, hi = dist.min(axis=1).max(), dist.max()
+    if _has_full_matching(dist, lo):
+        hi = lo
+    while True:
+        inside = dist[(dist > lo) & (dist < hi)]
+        if not len(inside):
+            break
+        mid = np.partition(inside, len(inside) // 2)[len(inside) // 2]
+        if _has_full_matching(dist, mid):
+            hi = mid
+        else:
+            lo = mid
+
+    cost = np.where(dist <= hi, dist, dist.max() * len(dist) + 1.0)
+    return _hungarian(cost)
+
+
+def _greedy_nearest(positions, targets, exact_limit, stall=16):
+    """
+    Scalable approximation for large swarms, in vectorized rounds: every
+    free drone proposes to a nearby free target (KD-tree query) and each
+    target goes to its closest proposer. Drones after the same nearest
+    target propose to its 1st, 2nd, ... nearest free target instead (closest
+    drone first), from k candidates that grow whenever a round matches fewer
+    than 1/`stall` of them. The last `exact_limit` (or fewer) drones are
+    solved exactly.
+    """
+    n = len(positions)
+    perm = np.full(n, -1, dtype=np.int64)
+    taken = np.zeros(len(targets), dtype=bool)
+    free_drones, free_targets = np.arange(n), np.arange(len(targets))
+    k = 1
+
+    while len(free_drones) > exact_limit:
+        k = min(k, len(free_targets))
+        dist, idx = cKDTree(targets[free_targets]).query(positions[free_drones], k=k)
+        dist, idx = dist.reshape(-1, k), idx.reshape(-1, k)
+
+        # Rank of every drone among those sharing its nearest target, closest first
+        order = np.lexsort((dist[:, 0], idx[:, 0]))
+        group_start = np.r_[True, np.diff(idx[order, 0]) != 0] * np.arange(len(order))
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order)) - np.maximum.accumulate(group_start)
+        rows, choice = np.arange(len(order)), np.minimum(rank, k - 1)
+        dist, idx = dist[rows, choice], idx[rows, choice]
+
+        # Every proposed target goes to its closest proposer (at least one match per round)
+        order = np.argsort(dist, kind="stable")
+        winners = order[np.unique(idx[order], return_index=True)[1]]
+        perm[free_drones[winners]] = free_targets[idx[winners]]
+        taken[free_targets[idx[winners]]] = True
+
+        free_drones, free_targets = np.nonzero(perm < 0)[0], np.nonzero(~taken)[0]
+        if len(winners) < len(free_drones) // stall:
+            k *= 4  # crowded: look further out
+
+    if len(free_drones):
+        cost = cdist(positions[free_drones], targets[free_targets])
+        perm[free_drones] = free_targets[_hungarian(cost)]
+    return perm
+
+
+def assignment(positions, targets, objective=ASSIGN_OBJECTIVE, exact_limit=ASSIGN_EXACT_LIMIT):
+    """
+    Index of the target each drone should fly to (a permutation when the
+    counts match).
+
+    objective:
+        "sum":    minimal total travel distance.
+        "sum_sq": minimal sum of squared distances (straight paths of this
+                  assignment never cross, which keeps repulsion quiet).
+        "max":    minimal longest flight (= shortest transition time).
+
+    Up to `exact_limit` drones the result is exact (Hungarian / bottleneck);
+    above it a greedy nearest-target approximation is used for every objective.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective '{objective}'. Use one of {OBJECTIVES}.")
+    positions = np.asarray(positions)
+    targets = np.asarray(targets)
+    if len(targets) < len(positions):
+        raise ValueError(f"Need at least as many targets ({len(targets)}) as drones ({len(positions)}).")
+
+    if len(positions) > exact_limit:
+        return _greedy_nearest(positions, targets, exact_limit)
+    if objective == "max":
+        return _bottleneck(cdist(positions, targets))
+    return _hungarian(_cost_matrix(positions, targets, objective))
+
+
+def assign_targets(positions, targets, objective=ASSIGN_OBJECTIVE, exact_limit=ASSIGN_EXACT_LIMIT):
+    """
+    Reorders `targets` so that targets[i] is the goal of drone i.
+    Drop-in after get_target_points / get_text_points.
+    """
+    return np.asarray(targets)[assignment(positions, targets, objective, exact_limit)]
@@ -0,0 +1,356 @@
+import numpy as np
+from .config import KERNEL_BACKEND, N_WORKERS
+from .neighbors import find_pairs, pair_repulsion, count_pairs_within
+from .kernels import repulsion_tiled, count_pairs_tiled, set_workers
+
+
+class NumpyBackend:
+    """
+    Reference implementation of the pair kernels (vectorized NumPy).
+
+    A backend provides the four kernels compute_forces / count_collisions
+    are built on, plus the cell-list pair search of NeighborList; every
+    other backend is checked against this one (check_backend) and falls
+    back to it for inputs it does not handle.
+    """
+
+    name = "numpy"
+
+    def find_pairs(self, positions, radius):
+        """ (i, j) index arrays of all pairs closer than radius, i < j. """
+        return find_pairs(positions, radius)
+
+    def repulsion_dense(self, positions, r_safe):
+        """ sum(diff / d^3) over all pairs closer than r_safe. """
+        return repulsion_tiled(positions, r_safe)
+
+    def repulsion_pairs(self, positions, pairs, r_safe):
+        """ Same sum over the candidate pairs of a NeighborList. """
+        return pair_repulsion(positions, pairs, r_safe)
+
+    def count_dense(self, positions, limit):
+        """ Pairs closer than limit, over all pairs. """
+        return count_pairs_tiled(positions, limit)
+
+    def count_pairs(self, positions, pairs, limit):
+        """ Pairs closer than limit, among the candidate pairs. """
+        return count_pairs_within(positions, pairs, limit)
+
+
+def _compile_numba():
+    """
+    Compiles the fused Numba kernels (imports numba, so only on demand).
+    Each kernel touches a pair once and keeps its sums in registers:
+    no diff / distance / 1/d^3 temporaries. Compiled code is cached on disk.
+    """
+    from numba import njit, prange
+
+    # error_model="numpy": 1/0 gives inf (as in the NumPy kernels) instead of raising
+    @njit(parallel=True, cache=True, error_model="numpy")
+    def repulsion_dense(positions, r_safe, out):
+        n = positions.shape[0]
+        r_sq = r_safe * r_safe
+        for i in prange(n):
+            x, y, z = positions[i, 0], positions[i, 1], positions[i, 2]
+            fx = fy = fz = 0.0
+            for j in range(n):
+                dx = x - positions[j, 0]
+                dy = y - positions[j, 1]
+                dz = z - positions[j, 2]
+                d_sq = dx * dx + dy * dy + dz * dz
+                if d_sq < r_sq and j != i:
+                    inv = 1.0 / (d_sq * np.sqrt(d_sq))
+                    fx += dx * inv
+                    fy += dy * inv
+                    fz += dz * inv
+            out[i, 0] = fx
+            out[i, 1] = fy
+            out[i, 2] = fz
+        return out
+
+    @njit(cache=True, error_model="numpy")
+    def repulsion_pairs(positions, i_idx, j_idx, r_safe, out):
+        # Serial: both ends of a pair are written (Newton's third law)
+        out[:] = 0.0
+        r_sq = r_safe * r_safe
+        for k in range(len(i_idx)):
+            i, j = i_idx[k], j_idx[k]
+            dx = positions[i, 0] - positions[j, 0]
+            dy = positions[i, 1] - positions[j, 1]
+            dz = positions[i, 2] - positions[j, 2]
+            d_sq = dx * dx + dy * dy + dz * dz
+            if d_sq < r_sq:
+                inv = 1.0 / (d_sq * np.sqrt(d_sq))
+                out[i, 0] += dx * inv
+                out[i, 1] += dy * inv
+                out[i, 2] += dz * inv
+                out[j, 0] -= dx * inv
+                out[j, 1] -= dy * inv
+                out[j, 2] -= dz * inv
+        return out
+
+    @njit(parallel=True, cache=True)
+    def count_dense(positions, limit):
+        n = positions.shape[0]
+        limit_sq = limit * limit
+        total = 0
+        for i in prange(n):
+            for j in range(i + 1, n):
+                dx = positions[i, 0] - positions[j, 0]
+                dy = positions[i, 1] - positions[j, 1]
+                dz = positions[i, 2] - positions[j, 2]
+                if dx * dx + dy * dy + dz * dz < limit_sq:
+                    total += 1
+        return total
+
+    @njit(cache=True)
+    def count_pairs(positions, i_idx, j_idx, limit):
+        limit_sq = limit * limit
+        total = 0
+        for k in range(len(i_idx)):
+            i, j = i_idx[k], j_idx[k]
+            dx = positions[i, 0] - positions[j, 0]
+            dy = positions[i, 1] - positions[j, 1]
+            dz = positions[i, 2] - positions[j, 2]
+            if dx * dx + dy * dy + dz * dz < limit_sq:
+                total += 1
+        return total
+
+    @njit(cache=True)
+    def cell_list(positions, radius):
+        # Same grid as neighbors.find_pairs: cubic cells of side radius, padded by one
+        n = positions.shape[0]
+        cells = np.empty((n, 3), np.int64)
+        dims = np.empty(3, np.int64)
+        for k in range(3):
+            lo = positions[:, k].min()
+            for i in range(n):
+                cells[i, k] = np.int64(np.floor((positions[i, k] - lo) / radius)) + 1
+            dims[k] = cells[:, k].max() + 2
+        keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+        order = np.argsort(keys, kind='mergesort')
+
+        # Occupied cells: sorted keys and where their drones start in `order`
+        cell_keys = np.empty(n, np.int64)
+        cell_starts = np.empty(n + 1, np.int64)
+        n_cells = 0
+        for k in range(n):
+            key = keys[order[k]]
+            if n_cells == 0 or key != cell_keys[n_cells - 1]:
+                cell_keys[n_cells] = key
+                cell_starts[n_cells] = k
+                n_cells += 1
+        cell_starts[n_cells] = n
+        return dims, order, cell_keys[:n_cells], cell_starts[:n_cells + 1]
+
+    @njit(cache=True)
+    def scan_cell(c, sorted_positions, r_sq, cell_starts, columns, order, i_idx, j_idx, start):
+        # Pairs of the drones in cell c with later (sorted) drones of the 27
+        # cells around it; written from `start` on unless i_idx is empty
+        found = 0
+        for a in range(cell_starts[c], cell_starts[c + 1]):
+            x, y, z = sorted_positions[a, 0], sorted_positions[a, 1], sorted_positions[a, 2]
+            for m in range(9):
+                for b in range(max(columns[c, m, 0], a + 1), columns[c, m, 1]):
+                    dx = x - sorted_positions[b, 0]
+                    dy = y - sorted_positions[b, 1]
+                    dz = z - sorted_positions[b, 2]
+                    if dx * dx + dy * dy + dz * dz < r_sq:
+                        if len(i_idx) > 0:
+                            i, j = order[a], order[b]
+                            i_idx[start + found] = min(i, j)
+                            j_idx[start + found] = max(i, j)
+                        found += 1
+        return found
+
+    @njit(parallel=True, cache=True)
+    def find_pairs(positions, radius):
+        dims, order, cell_keys, cell_starts = cell_list(positions, radius)
+        sorted_positions = positions[order]
+        n_cells = len(cell_keys)
+
+        # The 27 cells around a cell are 9 columns of 3 consecutive keys (z - 1 .. z + 1),
+        # i.e. 9 contiguous runs of sorted drones: [first, stop) per column
+        columns = np.empty((n_cells, 9, 2), np.int64)
+        for c in prange(n_cells):
+            m = 0
+            for dx in range(-1, 2):
+                for dy in range(-1, 2):
+                    center = cell_keys[c] + (dx * dims[1] + dy) * dims[2]
+                    columns[c, m, 0] = cell_starts[np.searchsorted(cell_keys, center - 1)]
+                    columns[c, m, 1] = cell_starts[np.searchsorted(cell_keys, center + 2)]
+                    m += 1
+
+        # Two passes over the cells (count, then fill), both in parallel
+        r_sq = radius * radius
+        none = np.empty(0, np.int64)
+        counts = np.empty(n_cells, np.int64)
+        for c in prange(n_cells):
+            counts[c] = scan_cell(c, sorted_positions, r_sq, cell_starts, columns, order, none, none, 0)
+        starts = np.zeros(n_cells + 1, np.int64)
+        starts[1:] = np.cumsum(counts)
+        i_idx = np.empty(starts[n_cells], np.int64)
+        j_idx = np.empty(starts[n_cells], np.int64)
+        for c in prange(n_cells):
+            scan_cell(c, sorted_positions, r_sq, cell_starts, columns, order, i_idx, j_idx, starts[c])
+        return i_idx, j_idx
+
+    return repulsion_dense, repulsion_pairs, count_dense, count_pairs, find_pairs
+
+
+class NumbaBackend(NumpyBackend):
+    """
+    Fused, JIT-compiled pair kernels (needs numba). The dense kernels and
+    the cell-list pair search run their rows on N_WORKERS threads (prange).
+
+    Handles single (N, 3) swarms with scalar radii; batched (B, N, 3)
+    states and per-member / per-pair parameters go to the NumPy kernels.
+    """
+
+    name = "numba"
+
+    def __init__(self):
+        self.set_threads(_threads)
+        (self._repulsion_dense, self._repulsion_pairs, self._count_dense, self._count_pairs,
+         self._find_pairs) = _compile_numba()
+
+    @staticmethod
+    def set_threads(n):
+        import numba
+        numba.set_num_threads(max(1, min(n, numba.config.NUMBA_NUM_THREADS)))
+
+    @staticmethod
+    def _handles(positions, *scalars):
+        return (positions.ndim == 2 and positions.flags.c_contiguous
+                and all(np.ndim(value) == 0 for value in scalars))
+
+    def find_pairs(self, positions, radius):
+        if not self._handles(positions, radius) or len(positions) < 2:
+            return super().find_pairs(positions, radius)
+        return self._find_pairs(positions, float(radius))
+
+    def repulsion_dense(self, positions, r_safe):
+        if not self._handles(positions, r_safe):
+            return super().repulsion_dense(positions, r_safe)
+        return self._repulsion_dense(positions, float(r_safe), np.empty_like(positions))
+
+    def repulsion_pairs(self, positions, pairs, r_safe):
+        if not self._handles(positions, r_safe):
+            return super().repulsion_pairs(positions, pairs, r_safe)
+        i, j = pairs
+        return self._repulsion_pairs(positions, i, j, float(r_safe), np.empty_like(positions))
+
+    def count_dense(self, positions, limit):
+        if not self._handles(positions, limit):
+            return super().count_dense(positions, limit)
+        return int(self._count_dense(positions, float(limit)))
+
+    def count_pairs(self, positions, pairs, limit):
+        if not self._handles(positions, limit):
+            return super().count_pairs(positions, pairs, limit)
+        i, j = pairs
+        return int(self._count_pairs(positions, i, j, float(limit)))
+
+
+BACKENDS = {"numpy": NumpyBackend, "numba": NumbaBackend}
+
+_active = None
+_loaded = {}  # name -> backend instance (compiled once per process)
+_threads = N_WORKERS
+
+
+def _load(name):
+    if name not in _loaded:
+        _loaded[name] = BACKENDS[name]()
+    return _loaded[name]
+
+
+def available_backends():
+    """ Names of the backends that can be used here (their dependencies import). """
+    names = []
+    for name, backend in BACKENDS.items():
+        try:
+            if backend is not NumpyBackend:
+                __import__(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def set_backend(name=KERNEL_BACKEND):
+    """
+    Selects the kernel backend: "numpy", "numba" or "auto" (numba when it
+    is installed). A backend that cannot be loaded falls back to NumPy
+    with a warning. Returns the active backend.
+    """
+    global _active
+    if name == "auto":
+        name = "numba" if "numba" in available_backends() else "numpy"
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown kernel backend: {name} (choose from {', '.join(BACKENDS)} or auto)")
+    try:
+        _active = _load(name)
+    except ImportError as e:
+        print(f"Warning: kernel backend {name!r} is not available ({e}), using numpy.")
+        _active = _load("numpy")
+    return _active
+
+
+def set_kernel_threads(n):
+    """
+    Threads the kernels may use: the row tiles of the NumPy kernels and the
+    prange loops of Numba. Process pools set 1 per worker (see run_sweep),
+    so workers x threads does not oversubscribe the cores.
+    """
+    global _threads
+    _threads = max(1, int(n))
+    set_workers(_threads)
+    if "numba" in _loaded:
+        _loaded["numba"].set_threads(_threads)
+
+
+def get_backend():
+    """ The active kernel backend (chosen by config.KERNEL_BACKEND on first use). """
+    if _active is None:
+        set_backend()
+    return _active
+
+
+def check_backend(name, sizes=(100, 1000, 5000), seed=0, r_safe=None, limit=0.2, dtype=np.float64):
+    """
+    Cross-checks a backend against the NumPy reference on random swarms.
+
+    Returns one row per size: (n, largest repulsion difference relative to
+    the largest repulsion, whether the collision counts and the neighbor
+    pairs found are identical). Both the dense and the neighbor-list
+    kernels are compared.
+    """
+    from .neighbors import NeighborList
+    from .config import R_SAFE
+    r_safe = R_SAFE if r_safe is None else r_safe
+    reference, backend = _load("numpy"), _load(name)
+    rng = np.random.RandomState(seed)
+    rows = []
+    for n in sizes:
+        # ~1 m spacing: plenty of pairs inside r_safe and some under the crash limit
+        side = np.sqrt(n)
+        positions = np.column_stack((rng.uniform(0, side, (n, 2)), rng.uniform(9.5, 10.5, n))).astype(dtype)
+        radius = NeighborList().radius
+        pairs = reference.find_pairs(positions, radius)
+        found = backend.find_pairs(positions, radius)
+
+        error = 0.0
+        for expected, actual in ((reference.repulsion_dense(positions, r_safe),
+                                  backend.repulsion_dense(positions, r_safe)),
+                                 (reference.repulsion_pairs(positions, pairs, r_safe),
+                                  backend.repulsion_pairs(positions, pairs, r_safe))):
+            scale = max(float(np.max(np.abs(expected))), 1e-12)
+            error = max(error, float(np.max(np.abs(actual - expected))) / scale)
+        counts_match = (reference.count_dense(positions, limit) == backend.count_dense(positions, limit)
+                        and reference.count_pairs(positions, pairs, limit)
+                        == backend.count_pairs(positions, pairs, limit)
+                        # Same pairs, in whatever order
+                        and set(zip(*pairs)) == set(zip(*found)))
+        rows.append((n, error, counts_match))
+    return rows
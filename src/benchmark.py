@@ -0,0 +1,245 @@
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+import cv2
+import numpy as np
+from .config import DT, TASK_LIMITS, BENCH_REPEATS, BENCH_MIN_ROUND, BENCH_THRESHOLD
+from .physics import compute_forces, count_collisions
+from .neighbors import NeighborList
+from .solver import rk4_step, RK4Stepper
+from .backends import set_backend, available_backends
+from .preprocessing import get_target_points, get_text_points
+from .video_processing import extract_video_targets
+from .renderer import render_frame_2d, render_frame_3d
+from .visualizer import animate_swarm, animate_swarm_2d
+
+# Sweep sizes; the dense N x N paths stop at DENSE_MAX_N
+SWARM_SIZES = (100, 1000, 5000, 20000)
+DENSE_MAX_N = 5000
+IMAGE_SIZES = ((640, 240), (1280, 480), (2560, 960))
+VIDEO_SIZES = ((320, 240), (640, 480))
+VIDEO_FRAMES = 60
+
+# --quick: a subset that runs in a few seconds
+QUICK_SWARM_SIZES = (100, 1000)
+QUICK_IMAGE_SIZES = ((640, 240),)
+QUICK_VIDEO_SIZES = ((320, 240),)
+
+
+# --- SYNTHETIC INPUTS ---
+
+def synthetic_swarm(n, seed=0):
+    """
+    A formation-like state: n drones spread over a plane ~1.5 m apart on
+    average (so R_SAFE neighbors exist), with targets a few meters away.
+    """
+    rng = np.random.RandomState(seed)
+    side = 1.5 * np.sqrt(n)
+    positions = np.column_stack((rng.uniform(-side / 2, side / 2, (n, 2)), rng.uniform(9.0, 11.0, n)))
+    velocities = rng.uniform(-1.0, 1.0, (n, 3))
+    targets = positions + rng.normal(0.0, 2.0, (n, 3))
+    return positions, velocities, targets
+
+
+def synthetic_image(path, size, text="Benchmark"):
+    """ Dark handwriting-like strokes on a paper-colored background, written to path. """
+    w, h = size
+    img = np.full((h, w), 235, dtype=np.uint8)
+    img += np.random.RandomState(0).randint(0, 12, img.shape).astype(np.uint8)  # paper texture
+    font_scale = w / 200.0
+    (tw, th), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SCRIPT_SIMPLEX, font_scale, max(1, w // 160))
+    cv2.putText(img, text, ((w - tw) // 2, (h + th) // 2), cv2.FONT_HERSHEY_SCRIPT_SIMPLEX, font_scale, 30,
+                max(1, w // 160), cv2.LINE_AA)
+    cv2.imwrite(path, img)
+    return path
+
+
+def synthetic_video(path, size, n_frames=VIDEO_FRAMES):
+    """ A ball bouncing over a static textured background, written to path (mp4v). """
+    w, h = size
+    rng = np.random.RandomState(0)
+    background = cv2.GaussianBlur(rng.randint(60, 200, (h, w, 3)).astype(np.uint8), (0, 0), 3)
+    radius = h // 8
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 30, (w, h))
+    x, y, vx, vy = w / 3, h / 2, w / 40, h / 50
+    for _ in range(n_frames):
+        frame = background.copy()
+        cv2.circle(frame, (int(x), int(y)), radius, (20, 60, 230), -1)
+        writer.write(frame)
+        x, y = x + vx, y + vy
+        if not radius <= x <= w - radius:
+            vx = -vx
+        if not radius <= y <= h - radius:
+            vy = -vy
+    writer.release()
+    return path
+
+
+# --- TIMING ---
+
+def time_call(func, repeats=BENCH_REPEATS, min_round=BENCH_MIN_ROUND):
+    """
+    Per-call time of func, like timeit: after a warm-up call, short functions
+    are looped so every timed round lasts at least min_round seconds.
+    Returns {min, median, repeats, number} in seconds per call.
+    """
+    start = time.perf_counter()
+    func()
+    number = max(1, int(min_round / max(time.perf_counter() - start, 1e-6)))
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start) / number)
+    return {"min": min(times), "median": float(np.median(times)), "repeats": repeats, "number": number}
+
+
+def _quiet(func):
+    """ Wraps a function that prints progress (the generators do), so the report stays readable. """
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return func()
+    return run
+
+
+def _cases(workdir, quick):
+    """
+    Yields (name, callable) for every benchmark. Each one is timed before
+    the generator moves on, so the closures see their own loop variables.
+    """
+    sizes = QUICK_SWARM_SIZES if quick else SWARM_SIZES
+    image_sizes = QUICK_IMAGE_SIZES if quick else IMAGE_SIZES
+    video_sizes = QUICK_VIDEO_SIZES if quick else VIDEO_SIZES
+
+    # 1. Physics + solver (NumPy reference kernels, then every compiled backend)
+    for n in sizes:
+        set_backend("numpy")
+        x, v, t = synthetic_swarm(n)
+        neighbors = NeighborList()
+        out = np.empty_like(x)
+        yield f"compute_forces[neighbors]/N={n}", lambda: compute_forces(x, v, t, neighbors, out=out)
+        # A fresh list every call: the grid rebuild is part of the cost
+        yield f"compute_forces[rebuild]/N={n}", lambda: compute_forces(x, v, t, NeighborList(), out=out)
+        if n <= DENSE_MAX_N:
+            yield f"compute_forces[dense]/N={n}", lambda: compute_forces(x, v, t, out=out)
+            yield f"count_collisions[dense]/N={n}", lambda: count_collisions(x, limit=0.2)
+        yield f"count_collisions[neighbors]/N={n}", lambda: count_collisions(x, limit=0.2, neighbors=neighbors)
+        yield f"rk4_step/N={n}", lambda: rk4_step(x, v, t, DT, neighbors)
+        stepper = RK4Stepper(n, DT, neighbors, dtype=x.dtype)
+        x_s, v_s = x.copy(), v.copy()
+        yield f"RK4Stepper.step/N={n}", lambda: stepper.step(x_s, v_s, t)
+
+        # Same work on a float32 state (config.DTYPE = np.float32)
+        x32, v32, t32 = (a.astype(np.float32) for a in (x, v, t))
+        neighbors32 = NeighborList()
+        out32 = np.empty_like(x32)
+        yield f"compute_forces[neighbors,float32]/N={n}", \
+            lambda: compute_forces(x32, v32, t32, neighbors32, out=out32)
+        if n <= DENSE_MAX_N:
+            yield f"compute_forces[dense,float32]/N={n}", lambda: compute_forces(x32, v32, t32, out=out32)
+        stepper32 = RK4Stepper(n, DT, neighbors32, dtype=np.float32)
+        yield f"RK4Stepper.step[float32]/N={n}", lambda: stepper32.step(x32, v32, t32)
+
+        for backend in available_backends()[1:]:
+            set_backend(backend)
+            compute_forces(x, v, t, neighbors, out=out)  # JIT compile outside the timing
+            yield f"compute_forces[neighbors,{backend}]/N={n}", lambda: compute_forces(x, v, t, neighbors, out=out)
+            yield f"compute_forces[rebuild,{backend}]/N={n}", lambda: compute_forces(x, v, t, NeighborList(), out=out)
+            if n <= DENSE_MAX_N:
+                yield f"compute_forces[dense,{backend}]/N={n}", lambda: compute_forces(x, v, t, out=out)
+                yield f"count_collisions[dense,{backend}]/N={n}", lambda: count_collisions(x, limit=0.2)
+            yield f"count_collisions[neighbors,{backend}]/N={n}", \
+                lambda: count_collisions(x, limit=0.2, neighbors=neighbors)
+            yield f"RK4Stepper.step[{backend}]/N={n}", lambda: stepper.step(x_s, v_s, t)
+        set_backend()
+
+    # 2. Target generators
+    for w, h in image_sizes:
+        path = synthetic_image(os.path.join(workdir, f"image_{w}x{h}.png"), (w, h))
+        yield f"get_target_points/{w}x{h}", _quiet(lambda: get_target_points(path, 1000))
+    for n in sizes:
+        yield f"get_text_points/N={n}", lambda: get_text_points("Happy New Year!", n)
+    for w, h in video_sizes:
+        path = synthetic_video(os.path.join(workdir, f"video_{w}x{h}.mp4"), (w, h))
+        yield f"extract_video_targets/{w}x{h}", _quiet(lambda: extract_video_targets(path, 1000, sample_rate=2))
+
+    # 3. Visualizers: one frame of each view (renderer), whole clips (matplotlib)
+    limits = TASK_LIMITS["task2"]
+    for n in sizes:
+        x, _, _ = synthetic_swarm(n)
+        frame = np.empty((480, 640, 3), dtype=np.uint8)
+        yield f"render_frame_2d/N={n}", lambda: render_frame_2d(x, limits, (640, 480), "bench", out=frame)
+        yield f"render_frame_3d/N={n}", lambda: render_frame_3d(x, limits, (640, 480), "bench", out=frame)
+    if shutil.which("ffmpeg"):
+        history = np.stack([synthetic_swarm(1000, seed)[0] for seed in range(30)])
+        clip = os.path.join(workdir, "clip.mp4")
+        yield "animate_swarm/N=1000x30", _quiet(lambda: animate_swarm(history, limits, clip, skip_frames=1))
+        yield "animate_swarm_2d/N=1000x30", _quiet(lambda: animate_swarm_2d(history, limits, clip, skip_frames=1))
+
+
+def run_benchmarks(quick=False, repeats=BENCH_REPEATS, select=None):
+    """
+    Times every case (optionally only names containing `select`).
+    Returns {"meta": {...}, "results": {name: {min, median, repeats}}}.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            for name, func in _cases(workdir, quick):
+                if select and select not in name:
+                    continue
+                results[name] = time_call(func, repeats)
+                print(f"{name:<40} {results[name]['min'] * 1e3:10.2f} ms")
+        finally:
+            set_backend()  # back to config.KERNEL_BACKEND
+    if not shutil.which("ffmpeg"):
+        print("ffmpeg not found: skipped the matplotlib visualizers.")
+    meta = {"date": time.strftime("%Y-%m-%d %H:%M:%S"), "python": platform.python_version(),
+            "numpy": np.__version__, "opencv": cv2.__version__, "machine": platform.machine(),
+            "cpus": os.cpu_count(), "quick": quick, "backends": available_backends()}
+    return {"meta": meta, "results": results}
+
+
+def save_results(report, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare_results(baseline, current, threshold=BENCH_THRESHOLD):
+    """
+    Compares the best (min) times of the cases both reports share; the
+    minimum is the least disturbed by other load on the machine.
+    A case regressed when it got slower by more than `threshold` (0.2 = 20%).
+    Returns a list of (name, baseline_s, current_s, ratio, regressed).
+    """
+    rows = []
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        before = baseline["results"][name]["min"]
+        after = result["min"]
+        ratio = after / before if before > 0 else np.inf
+        rows.append((name, before, after, ratio, ratio > 1.0 + threshold))
+    return rows
+
+
+def print_comparison(rows, threshold=BENCH_THRESHOLD):
+    print(f"{'case':<40} {'baseline':>12} {'current':>12} {'ratio':>8}")
+    for name, before, after, ratio, regressed in rows:
+        flag = "  REGRESSION" if regressed else ("  faster" if ratio < 1.0 / (1.0 + threshold) else "")
+        print(f"{name:<40} {before * 1e3:10.2f}ms {after * 1e3:10.2f}ms {ratio:8.2f}{flag}")
+    n_regressed = sum(row[4] for row in rows)
+    print(f"{n_regressed} of {len(rows)} cases slower than {threshold:.0%} over the baseline.")
+    return n_regressed
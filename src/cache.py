@@ -0,0 +1,257 @@
+import hashlib
+import json
+import os
+import cv2
+import numpy as np
+from .config import TARGET_CACHE_DIR, TARGET_CACHE_MB, SAMPLING, DTYPE, VIDEO_DOWNSCALE
+from .preprocessing import get_target_points, get_text_points
+from .video_processing import extract_video_targets, is_video_file, VideoTargetStream
+from .recorder import _trim
+
+# Bump when a target generator changes its output for the same inputs
+_CACHE_VERSION = 5
+
+# {(path, size, mtime_ns): sha256} so an unchanged file is hashed only once per process
+_file_hashes = {}
+
+
+def file_digest(path):
+    """ SHA-256 of a file's content (memoized on its size + modification time). """
+    stat = os.stat(path)
+    memo = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if memo not in _file_hashes:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        _file_hashes[memo] = digest.hexdigest()
+    return _file_hashes[memo]
+
+
+class TargetCache:
+    """
+    Content-addressed on-disk cache of formation targets.
+
+    The key is a hash of the generator name, the content of its input file,
+    every parameter (including the RNG seed) and the OpenCV version, so an
+    edited image or video is never served stale. Entries are .npy files
+    opened memory-mapped; once the directory grows past max_mb the least
+    recently used ones are deleted.
+    """
+
+    def __init__(self, directory=TARGET_CACHE_DIR, max_mb=TARGET_CACHE_MB):
+        self.directory = directory
+        self.max_bytes = max_mb * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, name, source=None, **params):
+        spec = {"name": name, "version": _CACHE_VERSION, "opencv": cv2.__version__, "params": params,
+                "dtype": np.dtype(DTYPE).name,
+                "source": None if source is None else file_digest(source)}
+        return hashlib.sha256(json.dumps(spec, sort_keys=True, default=repr).encode()).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".npy")
+
+    def load(self, key):
+        """ Memory-mapped entry, or None if it is not cached. """
+        path = self.path(key)
+        try:
+            array = np.load(path, mmap_mode='r')
+        except (FileNotFoundError, ValueError):
+            return None
+        os.utime(path)  # mark as recently used
+        return array
+
+    def store(self, key, array):
+        """ Writes an entry atomically and returns it memory-mapped. """
+        tmp = self.path(key) + f".{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, np.asarray(array))
+        os.replace(tmp, self.path(key))
+        self.evict(keep=key)
+        return np.load(self.path(key), mmap_mode='r')
+
+    def evict(self, keep=None):
+        """ Deletes least recently used entries until the cache fits in max_bytes. """
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".npy"):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if keep is not None and name == keep + ".npy":
+                continue
+            os.remove(os.path.join(self.directory, name))
+            total -= size
+
+    def get_or_compute(self, name, compute, source=None, seed=0, **params):
+        """
+        Cached compute(), which is run with np.random seeded by `seed`.
+        The global RNG state is restored afterwards, hit or miss.
+        """
+        key = self.key(name, source, seed=seed, **params)
+        array = self.load(key)
+        if array is not None:
+            self.hits += 1
+            return array
+
+        self.misses += 1
+        state = np.random.get_state()
+        np.random.seed(seed)
+        try:
+            array = compute()
+        finally:
+            np.random.set_state(state)
+        return self.store(key, array)
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(".npy"):
+                os.remove(os.path.join(self.directory, name))
+
+
+_default_cache = None
+
+
+def get_cache():
+    """ Shared cache in TARGET_CACHE_DIR. """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = TargetCache()
+    return _default_cache
+
+
+def cached_target_points(image_path, n_drones, z_height=10.0, scale=0.1, seed=0, cache=None,
+                         sampling=SAMPLING):
+    """ get_target_points through the cache (read-only memory-mapped result). """
+    cache = cache or get_cache()
+    if not os.path.exists(image_path):
+        raise FileNotFoundError(f"Image not found at: {image_path}")
+    return cache.get_or_compute("get_target_points",
+                                lambda: get_target_points(image_path, n_drones, z_height=z_height, scale=scale,
+                                                          sampling=sampling),
+                                source=image_path, seed=seed, n_drones=n_drones, z_height=z_height, scale=scale,
+                                sampling=sampling)
+
+
+def cached_text_points(text, n_drones, z_height=10.0, scale=0.1, seed=0, cache=None, sampling=SAMPLING):
+    """ get_text_points through the cache. """
+    cache = cache or get_cache()
+    return cache.get_or_compute("get_text_points",
+                                lambda: get_text_points(text, n_drones, z_height=z_height, scale=scale,
+                                                        sampling=sampling),
+                                seed=seed, text=text, n_drones=n_drones, z_height=z_height, scale=scale,
+                                sampling=sampling)
+
+
+def cached_video_targets(video_path, n_drones, scale=0.1, z_height=10.0, sample_rate=5, seed=0,
+                         cache=None, **options):
+    """
+    extract_video_targets through the cache; `options` are its remaining
+    keyword arguments (coherent, fast, ...).
+    """
+    if not is_video_file(video_path):
+        # Camera or stream: nothing to key an entry on
+        return extract_video_targets(video_path, n_drones, scale=scale, z_height=z_height,
+                                     sample_rate=sample_rate, **options)
+    cache = cache or get_cache()
+    if not os.path.exists(video_path):
+        raise FileNotFoundError(f"Video not found: {video_path}")
+    return cache.get_or_compute(
+        "extract_video_targets",
+        lambda: extract_video_targets(video_path, n_drones, scale=scale, z_height=z_height,
+                                      sample_rate=sample_rate, **options),
+        source=video_path, seed=seed, n_drones=n_drones, scale=scale, z_height=z_height,
+        sample_rate=sample_rate, **options)
+
+
+def cached_video_stream(video_path, n_drones, scale=0.1, z_height=10.0, sample_rate=5, seed=0,
+                        cache=None, **options):
+    """
+    Streaming counterpart of cached_video_targets.
+
+    On a hit this is the cached (frames, n_drones, 3) memmap. On a miss it is
+    a VideoTargetStream whose frames are also written to the cache as they
+    are consumed; the entry is only committed once the whole video was read.
+    Same keys as cached_video_targets, so both share entries. Cameras and
+    stream URLs are streamed without caching. A stream is decoded in order:
+    `fast` only turns on downscale and roi, and `workers` is rejected.
+    """
+    if options.pop("workers", None) not in (None, 1):
+        raise ValueError("A video stream is decoded in order: workers only applies to cached_video_targets.")
+    if options.pop("fast", False):
+        # Keyed by the resolved options, not shared with the parallel fast=True batch entry
+        options.setdefault("downscale", VIDEO_DOWNSCALE)
+        options.setdefault("roi", True)
+    if not is_video_file(video_path):
+        return VideoTargetStream(video_path, n_drones, scale=scale, z_height=z_height,
+                                 sample_rate=sample_rate, seed=seed, **options)
+    cache = cache or get_cache()
+    key = cache.key("extract_video_targets", video_path, seed=seed, n_drones=n_drones, scale=scale,
+                    z_height=z_height, sample_rate=sample_rate, **options)
+    frames = cache.load(key)
+    if frames is not None:
+        cache.hits += 1
+        return frames
+    cache.misses += 1
+    return _CachingStream(cache, key, seed, video_path, n_drones, scale, z_height, sample_rate, options)
+
+
+class _CachingStream:
+    """ VideoTargetStream that tees its frames into a cache entry. """
+
+    def __init__(self, cache, key, seed, video_path, n_drones, scale, z_height, sample_rate, options):
+        self.cache = cache
+        self.key = key
+        # A private RandomState seeded like get_or_compute does with np.random, so
+        # the entry matches a sequential batch extraction. The parallel one (fast,
+        # workers > 1) re-learns the background per segment and draws its own
+        # segment seeds, so its frames differ; it is keyed by those options.
+        self.stream = VideoTargetStream(video_path, n_drones, scale=scale, z_height=z_height,
+                                        sample_rate=sample_rate, seed=seed, **options)
+        self.n_frames = self.stream.n_frames
+        self.n_drones = n_drones
+
+    def __len__(self):
+        return len(self.stream)  # TypeError when the source does not report its length
+
+    def __iter__(self):
+        base = self.cache.path(self.key) + f".{os.getpid()}"
+        # The length is only an estimate (or unknown): double the buffer whenever it fills up
+        buffer = _open_frames(base + ".tmp", self.n_frames or 64, self.n_drones)
+        count = 0
+        complete = False
+        try:
+            for frame_targets in self.stream:
+                if count == len(buffer):
+                    full = buffer.filename
+                    buffer = _open_frames(f"{base}.{2 * count}.tmp", 2 * count, self.n_drones, buffer)
+                    os.remove(full)
+                buffer[count] = frame_targets
+                count += 1
+                yield frame_targets
+            complete = True
+        finally:
+            tmp = buffer.filename
+            if complete:
+                _trim(buffer, count)
+                os.replace(tmp, self.cache.path(self.key))
+                self.cache.evict(keep=self.key)
+            else:
+                self.stream.close()
+                del buffer
+                os.remove(tmp)
+
+
+def _open_frames(path, n_frames, n_drones, previous=None):
+    """ (n_frames, n_drones, 3) .npy memmap for a streamed entry, starting with the frames of `previous`. """
+    buffer = np.lib.format.open_memmap(path, mode='w+', dtype=DTYPE, shape=(n_frames, n_drones, 3))
+    if previous is not None:
+        buffer[:len(previous)] = previous
+    return buffer
@@ -0,0 +1,53 @@
+import os
+import numpy as np
+
+# Bumped when the layout of the saved state changes
+CHECKPOINT_VERSION = 1
+
+
+def save_checkpoint(path, state):
+    """
+    Writes a dict of arrays / scalars / strings to a compressed .npz file.
+
+    The file is written next to its final name first and then moved over it
+    with os.replace, so a crash while saving leaves the previous checkpoint
+    intact (never a half-written one).
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:  # a file object: savez would append ".npz" to the name
+        np.savez_compressed(f, version=CHECKPOINT_VERSION, **state)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path):
+    """ Reads a checkpoint written by save_checkpoint() back into a dict. """
+    with np.load(path, allow_pickle=False) as data:
+        state = {key: data[key] for key in data.files}
+    if int(state.pop("version")) != CHECKPOINT_VERSION:
+        raise ValueError(f"{path} was written by another checkpoint version.")
+    return state
+
+
+def rng_state():
+    """ The global np.random state as plain arrays (no pickling needed). """
+    name, keys, pos, has_gauss, gauss = np.random.get_state()
+    return {"rng.keys": keys, "rng.pos": pos, "rng.has_gauss": has_gauss, "rng.gauss": gauss}
+
+
+def set_rng_state(state):
+    np.random.set_state(("MT19937", state["rng.keys"], int(state["rng.pos"]),
+                         int(state["rng.has_gauss"]), float(state["rng.gauss"])))
+
+
+def prefixed(prefix, state):
+    """ {key: value} -> {prefix.key: value}, to nest component states in one file. """
+    return {f"{prefix}.{key}": value for key, value in state.items()}
+
+
+def unprefixed(prefix, state):
+    """ The entries saved with prefixed(prefix, ...), without the prefix. """
+    start = prefix + "."
+    return {key[len(start):]: value for key, value in state.items() if key.startswith(start)}
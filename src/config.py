@@ -1,3 +1,4 @@
+import os
 import numpy as np
 
 # --- Simulation Parameters ---
@@ -43,4 +44,153 @@ TASK_LIMITS = {
     
     # Task 3 (Video): Usually square, so we keep X and Y equal
     "task3": ((-120, 120), (-120, 120), (0, 30)),   
-}
\ No newline at end of file
+}
+
+# --- PRECISION ---
+# Floating point type of the simulation state (positions, velocities, targets)
+# and of every buffer the physics / solver work in. np.float32 halves the
+# memory traffic of the repulsion kernels; meter-scale positions keep ~1e-6 m
+# resolution, far below the crash limit. Check a change with main_precision.py.
+DTYPE = np.float64
+
+# --- NEIGHBOR SEARCH ---
+# Extra radius kept in the Verlet neighbor list on top of R_SAFE.
+# The list is only rebuilt after some drone moved more than SKIN / 2.
+NEIGHBOR_SKIN = 0.4
+
+# --- DENSE PAIRWISE KERNEL ---
+# The dense repulsion / collision path works on blocks of TILE_ROWS drones
+# against the whole swarm. TILE_MEMORY_MB caps the temporaries of all tiles
+# running at once, so peak memory stays flat as N grows.
+TILE_ROWS = 256
+TILE_MEMORY_MB = 256
+
+# Threads used for the tiles (NumPy releases the GIL)
+N_WORKERS = os.cpu_count() or 1
+
+# --- KERNEL BACKEND ---
+# Implementation of the pair kernels (repulsion, collision counts):
+# "numpy" (reference), "numba" (fused JIT loops, needs `pip install numba`)
+# or "auto" (numba when installed, numpy otherwise)
+KERNEL_BACKEND = "auto"
+
+# --- ADAPTIVE SOLVER (Dormand-Prince 5(4)) ---
+# Error tolerances (meters for positions, m/s for velocities)
+ADAPTIVE_RTOL = 1e-2
+ADAPTIVE_ATOL = 1e-2
+
+# Step size bounds in seconds
+ADAPTIVE_DT_MIN = 1e-4
+ADAPTIVE_DT_MAX = 0.2
+
+# --- SOLVER SELECTION ---
+# "rk4": explicit RK4, needs DT = 0.01 with the stiff constants above.
+# "imex": attraction + damping implicit, repulsion explicit with sub-steps.
+#         Stays stable with DT raised to 0.05 - 0.1.
+# "adaptive": Dormand-Prince 5(4) with its own step size (ADAPTIVE_* above),
+#             sampled every DT.
+SOLVER = "rk4"
+
+# Sub-steps taken by drones with a neighbor close enough to repel (IMEX only)
+IMEX_SUBSTEPS = 4
+
+# --- TRAJECTORY RECORDING ---
+# Keep one frame every RECORD_EVERY steps (the videos use every 5th anyway)
+RECORD_EVERY = 5
+# float32 is plenty for meter-scale positions and halves the file size
+RECORD_DTYPE = np.float32
+# Frames preallocated when the show length is unknown (live video); doubled when full
+RECORD_INITIAL_FRAMES = 1024
+
+# --- FLIGHT LOG FORMAT ---
+# Quantization step of stored positions (meters) and frames per compressed chunk
+FLIGHTLOG_RESOLUTION = 0.01
+FLIGHTLOG_CHUNK_FRAMES = 64
+
+# --- VIDEO RENDERING ---
+# Frame size (width, height) of the rasterized videos
+RENDER_SIZE = (960, 720)
+# Frames rendered per worker job
+RENDER_CHUNK_FRAMES = 32
+
+# --- LIVE PREVIEW ---
+# Redraw rate of the live viewer (frames per second)
+LIVE_FPS = 30
+
+# --- TARGET ASSIGNMENT ---
+# Which drone flies to which target: "sum" (total distance), "sum_sq"
+# (squared distances, crossing-free paths) or "max" (longest flight)
+ASSIGN_OBJECTIVE = "sum"
+# Exact Hungarian assignment up to this many drones, greedy approximation above
+ASSIGN_EXACT_LIMIT = 3000
+
+# --- VIDEO TARGETS ---
+# Coherent tracking: pixels a target may drift off the blob before it is resampled
+VIDEO_SNAP_RADIUS = 3.0
+# Streaming mode: frames decoded ahead of the simulation (bounded queue size)
+VIDEO_PREFETCH = 8
+# Fast mode: background subtraction on frames resized by VIDEO_DOWNSCALE, mask
+# search limited to the object box + VIDEO_ROI_MARGIN (pixels of the small
+# frame), parallel segments warm the background model up on VIDEO_WARMUP frames
+VIDEO_DOWNSCALE = 0.5
+VIDEO_ROI_MARGIN = 16
+VIDEO_WARMUP = 20
+
+# --- TARGET CACHE ---
+# Generated formations are cached here (keyed on input file content + parameters)
+TARGET_CACHE_DIR = "Data/cache"
+# Least recently used entries are deleted above this size
+TARGET_CACHE_MB = 512
+
+# --- TARGET SAMPLING ---
+# "random": uniform pixels (original behaviour); "blue_noise": evenly spaced
+# Poisson-disk targets, at least TARGET_SPACING meters apart where the shape allows
+SAMPLING = "random"
+TARGET_SPACING = R_SAFE
+# Dart-throwing rounds of the Poisson-disk sampler (more = denser, slower)
+POISSON_ROUNDS = 60
+
+# --- CONVERGENCE / SLEEPING ---
+# A phase counts as settled once, for CONVERGE_HOLD seconds, every drone is
+# within CONVERGE_POS_TOL meters of its target, slower than CONVERGE_SPEED_TOL
+# and no pair is closer than CONVERGE_MIN_SEP. Checked every CONVERGE_EVERY steps.
+# 0.5 m is under half the TARGET_SPACING: every drone is nearer its own target than a neighbor's
+CONVERGE_POS_TOL = 0.5
+CONVERGE_SPEED_TOL = 0.05
+CONVERGE_MIN_SEP = 0.2
+CONVERGE_HOLD = 1.0
+CONVERGE_EVERY = 10
+# Active set: drones this close to their target and this slow, none in reach, sleep
+SLEEP_POS_TOL = 0.02
+SLEEP_SPEED_TOL = 0.01
+# Steps between checks for drones that can be put to sleep
+SLEEP_CHECK_EVERY = 10
+# Use the active set in the task scripts
+ACTIVE_SET = False
+
+# --- BENCHMARKS ---
+# Timed rounds per case (after one warm-up call); fast cases are looped so a
+# round takes at least BENCH_MIN_ROUND seconds. The best round is compared.
+BENCH_REPEATS = 5
+BENCH_MIN_ROUND = 0.05
+# A case counts as a regression when it is this much slower than the baseline
+BENCH_THRESHOLD = 0.2
+BENCH_BASELINE = "Data/benchmarks/baseline.json"
+
+# --- TELEMETRY ---
+# Per-step timers / counters / physics metrics written to Data/output/*_telemetry.jsonl
+# by the task scripts (off: the instrumented calls cost one attribute check)
+TELEMETRY = False
+# Steps between two JSON lines
+TELEMETRY_EVERY = 100
+
+# --- CHECKPOINTS ---
+# Long shows save their full state (compressed .npz) every CHECKPOINT_EVERY
+# steps, so an interrupted run can be resumed (main_task3.py --resume)
+CHECKPOINT_EVERY = 2000
+CHECKPOINT_DIR = "Data/checkpoints"
+
+# --- PRECISION CHECK ---
+# main_precision.py: a float32 run passes when its final mean distance to the
+# targets is within PRECISION_TOL meters of the float64 run's (and it crashes no more)
+PRECISION_TOL = 0.15
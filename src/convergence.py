@@ -0,0 +1,68 @@
+import numpy as np
+from .config import (DT, CONVERGE_POS_TOL, CONVERGE_SPEED_TOL, CONVERGE_MIN_SEP, CONVERGE_HOLD,
+                     CONVERGE_EVERY)
+from .physics import min_separation
+
+
+class ConvergenceMonitor:
+    """
+    Decides when a formation phase has settled, so the loop can end early.
+
+    Every `every` steps it measures the largest distance to target, the
+    largest speed and the smallest pair distance. The phase is converged
+    once all three stayed within their thresholds for `hold` seconds.
+    A threshold of None is not checked.
+    """
+
+    def __init__(self, pos_tol=CONVERGE_POS_TOL, speed_tol=CONVERGE_SPEED_TOL, min_sep=CONVERGE_MIN_SEP,
+                 hold=CONVERGE_HOLD, every=CONVERGE_EVERY, dt=DT, neighbors=None):
+        self.pos_tol = pos_tol
+        self.speed_tol = speed_tol
+        self.min_sep = min_sep
+        self.every = every
+        self.hold_steps = int(round(hold / dt))
+        self.neighbors = neighbors
+        self.reset()
+
+    def reset(self):
+        """ Starts over (e.g. when the targets of a new phase are set). """
+        self.steps = 0
+        self.settled_since = None
+        self.converged = False
+        self.max_error = np.inf
+        self.max_speed = np.inf
+        self.min_separation = 0.0
+
+    def _measure(self, positions, velocities, targets):
+        error = positions - targets
+        self.max_error = float(np.sqrt(np.max(np.einsum('...k,...k->...', error, error))))
+        self.max_speed = float(np.sqrt(np.max(np.einsum('...k,...k->...', velocities, velocities))))
+        if self.min_sep is not None:
+            # Only pairs closer than min_sep matter, so a short search radius is enough
+            if self.neighbors is not None and self.neighbors.cutoff >= self.min_sep:
+                self.min_separation = min_separation(positions, self.neighbors)
+            else:
+                self.min_separation = min_separation(positions, radius=self.min_sep)
+
+    def update(self, positions, velocities, targets):
+        """
+        Called once per step. Returns True once the swarm has converged.
+        """
+        self.steps += 1
+        if self.converged or self.steps % self.every != 0:
+            return self.converged
+
+        self._measure(positions, velocities, targets)
+        settled = ((self.pos_tol is None or self.max_error < self.pos_tol)
+                   and (self.speed_tol is None or self.max_speed < self.speed_tol)
+                   and (self.min_sep is None or self.min_separation >= self.min_sep))
+        if not settled:
+            self.settled_since = None
+        elif self.settled_since is None:
+            self.settled_since = self.steps
+        self.converged = settled and self.steps - self.settled_since >= self.hold_steps
+        return self.converged
+
+    def report(self):
+        return (f"max error {self.max_error:.3f} m, max speed {self.max_speed:.3f} m/s, "
+                f"min separation {self.min_separation:.2f} m")
@@ -0,0 +1,260 @@
+import os
+import struct
+import zlib
+import numpy as np
+from .config import DT, RECORD_EVERY, FLIGHTLOG_RESOLUTION, FLIGHTLOG_CHUNK_FRAMES
+
+# --- File layout ---
+# header:  magic | n_drones (u32) | chunk_frames (u32) | frame_dt (f64) | resolution (f64)
+# chunk:   magic | first_frame (u64) | n_frames (u32) | payload size (u32) | zlib payload
+#          payload = first frame as int32 + (n_frames - 1) frame-to-frame deltas as int16,
+#          all in units of `resolution` meters (1 cm by default)
+# index:   magic | n_chunks (u64) | (first_frame, offset) pairs (u64) ...
+# footer:  magic | index offset (u64)
+_MAGIC = b"DSWLOG01"
+_HEADER = struct.Struct("<8sIIdd")
+_CHUNK_MAGIC = b"CHNK"
+_CHUNK = struct.Struct("<4sQII")
+_INDEX_MAGIC = b"INDX"
+_FOOTER_MAGIC = b"DSWLEND1"
+_FOOTER = struct.Struct("<8sQ")
+
+
+class FlightLogWriter:
+    """
+    Streaming writer for the compressed flight-log format.
+
+    Positions are quantized (1 cm by default), delta-encoded between frames
+    and zlib-compressed in chunks of `chunk_frames`. Same record() interface as
+    TrajectoryRecorder, so it can be used as the recorder of a simulation loop.
+    """
+
+    def __init__(self, path, n_drones, every=RECORD_EVERY, frame_dt=None,
+                 resolution=FLIGHTLOG_RESOLUTION, chunk_frames=FLIGHTLOG_CHUNK_FRAMES, dt=DT):
+        self.path = path
+        self.n_drones = n_drones
+        self.every = every
+        # Stored in the header; `dt` is the time step of the simulation that calls record()
+        self.frame_dt = dt * every if frame_dt is None else frame_dt
+        self.resolution = resolution
+        self.chunk_frames = chunk_frames
+
+        self.steps = 0
+        self.count = 0
+        self._pending = []
+        self._index = []
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "wb")
+        self._file.write(_HEADER.pack(_MAGIC, n_drones, chunk_frames, self.frame_dt, resolution))
+
+    def record(self, positions, velocities=None):
+        """
+        Called once per simulation step; stores every `every`-th frame.
+        (Velocities are not part of the format and are ignored.)
+        """
+        if self.steps % self.every == 0:
+            self.write_frame(positions)
+        self.steps += 1
+
+    append = record
+
+    def write_frame(self, positions):
+        """ Appends one frame, regardless of decimation. """
+        quantized = np.rint(np.asarray(positions) / self.resolution)
+        if np.any(np.abs(quantized) > np.iinfo(np.int32).max):
+            raise ValueError("Position out of range for the flight log resolution.")
+        self._pending.append(quantized.astype(np.int32))
+        self.count += 1
+        if len(self._pending) == self.chunk_frames:
+            self._flush_chunk()
+
+    def _flush_chunk(self):
+        if not self._pending:
+            return
+        frames = np.stack(self._pending)
+        deltas = np.diff(frames, axis=0)
+        if deltas.size and np.any(np.abs(deltas) > np.iinfo(np.int16).max):
+            raise ValueError("Drone moved too far between two frames for int16 deltas; "
+                             "record more often or use a coarser resolution.")
+
+        payload = zlib.compress(frames[0].tobytes() + deltas.astype(np.int16).tobytes())
+        first_frame = self.count - len(frames)
+        self._index.append((first_frame, self._file.tell()))
+        self._file.write(_CHUNK.pack(_CHUNK_MAGIC, first_frame, len(frames), len(payload)))
+        self._file.write(payload)
+        self._pending = []
+
+    def close(self):
+        """ Writes the last chunk and the frame index. """
+        if self._file.closed:
+            return
+        self._flush_chunk()
+        index_offset = self._file.tell()
+        self._file.write(_INDEX_MAGIC + struct.pack("<Q", len(self._index)))
+        self._file.write(np.array(self._index, dtype="<u8").tobytes())
+        self._file.write(_FOOTER.pack(_FOOTER_MAGIC, index_offset))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FlightLogReader:
+    """
+    Random-access reader for flight logs.
+
+    Only the chunks that are needed are decompressed. Indexing works like a
+    (frames, N, 3) array: log[k] is one frame, log[a:b:s] is a lazy view that
+    the visualizers can animate directly. A log whose writer crashed (no index
+    yet) is still readable by scanning its chunks.
+    """
+
+    def __init__(self, path, dtype=np.float32):
+        self.path = path
+        self.dtype = dtype
+        self._file = open(path, "rb")
+
+        magic, self.n_drones, self.chunk_frames, self.frame_dt, self.resolution = \
+            _HEADER.unpack(self._file.read(_HEADER.size))
+        if magic != _MAGIC:
+            raise ValueError(f"Not a drone flight log: {path}")
+
+        self._chunk_starts, self._chunk_offsets, self._chunk_sizes = self._read_index()
+        self.n_frames = int(self._chunk_starts[-1] + self._chunk_sizes[-1]) if len(self._chunk_starts) else 0
+        self._cache_key = None
+        self._cache = None
+
+    def _read_index(self):
+        f = self._file
+        size = f.seek(0, os.SEEK_END)
+        entries = None
+        if size >= _HEADER.size + _FOOTER.size:
+            f.seek(size - _FOOTER.size)
+            magic, index_offset = _FOOTER.unpack(f.read(_FOOTER.size))
+            if magic == _FOOTER_MAGIC:
+                f.seek(index_offset)
+                if f.read(4) == _INDEX_MAGIC:
+                    (n_chunks,) = struct.unpack("<Q", f.read(8))
+                    entries = np.frombuffer(f.read(16 * n_chunks), dtype="<u8").reshape(-1, 2)
+
+        if entries is None:
+            # No index (writer did not finish): walk the chunk headers
+            entries, offset = [], _HEADER.size
+            while offset + _CHUNK.size <= size:
+                f.seek(offset)
+                magic, first, n, nbytes = _CHUNK.unpack(f.read(_CHUNK.size))
+                if magic != _CHUNK_MAGIC or offset + _CHUNK.size + nbytes > size:
+                    break
+                entries.append((first, offset))
+                offset += _CHUNK.size + nbytes
+            entries = np.array(entries, dtype=np.uint64).reshape(-1, 2)
+
+        sizes = []
+        for _, offset in entries:
+            f.seek(int(offset))
+            sizes.append(_CHUNK.unpack(f.read(_CHUNK.size))[2])
+        return entries[:, 0].astype(np.int64), entries[:, 1].astype(np.int64), np.array(sizes, dtype=np.int64)
+
+    def _decode_chunk(self, chunk, drones=None):
+        """ Integer frames of one chunk (cached, since reads are usually sequential). """
+        key = (chunk, None if drones is None else tuple(np.atleast_1d(drones)))
+        if key == self._cache_key:
+            return self._cache
+
+        self._file.seek(int(self._chunk_offsets[chunk]))
+        _, _, n_frames, nbytes = _CHUNK.unpack(self._file.read(_CHUNK.size))
+        raw = zlib.decompress(self._file.read(nbytes))
+
+        key_bytes = self.n_drones * 3 * 4
+        first = np.frombuffer(raw[:key_bytes], dtype=np.int32).reshape(self.n_drones, 3)
+        deltas = np.frombuffer(raw[key_bytes:], dtype=np.int16).reshape(n_frames - 1, self.n_drones, 3)
+        if drones is not None:
+            first, deltas = first[drones], deltas[:, drones]
+
+        # Undo the delta encoding (only for the selected drones)
+        frames = np.empty((n_frames,) + first.shape, dtype=np.int32)
+        frames[0] = first
+        np.cumsum(deltas, axis=0, dtype=np.int32, out=frames[1:])
+        frames[1:] += first
+
+        self._cache_key, self._cache = key, frames
+        return frames
+
+    def read(self, start=0, stop=None, step=1, drones=None):
+        """
+        Frames [start:stop:step] as a (frames, n, 3) array in meters.
+        `drones` selects a subset (index array / slice) of the swarm.
+        """
+        start, stop, step = slice(start, stop, step).indices(self.n_frames)
+        wanted = np.arange(start, stop, step)
+        n_sel = self.n_drones if drones is None else len(np.arange(self.n_drones)[drones])
+        out = np.empty((len(wanted), n_sel, 3), dtype=self.dtype)
+
+        chunks = np.searchsorted(self._chunk_starts, wanted, side="right") - 1
+        for chunk in np.unique(chunks):
+            rows = np.nonzero(chunks == chunk)[0]
+            frames = self._decode_chunk(chunk, drones)
+            out[rows] = frames[wanted[rows] - self._chunk_starts[chunk]] * self.resolution
+        return out
+
+    def frame_at(self, t, drones=None):
+        """ Positions at show time t (seconds), nearest recorded frame. """
+        if self.n_frames == 0:
+            raise IndexError(f"{self.path} holds no frames")
+        k = int(np.clip(round(t / self.frame_dt), 0, self.n_frames - 1))
+        return self.read(k, k + 1, drones=drones)[0]
+
+    def __len__(self):
+        return self.n_frames
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return FlightLogView(self, range(*item.indices(self.n_frames)))
+        k = int(item)
+        if k < 0:
+            k += self.n_frames
+        if not 0 <= k < self.n_frames:
+            raise IndexError(f"Frame {item} out of range ({self.n_frames} frames)")
+        return self.read(k, k + 1)[0]
+
+    def __iter__(self):
+        for k in range(self.n_frames):
+            yield self[k]
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FlightLogView:
+    """ Lazy frame subset of a FlightLogReader (what log[a:b:s] returns). """
+
+    def __init__(self, reader, frames):
+        self.reader = reader
+        self.frames = frames
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return FlightLogView(self.reader, self.frames[item])
+        return self.reader[self.frames[item]]
+
+    def __iter__(self):
+        for k in self.frames:
+            yield self.reader[k]
+
+
+def open_flight_log(path, dtype=np.float32):
+    """ Opens a flight log for reading. """
+    return FlightLogReader(path, dtype=dtype)
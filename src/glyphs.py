@@ -0,0 +1,130 @@
+import numpy as np
+import cv2
+from .config import SAMPLING, TARGET_SPACING, DTYPE
+from .sampling import sample_points
+
+# {(font, font_scale, thickness): GlyphAtlas}
+_atlases = {}
+
+
+class GlyphAtlas:
+    """
+    Per-character point clouds for one font / size.
+
+    Each glyph is rendered once with cv2.putText and stored as the pixel
+    coordinates of its strokes (relative to the pen position on the
+    baseline) plus its advance width. Any string is then laid out by
+    offsetting these point sets, without rendering a canvas.
+    """
+
+    def __init__(self, font=cv2.FONT_HERSHEY_DUPLEX, font_scale=2.0, thickness=2):
+        self.font = font
+        self.font_scale = font_scale
+        self.thickness = thickness
+        (_, self.ascent), self.descent = cv2.getTextSize("Ag", font, font_scale, thickness)
+        self._glyphs = {}
+
+    def glyph(self, char):
+        """ (points (k, 2) int32, advance) of one character, rendered on first use. """
+        if char not in self._glyphs:
+            (width, _), _ = cv2.getTextSize(char, self.font, self.font_scale, self.thickness)
+            pad = 2 * self.thickness + 2
+            height = self.ascent + self.descent + 2 * pad
+            img = np.zeros((height, width + 2 * pad), dtype=np.uint8)
+            cv2.putText(img, char, (pad, pad + self.ascent), self.font, self.font_scale, 255, self.thickness)
+            y_coords, x_coords = np.nonzero(img)
+            points = np.column_stack((x_coords - pad, y_coords - pad - self.ascent)).astype(np.int32)
+            # getTextSize counts the stroke thickness once per string, not per glyph
+            self._glyphs[char] = (points, width - self.thickness)
+        return self._glyphs[char]
+
+    def layout(self, text, line_spacing=1.4):
+        """
+        Glyph point sets of a (multi-line) string in pixel coordinates,
+        each line centered horizontally. Returns a list of (k, 2) arrays.
+        """
+        line_height = int(round((self.ascent + self.descent) * line_spacing))
+        placed = []
+        for row, line in enumerate(text.split("\n")):
+            width = sum(self.glyph(char)[1] for char in line) + self.thickness
+            x = -width // 2
+            for char in line:
+                points, advance = self.glyph(char)
+                if len(points):
+                    placed.append(points + (x, row * line_height))
+                x += advance
+        return placed
+
+
+def get_atlas(font=cv2.FONT_HERSHEY_DUPLEX, font_scale=2.0, thickness=2):
+    """ Shared atlas per font / size (glyphs are built lazily and kept). """
+    key = (font, font_scale, thickness)
+    if key not in _atlases:
+        _atlases[key] = GlyphAtlas(font, font_scale, thickness)
+    return _atlases[key]
+
+
+def _allocate(sizes, n):
+    """ Splits n drones over glyphs in proportion to their pixel counts (largest remainder). """
+    share = sizes / sizes.sum() * n
+    counts = np.floor(share).astype(np.int64)
+    short = n - counts.sum()
+    if short:
+        counts[np.argsort(counts - share)[:short]] += 1
+    return counts
+
+
+def sample_glyph_points(glyphs, n_drones):
+    """
+    Picks n_drones pixels from a list of glyph point sets.
+
+    Every glyph gets drones in proportion to its pixel count (= stroke length
+    for a constant stroke thickness), then pixels are drawn inside each glyph:
+    without replacement when it has enough of them, with replacement otherwise.
+    Fully vectorized, no per-glyph Python loop.
+    """
+    sizes = np.array([len(points) for points in glyphs], dtype=np.int64)
+    if sizes.sum() == 0:
+        raise ValueError("Text string is empty or font size is too small.")
+    all_points = np.concatenate(glyphs)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    counts = _allocate(sizes, n_drones)
+    glyph_of_drone = np.repeat(np.arange(len(glyphs)), counts)
+
+    if np.all(counts <= sizes):
+        # Random rank of every pixel inside its glyph; keep the first counts[g] ranks
+        glyph_of_pixel = np.repeat(np.arange(len(glyphs)), sizes)
+        order = np.lexsort((np.random.rand(len(all_points)), glyph_of_pixel))
+        rank = np.arange(len(all_points)) - np.repeat(starts, sizes)
+        chosen = order[rank < np.repeat(counts, sizes)]
+    else:
+        offsets = np.floor(np.random.rand(n_drones) * sizes[glyph_of_drone]).astype(np.int64)
+        chosen = starts[glyph_of_drone] + offsets
+    return all_points[chosen]
+
+
+def glyph_text_points(text, n_drones, z_height=10.0, scale=0.1, font=cv2.FONT_HERSHEY_DUPLEX,
+                      font_scale=2.0, thickness=2, line_spacing=1.4, sampling=SAMPLING):
+    """
+    N target points for any (multi-line) string, composed from the glyph atlas.
+    Same output convention as get_text_points: centered, Y up, z = z_height.
+    With sampling="blue_noise" the strokes are sampled as one evenly spaced
+    set instead of glyph by glyph.
+    """
+    glyphs = get_atlas(font, font_scale, thickness).layout(text, line_spacing)
+    if not glyphs:
+        raise ValueError("Text string is empty or font size is too small.")
+    if sampling == "random":
+        selected = sample_glyph_points(glyphs, n_drones)
+    else:
+        selected = sample_points(np.concatenate(glyphs), n_drones, sampling, min_dist=TARGET_SPACING / scale)
+
+    # Center and Scale
+    x_centered = selected[:, 0] - np.mean(selected[:, 0])
+    y_centered = selected[:, 1] - np.mean(selected[:, 1])
+
+    targets = np.zeros((n_drones, 3), dtype=DTYPE)
+    targets[:, 0] = x_centered * scale
+    targets[:, 1] = -y_centered * scale
+    targets[:, 2] = z_height
+    return targets
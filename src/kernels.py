@@ -0,0 +1,127 @@
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from .config import R_SAFE, TILE_ROWS, TILE_MEMORY_MB, N_WORKERS
+
+# Rough bytes of temporaries per (row, column) pair inside one tile:
+# diff (3 floats) + distance + 1/d^3 + mask
+_BYTES_PER_PAIR = 8 * 3 + 8 + 8 + 1
+
+_pool = None
+_workers = N_WORKERS  # default thread count of the tiled kernels
+
+
+def _get_pool():
+    """ Shared thread pool (NumPy releases the GIL inside the heavy ops) """
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=_workers)
+    return _pool
+
+
+def set_workers(n):
+    """ Threads the tiled kernels use from now on (1 = tiles run in the calling thread). """
+    global _pool, _workers
+    _workers = max(1, int(n))
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+
+
+def tile_size(n_rows, n_cols, rows=TILE_ROWS, memory_mb=TILE_MEMORY_MB, workers=None):
+    """
+    Number of rows per tile so that all tiles in flight together stay under memory_mb.
+    """
+    workers = _workers if workers is None else workers
+    budget = memory_mb * 1024 * 1024 // max(workers, 1)
+    fit = budget // max(n_cols * _BYTES_PER_PAIR, 1)
+    return int(max(1, min(rows, fit, n_rows)))
+
+
+def _run_tiles(work, n_rows, tile, workers):
+    """ Calls work(start, stop) for every row tile, in parallel when there is more than one. """
+    bounds = [(start, min(start + tile, n_rows)) for start in range(0, n_rows, tile)]
+    if len(bounds) == 1 or workers <= 1:
+        return [work(start, stop) for start, stop in bounds]
+    return list(_get_pool().map(lambda b: work(*b), bounds))
+
+
+def _per_member(value, ndim, dtype=None):
+    """
+    Reshapes a per-batch-member (B,) parameter so it broadcasts against ndim axes.
+    Arrays are cast to `dtype` (the state's), so a float32 state is not upcast;
+    scalars come back as Python floats, which never upcast.
+    """
+    value = np.asarray(value)
+    if value.ndim == 0:
+        return value.item()
+    if dtype is not None:
+        value = value.astype(dtype, copy=False)
+    return value.reshape((-1,) + (1,) * (ndim - 1))
+
+
+def repulsion_tiled(positions, r_safe=R_SAFE, rows=TILE_ROWS, workers=None):
+    """
+    Dense repulsion sum(diff / d^3) over all pairs closer than r_safe,
+    computed one block of rows at a time.
+
+    Peak memory is (tile rows x N) instead of (N x N), and tiles are spread
+    over a thread pool. Each tile writes its own rows, so no locking is needed.
+    A batched (B, N, 3) state is tiled the same way (r_safe may be a (B,) array).
+    """
+    workers = _workers if workers is None else workers
+    batched = positions.ndim == 3
+    if not batched:
+        positions = positions[np.newaxis]
+    batch, n = positions.shape[:2]
+
+    repulsion = np.zeros_like(positions)
+    tile = tile_size(n, batch * n, rows=rows, workers=workers)
+    r_safe = _per_member(r_safe, 3, positions.dtype)
+
+    def work(start, stop):
+        # (B, rows, 1, 3) - (B, 1, N, 3) -> (B, rows, N, 3)
+        diff = positions[:, start:stop, np.newaxis, :] - positions[:, np.newaxis, :, :]
+        dist = np.linalg.norm(diff, axis=3)
+
+        # Drones don't repel themselves (the diagonal of this tile)
+        local = np.arange(stop - start)
+        dist[:, local, local + start] = np.inf
+
+        mask = dist < r_safe
+        if not np.any(mask):
+            return
+
+        with np.errstate(divide='ignore'):
+            inv_dist_cubed = 1.0 / (dist ** 3)
+        inv_dist_cubed[~mask] = 0.0
+
+        # Sum the force vectors of each row without building a (rows, N, 3) product
+        repulsion[:, start:stop] = np.einsum('bijk,bij->bik', diff, inv_dist_cubed)
+
+    _run_tiles(work, n, tile, workers)
+    return repulsion if batched else repulsion[0]
+
+
+def count_pairs_tiled(positions, limit, rows=TILE_ROWS, workers=None):
+    """
+    Counts pairs closer than `limit`, one block of rows at a time.
+    Each tile only looks at columns j > i, so every pair is counted once.
+    A batched (B, N, 3) state gives one count per batch member.
+    """
+    workers = _workers if workers is None else workers
+    batched = positions.ndim == 3
+    if not batched:
+        positions = positions[np.newaxis]
+    batch, n = positions.shape[:2]
+
+    tile = tile_size(n, batch * n, rows=rows, workers=workers)
+    limit_sq = limit ** 2
+
+    def work(start, stop):
+        diff = positions[:, start:stop, np.newaxis, :] - positions[:, np.newaxis, start:, :]
+        close = np.einsum('bijk,bijk->bij', diff, diff) < limit_sq
+        # Upper triangle of this tile = pairs with j > i
+        return np.count_nonzero(np.triu(close, k=1), axis=(1, 2))
+
+    counts = sum(_run_tiles(work, n, tile, workers))
+    return counts if batched else int(counts[0])
@@ -0,0 +1,222 @@
+import threading
+import time
+import numpy as np
+from .config import DT, SOLVER, LIVE_FPS, DTYPE
+from .neighbors import NeighborList
+from .solver import make_stepper
+
+
+class StateBuffer:
+    """
+    Lock-free double buffer for the latest swarm state.
+
+    The writer fills the slot readers are not looking at and then flips
+    `_front`. Each slot carries a sequence number (odd while being written),
+    so a reader that raced with a write just retries instead of returning a
+    torn frame. Neither side ever waits on the other.
+    """
+
+    def __init__(self, n_drones, dtype=DTYPE):
+        self._slots = [np.zeros((n_drones, 3), dtype), np.zeros((n_drones, 3), dtype)]
+        self._seq = [0, 0]
+        self._step = [-1, -1]
+        self._front = 0
+
+    def publish(self, positions, step):
+        back = 1 - self._front
+        self._seq[back] += 1          # odd: write in progress
+        np.copyto(self._slots[back], positions)
+        self._step[back] = step
+        self._seq[back] += 1          # even: consistent again
+        self._front = back            # single attribute store, atomic under the GIL
+
+    def latest(self, out=None):
+        """ Copies the newest published state into `out`; returns (out, step). """
+        if out is None:
+            out = np.empty_like(self._slots[0])
+        while True:
+            front = self._front
+            seq = self._seq[front]
+            if seq % 2 == 0:
+                np.copyto(out, self._slots[front])
+                step = self._step[front]
+                if self._seq[front] == seq:
+                    return out, step
+            time.sleep(0)  # raced with the writer: let it finish, then retry
+
+
+class LiveSimulation:
+    """
+    Runs the stepper loop on a background (producer) thread and publishes
+    every step into a StateBuffer. Viewers read the newest state at their
+    own pace, so drawing never slows the physics down.
+    """
+
+    def __init__(self, positions, velocities, targets, dt=DT, solver=SOLVER, neighbors=None,
+                 total_time=None, realtime=False, params=None):
+        """
+        Args:
+            targets: (N, 3) array, or a callable t -> (N, 3) targets.
+            total_time: Stop after this many simulated seconds (None: until stop()).
+            realtime: Pace the loop to wall-clock time instead of running flat out.
+        """
+        self.positions = positions
+        self.velocities = velocities
+        self.targets = targets
+        self.dt = dt
+        self.total_time = total_time
+        self.realtime = realtime
+        self.neighbors = NeighborList() if neighbors is None else neighbors
+        self.stepper = make_stepper(solver, len(positions), dt, self.neighbors, params=params,
+                                    dtype=positions.dtype)
+
+        self.buffer = StateBuffer(len(positions), positions.dtype)
+        self.buffer.publish(positions, 0)
+        self.steps = 0
+        self.wall_time = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def sim_time(self):
+        return self.steps * self.dt
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def steps_per_second(self):
+        return self.steps / self.wall_time if self.wall_time > 0 else 0.0
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        t0 = time.perf_counter()
+        while not self._stop.is_set():
+            if self.total_time is not None and self.sim_time >= self.total_time:
+                break
+            targets = self.targets(self.sim_time) if callable(self.targets) else self.targets
+            self.stepper.step(self.positions, self.velocities, targets)
+            self.steps += 1
+            self.buffer.publish(self.positions, self.steps)
+
+            elapsed = time.perf_counter() - t0
+            if self.realtime and self.sim_time > elapsed:
+                time.sleep(self.sim_time - elapsed)
+            self.wall_time = time.perf_counter() - t0
+
+    def latest(self, out=None):
+        return self.buffer.latest(out)
+
+
+def live_preview(sim, limits, fps=LIVE_FPS, view="2d"):
+    """
+    Interactive matplotlib window that follows a LiveSimulation.
+
+    Every tick shows only the newest published state; steps the viewer was
+    too slow to draw are simply skipped. Closing the window stops the
+    simulation.
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib.animation import FuncAnimation
+
+    (x_min, x_max), (y_min, y_max), (z_min, z_max) = limits
+    frame = np.empty_like(sim.positions)
+
+    if view == "3d":
+        fig = plt.figure(figsize=(10, 8))
+        ax = fig.add_subplot(111, projection='3d')
+        ax.set_zlim(z_min, z_max)
+        ax.set_zlabel('Z (meters)')
+        scatter = ax.scatter([], [], [], c='blue', s=5)
+    else:
+        fig, ax = plt.subplots(figsize=(10, 8))
+        ax.grid(True)
+        scatter = ax.scatter([], [], c='red', s=10)
+    ax.set_xlim(x_min, x_max)
+    ax.set_ylim(y_min, y_max)
+    ax.set_xlabel('X (meters)')
+    ax.set_ylabel('Y (meters)')
+
+    def update(_):
+        _, step = sim.latest(out=frame)
+        if view == "3d":
+            scatter._offsets3d = (frame[:, 0], frame[:, 1], frame[:, 2])
+        else:
+            scatter.set_offsets(frame[:, :2])
+        ax.set_title(f"Live - Time: {step * sim.dt:.2f} s ({sim.steps_per_second:.0f} steps/s)")
+        return scatter,
+
+    if not sim.running:
+        sim.start()
+    ani = FuncAnimation(fig, update, interval=1000 / fps, blit=False, cache_frame_data=False)
+    try:
+        plt.show()
+    finally:
+        sim.stop()
+    return ani
+
+
+def run_headless(sim, limits, fps=LIVE_FPS, duration=10.0, view="2d"):
+    """
+    Display-free version of live_preview, for benchmarks and CI.
+
+    Rasterizes the newest state with the video renderer at `fps` for
+    `duration` wall-clock seconds (or until the simulation ends) and returns
+    achieved sim steps/s vs render fps.
+    """
+    from .renderer import render_frame_2d, render_frame_3d
+    render = render_frame_3d if view == "3d" else render_frame_2d
+
+    frame = np.empty_like(sim.positions)
+    rendered = stale = 0
+    last_step = -1
+    period = 1.0 / fps
+
+    if not sim.running:
+        sim.start()
+    t0 = time.perf_counter()
+    next_tick = t0
+    while time.perf_counter() - t0 < duration:
+        _, step = sim.latest(out=frame)
+        if step == last_step:
+            if not sim.running:
+                break
+            stale += 1
+        else:
+            render(frame, limits, title=f"Live - Time: {step * sim.dt:.2f} s")
+            rendered += 1
+            last_step = step
+
+        next_tick += period
+        delay = next_tick - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            next_tick = time.perf_counter()  # running behind: don't try to catch up
+    elapsed = time.perf_counter() - t0
+    sim.stop()
+
+    report = {
+        "sim_steps": sim.steps,
+        "sim_time": sim.sim_time,
+        "steps_per_s": sim.steps_per_second,
+        "realtime_factor": sim.sim_time / sim.wall_time if sim.wall_time > 0 else 0.0,
+        "frames": rendered,
+        "stale_frames": stale,
+        "render_fps": rendered / elapsed,
+    }
+    print(f"Headless preview: {report['steps_per_s']:.0f} sim steps/s "
+          f"({report['realtime_factor']:.1f}x realtime), {report['render_fps']:.1f} render fps "
+          f"({stale} stale ticks)")
+    return report
@@ -0,0 +1,193 @@
+import numpy as np
+from .config import R_SAFE, NEIGHBOR_SKIN
+from .telemetry import telemetry
+
+# All 27 cell offsets (the cell itself + its 26 neighbors)
+_CELL_OFFSETS = np.array([(dx, dy, dz)
+                          for dx in (-1, 0, 1)
+                          for dy in (-1, 0, 1)
+                          for dz in (-1, 0, 1)], dtype=np.int64)
+
+
+def find_pairs(positions, radius):
+    """
+    Finds all pairs of drones closer than `radius` using a uniform grid (cell list).
+
+    Each drone only checks the 27 cells around its own, so the cost grows
+    with N instead of N^2. A batched (B, N, 3) state is searched in one go;
+    drones of different batch members never pair up.
+    Returns:
+        (i, j): Two index arrays with i < j (into the flattened B * N drones).
+    """
+    n_per_member = positions.shape[-2]
+    positions = positions.reshape(-1, 3)
+    n = len(positions)
+    if n < 2:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    # 1. Bin drones into cubic cells with side = radius
+    # (+1 padding so the -1 offsets never leave the grid)
+    cells = np.floor((positions - positions.min(axis=0)) / radius).astype(np.int64) + 1
+    dims = cells.max(axis=0) + 2
+    # The batch member is the slowest-varying part of the cell key
+    member = np.arange(n, dtype=np.int64) // n_per_member
+    keys = ((member * dims[0] + cells[:, 0]) * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+
+    # 2. Sort drones by cell so every occupied cell is one contiguous run
+    order = np.argsort(keys, kind='stable')
+    cell_keys, cell_starts, cell_counts = np.unique(keys[order], return_index=True, return_counts=True)
+
+    i_parts, j_parts = [], []
+    for offset in _CELL_OFFSETS:
+        # 3. Look up the neighboring cell of every drone
+        n_cells = cells + offset
+        n_keys = ((member * dims[0] + n_cells[:, 0]) * dims[1] + n_cells[:, 1]) * dims[2] + n_cells[:, 2]
+        slot = np.minimum(np.searchsorted(cell_keys, n_keys), len(cell_keys) - 1)
+        occupied = np.nonzero(cell_keys[slot] == n_keys)[0]
+        if len(occupied) == 0:
+            continue
+
+        # 4. Expand (drone, neighbor cell) into (drone, every drone in that cell)
+        counts = cell_counts[slot[occupied]]
+        starts = np.repeat(cell_starts[slot[occupied]], counts)
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        i = np.repeat(occupied, counts)
+        j = order[starts + within]
+
+        # Every pair is seen from both sides, keep it once
+        keep = i < j
+        i_parts.append(i[keep])
+        j_parts.append(j[keep])
+
+    if not i_parts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    i = np.concatenate(i_parts)
+    j = np.concatenate(j_parts)
+
+    # 5. Exact distance filter on the candidates
+    diff = positions[i] - positions[j]
+    close = np.einsum('ij,ij->i', diff, diff) < radius ** 2
+    return i[close], j[close]
+
+
+def _pair_values(value, i, shape):
+    """ Per-pair view of a scalar, per-batch-member (B,) or per-pair parameter. """
+    value = np.asarray(value)
+    if value.ndim == 0:
+        return value.item()
+    if len(shape) == 3:
+        return value[i // shape[1]]
+    return value
+
+
+def pair_repulsion(positions, pairs, r_safe=R_SAFE):
+    """
+    Sums the 1/d^2 repulsion (diff / d^3) over a list of candidate pairs.
+    Gives the same result as the dense N x N path as long as `pairs`
+    contains every pair closer than r_safe.
+
+    Works on (N, 3) or batched (B, N, 3) states. r_safe is a scalar, a (B,)
+    array for a batched state, or one value per pair for an (N, 3) state.
+    """
+    shape = positions.shape
+    positions = positions.reshape(-1, 3)
+    i, j = pairs
+    repulsion = np.zeros_like(positions)
+    if len(i) == 0:
+        return repulsion.reshape(shape)
+
+    diff = positions[i] - positions[j]
+    dist = np.sqrt(np.einsum('ij,ij->i', diff, diff))
+
+    # Only pairs inside the safety radius push each other
+    close = dist < _pair_values(r_safe, i, shape)
+    i, j, diff, dist = i[close], j[close], diff[close], dist[close]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        force = diff / (dist ** 3)[:, np.newaxis]
+
+    # Newton's third law: i is pushed away from j, j away from i
+    # (bincount always sums in float64; the totals are stored in the state's dtype)
+    n = len(positions)
+    for axis in range(3):
+        repulsion[:, axis] = (np.bincount(i, weights=force[:, axis], minlength=n)
+                              - np.bincount(j, weights=force[:, axis], minlength=n))
+    return repulsion.reshape(shape)
+
+
+def count_pairs_within(positions, pairs, limit):
+    """
+    Counts how many of the candidate pairs are closer than `limit`.
+    A batched (B, N, 3) state gives one count per batch member.
+    """
+    i, j = pairs
+    flat = positions.reshape(-1, 3)
+    diff = flat[i] - flat[j]
+    close = np.einsum('ij,ij->i', diff, diff) < limit ** 2
+
+    if positions.ndim == 3:
+        batch, n_per_member = positions.shape[:2]
+        return np.bincount(i[close] // n_per_member, minlength=batch)
+    return int(np.count_nonzero(close))
+
+
+class NeighborList:
+    """
+    Verlet neighbor list on top of the cell grid.
+
+    Stores every pair within cutoff + skin and reuses it until some drone has
+    moved more than half the skin since the last rebuild. One list can be
+    shared by the four RK4 stages and the collision check of the same step.
+    Batched (B, N, 3) states are supported; pass the largest r_safe of the
+    batch as the cutoff.
+    """
+
+    def __init__(self, cutoff=R_SAFE, skin=NEIGHBOR_SKIN):
+        self.cutoff = cutoff
+        self.skin = skin
+        self.pairs = None
+        self.rebuilds = 0
+        self._reference = None
+
+    @property
+    def radius(self):
+        return self.cutoff + self.skin
+
+    def needs_rebuild(self, positions):
+        if self._reference is None or self._reference.shape != positions.shape:
+            return True
+        # Two drones can close in on each other by at most 2 * max displacement
+        displacement = (positions - self._reference).reshape(-1, 3)
+        max_disp_sq = np.max(np.einsum('ij,ij->i', displacement, displacement))
+        return 4.0 * max_disp_sq > self.skin ** 2
+
+    def rebuild(self, positions):
+        from .backends import get_backend  # backends imports this module
+        self.pairs = get_backend().find_pairs(positions, self.radius)
+        self._reference = positions.copy()
+        self.rebuilds += 1
+        telemetry.count("neighbors.rebuilds")
+        return self.pairs
+
+    def update(self, positions):
+        """
+        Returns pairs valid for `positions`, rebuilding the list only when needed.
+        """
+        if self.needs_rebuild(positions):
+            return self.rebuild(positions)
+        return self.pairs
+
+    def get_state(self):
+        """ The positions the list was last built for (empty before the first build). """
+        return {"reference": np.empty((0, 3)) if self._reference is None else self._reference}
+
+    def set_state(self, state):
+        """
+        Rebuilds the list for the saved reference positions: same pairs in
+        the same order, so a restored run sums the forces identically.
+        """
+        reference = state["reference"]
+        if len(reference) == 0:
+            self.pairs, self._reference = None, None
+        else:
+            self.rebuild(np.array(reference))
@@ -1,5 +1,44 @@
 import numpy as np
-from .config import MASS, K_P, K_D, K_REP, R_SAFE, V_MAX
+from .config import MASS, K_P, K_D, K_REP, R_SAFE, V_MAX, DTYPE
+from .neighbors import NeighborList
+from .kernels import _per_member
+from .backends import get_backend
+from .telemetry import telemetry
+
+
+class PhysicsParams:
+    """
+    Physics constants for one simulation. Defaults come from config.py.
+
+    Every field may also be a (B,) array to give each member of a batched
+    (B, N, 3) state its own value (parameter sweeps, ensembles).
+    """
+
+    def __init__(self, mass=MASS, k_p=K_P, k_d=K_D, k_rep=K_REP, r_safe=R_SAFE, v_max=V_MAX):
+        self.mass = mass
+        self.k_p = k_p
+        self.k_d = k_d
+        self.k_rep = k_rep
+        self.r_safe = r_safe
+        self.v_max = v_max
+
+    def __repr__(self):
+        return (f"PhysicsParams(mass={self.mass}, k_p={self.k_p}, k_d={self.k_d}, "
+                f"k_rep={self.k_rep}, r_safe={self.r_safe}, v_max={self.v_max})")
+
+    @property
+    def max_r_safe(self):
+        """ Largest safety radius of the batch (cutoff for a shared NeighborList) """
+        return float(np.max(self.r_safe))
+
+    @property
+    def max_v_max(self):
+        return float(np.max(self.v_max))
+
+
+# Used whenever no explicit parameters are passed
+DEFAULT_PARAMS = PhysicsParams()
+
 
 def velocity_saturation(v):
     """
@@ -10,69 +49,126 @@ def velocity_saturation(v):
         return v * (V_MAX / norm_v)
     return v
 
-def compute_forces(positions, velocities, targets):
+def saturate_velocities(velocities, out=None, speed=None, v_max=V_MAX):
+    """
+    Limits every row of an (N, 3) velocity array to V_MAX in one vectorized pass.
+
+    Args:
+        out: Optional output array (may be `velocities` itself).
+        speed: Optional (N,) scratch buffer, so no temporaries are allocated.
+        v_max: Speed limit; a (B,) array for a batched (B, N, 3) state.
+    """
+    speed = np.einsum('...k,...k->...', velocities, velocities, out=speed)
+    np.sqrt(speed, out=speed)
+
+    # Scale factor min(1, V_MAX / |v|); a drone at rest gets inf -> 1
+    with np.errstate(divide='ignore'):
+        np.divide(_per_member(v_max, speed.ndim, speed.dtype), speed, out=speed)
+    np.minimum(speed, 1.0, out=speed)
+
+    return np.multiply(velocities, speed[..., np.newaxis], out=out)
+
+def compute_forces(positions, velocities, targets, neighbors=None, out=None, params=None):
     """
     Calculates forces using fast Vectorized Matrix Math (No loops!).
+
+    The state is either (N, 3) or a batch (B, N, 3) of independent swarms.
+
+    Args:
+        neighbors: Optional NeighborList. When given, repulsion is only
+            evaluated on its candidate pairs instead of all N x N pairs.
+            Otherwise the dense tiled kernel is used.
+        out: Optional array (same shape as positions) for the accelerations.
+        params: Optional PhysicsParams (per-batch-member arrays allowed).
+            Defaults to the constants in config.py.
     """
+    if params is None:
+        params = DEFAULT_PARAMS
+    if out is None:
+        out = np.empty_like(positions)
+    ndim, dtype = positions.ndim, positions.dtype
+
     # 1. Attraction & Damping
-    attraction = K_P * (targets - positions)
-    damping = -K_D * velocities
-    
-    # 2. Vectorized Repulsion 
-    # Instead of a loop, we compute all distances at once using broadcasting.
-    
-    # Create matrix of all position differences (N x N x 3)
-    # shape: (N, 1, 3) - (1, N, 3) -> (N, N, 3)
-    diff_matrix = positions[:, np.newaxis, :] - positions[np.newaxis, :, :]
-    
-    # Compute Distance Matrix (N x N)
-    dist_matrix = np.linalg.norm(diff_matrix, axis=2)
-    
-    # Fill diagonal with Infinity so drones don't repel themselves
-    np.fill_diagonal(dist_matrix, np.inf)
-    
-    # Find pairs that are too close
-    mask = dist_matrix < R_SAFE
-    
-    repulsion = np.zeros_like(positions)
-    
-    if np.any(mask):
-        # Calculate 1 / distance^3 safely
-        # We only care about distances where mask is True
-        with np.errstate(divide='ignore'):
-            inv_dist_cubed = 1.0 / (dist_matrix ** 3)
-        
-        # Zero out entries that aren't close enough
-        inv_dist_cubed[~mask] = 0.0
-        
-        # Calculate Force Vectors: direction * strength
-        # (N, N, 3) * (N, N, 1) -> (N, N, 3)
-        force_matrix = diff_matrix * inv_dist_cubed[:, :, np.newaxis]
-        
-        # Sum all repulsive forces acting on each drone (Sum over axis 1)
-        repulsion = K_REP * np.sum(force_matrix, axis=1)
+    np.subtract(targets, positions, out=out)
+    out *= _per_member(params.k_p, ndim, dtype)
+    out -= _per_member(params.k_d, ndim, dtype) * velocities
+
+    # 2. Repulsion
+    if neighbors is not None:
+        # Sparse path: same forces, but only for pairs near each other
+        with telemetry.timer("neighbors.update"):
+            pairs = neighbors.update(positions)
+        with telemetry.timer("physics.repulsion"):
+            repulsion = get_backend().repulsion_pairs(positions, pairs, params.r_safe)
+    else:
+        # Dense path: all pairs (row tiles with NumPy, so memory stays bounded)
+        with telemetry.timer("physics.repulsion"):
+            repulsion = get_backend().repulsion_dense(positions, params.r_safe)
+    repulsion *= _per_member(params.k_rep, ndim, dtype)
 
     # 3. Total Force
-    total_force = attraction + damping + repulsion
-    accelerations = total_force / MASS
-    
-    return accelerations
+    out += repulsion
+    out /= _per_member(params.mass, ndim, dtype)
+
+    return out
 
 
 
-def count_collisions(positions, limit=0.2):
+def count_collisions(positions, limit=0.2, neighbors=None):
     """
     Counts how many pairs of drones are closer than the physical crash limit (20cm).
+    A NeighborList can be passed to reuse the pairs found for the force step.
+    A batched (B, N, 3) state gives one count per batch member.
+    """
+    with telemetry.timer("physics.count_collisions"):
+        if neighbors is not None and limit <= neighbors.cutoff:
+            return get_backend().count_pairs(positions, neighbors.update(positions), limit)
+
+        # Every pair is checked once (in memory-bounded row tiles with NumPy)
+        return get_backend().count_dense(positions, limit)
+
+
+def min_separation(positions, neighbors=None, radius=R_SAFE):
+    """
+    Smallest distance between any two drones, looked up on the cell grid.
+    Returns inf when no pair is closer than `radius` (or than the list radius
+    of `neighbors`), i.e. the swarm is at least that well separated.
+    """
+    pairs = neighbors.update(positions) if neighbors is not None else get_backend().find_pairs(positions, radius)
+    i, j = pairs
+    if len(i) == 0:
+        return np.inf
+    flat = positions.reshape(-1, 3)
+    diff = flat[i] - flat[j]
+    return float(np.sqrt(np.min(np.einsum('ij,ij->i', diff, diff))))
+
+
+def swarm_metrics(positions, velocities=None, neighbors=None, r_safe=R_SAFE):
+    """
+    Safety / state numbers of one (N, 3) swarm for the telemetry log:
+    smallest pair distance, number of pairs inside r_safe (= pairs currently
+    repelling) and the largest speed. When no pair is in range, where
+    min_separation() returns inf, the min_separation key is left out
+    (JSON has no inf).
+    """
+    pairs = neighbors.update(positions) if neighbors is not None else get_backend().find_pairs(positions, r_safe)
+    i, j = pairs
+    diff = positions[i] - positions[j]
+    dist_sq = np.einsum('ij,ij->i', diff, diff)
+    metrics = {"repulsion_pairs": int(np.count_nonzero(dist_sq < r_safe ** 2))}
+    if len(dist_sq):
+        metrics["min_separation"] = float(np.sqrt(dist_sq.min()))
+    if velocities is not None:
+        metrics["max_speed"] = float(np.sqrt(np.max(np.einsum('ij,ij->i', velocities, velocities))))
+    return metrics
+
+
+def scan_collisions(history, limit=0.2):
+    """
+    Crash count of every frame of a recorded trajectory. `history` can be
+    anything indexable frame by frame: a list, a (frames, N, 3) array, a
+    recorder view or a flight log. Returns an array with one count per frame.
     """
-    # 1. Calculate all distances (Vectorized)
-    diff_matrix = positions[:, np.newaxis, :] - positions[np.newaxis, :, :]
-    dist_matrix = np.linalg.norm(diff_matrix, axis=2)
-    
-    # 2. Ignore distance to self (diagonal is 0)
-    np.fill_diagonal(dist_matrix, np.inf)
-    
-    # 3. Count crashes
-    # We divide by 2 because (Drone A -> Drone B) and (Drone B -> Drone A) are the same crash
-    num_crashes = np.sum(dist_matrix < limit) // 2
-    
-    return num_crashes
\ No newline at end of file
+    neighbors = NeighborList(cutoff=limit, skin=limit)
+    return np.array([count_collisions(np.asarray(frame, dtype=DTYPE), limit, neighbors)
+                     for frame in history], dtype=np.int64)
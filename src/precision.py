@@ -0,0 +1,116 @@
+import os
+import tempfile
+import time
+import numpy as np
+from .config import N_DRONES, SOLVER, TOTAL_TIME, PRECISION_TOL
+from .sweep import SCENARIOS
+from .show import ShowEngine, Image, Text, Video
+from .recorder import load_trajectory
+
+
+def standard_show(task, duration=None):
+    """
+    (start, phases, crash_limit) of one of the standard shows, as run by
+    the main_task*.py scripts. `duration` shortens the show: the formation
+    time of task 1 / 2, the whole video of task 3.
+    """
+    spec = SCENARIOS[task]
+    if task == "task1":
+        phases = [Image(spec["image"], duration=duration or TOTAL_TIME, scale=spec["scale"], settle=True)]
+        return "ground", phases, 0.15
+    if task == "task2":
+        start = Image(spec["image"], scale=spec["scale"])
+        phases = [Text(spec["text"], duration=duration or TOTAL_TIME, scale=spec["scale"], settle=True)]
+        return start, phases, 0.15
+    if task == "task3":
+        start = Text(spec["text"], scale=spec["scale"])
+        timing = {"duration": duration} if duration else {"frame_steps": 100}
+        phases = [Video(spec["video"], scale=spec["scale"], sample_rate=spec["sample_rate"],
+                        coherent=spec["coherent"], **timing)]
+        return start, phases, 0.2
+    raise ValueError(f"Unknown task: {task}")
+
+
+def _frame_deviation(reference, trajectory, chunk=64):
+    """ Largest drone distance between two trajectories, per common frame. """
+    n_frames = min(len(reference), len(trajectory))
+    deviation = np.empty(n_frames)
+    for start in range(0, n_frames, chunk):
+        stop = min(start + chunk, n_frames)
+        diff = np.asarray(reference[start:stop]) - np.asarray(trajectory[start:stop])
+        deviation[start:stop] = np.sqrt(np.einsum('fnk,fnk->fn', diff, diff).max(axis=1))
+    return deviation
+
+
+def _run(task, duration, n_drones, solver, seed, dtype, path, round_to=None):
+    np.random.seed(seed)
+    start, phases, crash_limit = standard_show(task, duration)
+    engine = ShowEngine(phases, n_drones=n_drones, start=start, solver=solver, crash_limit=crash_limit,
+                        dtype=dtype, verbose=False)
+    engine.load()
+    if round_to is not None:
+        # The rounding a lower precision run applies to the start, on an otherwise float64 run
+        engine.positions[:] = engine.positions.astype(round_to)
+        engine.targets[:] = engine.positions
+    recorder = engine.record_to(path, dtype=np.float64)
+
+    t0 = time.perf_counter()
+    summary = engine.run()
+    wall_time = time.perf_counter() - t0
+    recorder.close()
+
+    error = engine.positions - engine.targets
+    return {"task": task, "run": f"{np.dtype(dtype).name}{'' if round_to is None else '+rounded'}",
+            "steps": summary["steps"], "crashes_total": summary["crashes_total"],
+            "crash_steps": summary["crash_steps"],
+            "final_error": float(np.mean(np.sqrt(np.einsum('ij,ij->i', error, error)))),
+            "wall_time": wall_time,
+            # Nothing in the solver upcast (or downcast) the state
+            "state_ok": all(array.dtype == dtype for array in (engine.positions, engine.velocities, engine.targets))}
+
+
+def compare_precision(task, duration=None, n_drones=N_DRONES, solver=SOLVER, seed=0, dtype=np.float32,
+                      tol=PRECISION_TOL, verbose=True):
+    """
+    Validates a lower precision `dtype` on one standard show.
+
+    The swarm is chaotic: two float64 runs whose start differs by 1e-6 m
+    end up with single drones meters apart (they pass crowded spots in
+    another order), so trajectories cannot be compared drone by drone.
+    Three runs are made instead, all with the same seed and targets:
+        float64          the reference,
+        float64+rounded  the start rounded to `dtype` (the control: how far
+                         a perturbation of rounding size alone carries),
+        `dtype`          the candidate.
+    Each records its trajectory in float64; max_deviation is the largest
+    drone distance to the reference over all frames.
+
+    The candidate passes when its state kept its dtype to the end (no
+    silent upcasts), its final mean distance to the targets is within
+    `tol` meters of the reference and it did not crash on more steps than
+    the worse of the two float64 runs.
+    Returns the three result dicts (reference, control, candidate).
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for run_dtype, round_to in ((np.float64, None), (np.float64, dtype), (dtype, None)):
+            path = os.path.join(workdir, f"run{len(results)}.npy")
+            result = _run(task, duration, n_drones, solver, seed, run_dtype, path, round_to)
+            result["max_deviation"] = 0.0
+            if results:
+                deviation = _frame_deviation(load_trajectory(os.path.join(workdir, "run0.npy")),
+                                             load_trajectory(path))
+                result["max_deviation"] = float(deviation.max()) if len(deviation) else 0.0
+            results.append(result)
+
+    reference, control, candidate = results
+    candidate["passed"] = (candidate["state_ok"]
+                           and abs(candidate["final_error"] - reference["final_error"]) <= tol
+                           and candidate["crash_steps"] <= max(reference["crash_steps"], control["crash_steps"]))
+    if verbose:
+        for result in results:
+            print(f"{task} {result['run']:<16} {result['steps']:>7} steps {result['wall_time']:7.1f} s "
+                  f"{result['crashes_total']:>6} crashes ({result['crash_steps']} steps) "
+                  f"final error {result['final_error']:6.3f} m  max deviation {result['max_deviation']:7.3f} m")
+        print(f"{task}: {candidate['run']} {'passed' if candidate['passed'] else 'FAILED'}")
+    return results
@@ -1,10 +1,14 @@
 import numpy as np
 import cv2
 import os
+from .config import SAMPLING, TARGET_SPACING, DTYPE
+from .glyphs import glyph_text_points
+from .sampling import sample_points
 
-def get_target_points(image_path, n_drones, z_height=10.0, scale=0.1):
+def get_target_points(image_path, n_drones, z_height=10.0, scale=0.1, sampling=SAMPLING):
     """
     Extracts N target points (x, y, z) from a handwritten name image.
+    sampling: "random" pixels or "blue_noise" (targets >= TARGET_SPACING apart where possible).
     """
     
     # 1. Load the image in grayscale
@@ -34,15 +38,14 @@ def get_target_points(image_path, n_drones, z_height=10.0, scale=0.1):
         n_drones = total_points # Adjust if we don't have enough pixels
         
     # 4. Downsample: Select exactly N points
-    indices = np.random.choice(total_points, n_drones, replace=False)
-    selected_points = all_points[indices]
+    selected_points = sample_points(all_points, n_drones, sampling, min_dist=TARGET_SPACING / scale)
     
     # 5. Convert to 3D Coordinates (x, y, z)
     # Center the name at (0,0)
     x_centered = selected_points[:, 0] - np.mean(selected_points[:, 0])
     y_centered = selected_points[:, 1] - np.mean(selected_points[:, 1])
     
-    targets = np.zeros((n_drones, 3))
+    targets = np.zeros((n_drones, 3), dtype=DTYPE)
     targets[:, 0] = x_centered * scale
     targets[:, 1] = -y_centered * scale  # Flip Y 
     targets[:, 2] = z_height
@@ -73,49 +76,14 @@ if __name__ == "__main__":
     
     # Task 2: Generate points for "Happy New Year!"
 
-def get_text_points(text, n_drones, z_height=10.0, scale=0.1):
+def get_text_points(text, n_drones, z_height=10.0, scale=0.1, font_scale=2.0, line_spacing=1.4,
+                    sampling=SAMPLING):
     """
     Generates N target points for a specific text string (e.g., "Happy New Year!")
-    """
-    # 1. Create a blank black image
-    height, width = 200, 800
-    img = np.zeros((height, width), dtype=np.uint8)
-    
-    # 2. Write the text in white
-    font = cv2.FONT_HERSHEY_DUPLEX
-    font_scale = 2.0
-    thickness = 2
-    
-    # Center the text approximately
-    text_size = cv2.getTextSize(text, font, font_scale, thickness)[0]
-    text_x = (width - text_size[0]) // 2
-    text_y = (height + text_size[1]) // 2
     
-    cv2.putText(img, text, (text_x, text_y), font, font_scale, (255), thickness)
-    
-    # 3. Extract points (Reuse logic from get_target_points)
-    # Find coordinates of all non-zero pixels
-    y_coords, x_coords = np.where(img > 0)
-    all_points = np.column_stack((x_coords, y_coords))
-    
-    total_points = all_points.shape[0]
-    
-    if total_points == 0:
-        raise ValueError("Text string is empty or font size is too small.")
-
-    # 4. Downsample to exactly N points
-    # If we have fewer pixels than drones, we reuse points (allow replacement)
-    replace_flag = total_points < n_drones
-    indices = np.random.choice(total_points, n_drones, replace=replace_flag)
-    selected_points = all_points[indices]
-    
-    # 5. Center and Scale
-    x_centered = selected_points[:, 0] - np.mean(selected_points[:, 0])
-    y_centered = selected_points[:, 1] - np.mean(selected_points[:, 1])
-    
-    targets = np.zeros((n_drones, 3))
-    targets[:, 0] = x_centered * scale
-    targets[:, 1] = -y_centered * scale
-    targets[:, 2] = z_height
-    
-    return targets
\ No newline at end of file
+    The string is composed from a cached glyph atlas (see glyphs.py), so it
+    is never clipped by a canvas, may span several lines ("\\n") and each
+    letter gets drones in proportion to its stroke length.
+    """
+    return glyph_text_points(text, n_drones, z_height=z_height, scale=scale,
+                             font_scale=font_scale, line_spacing=line_spacing, sampling=sampling)
@@ -0,0 +1,158 @@
+import os
+import numpy as np
+from .config import DT, RECORD_EVERY, RECORD_DTYPE, RECORD_INITIAL_FRAMES
+from .telemetry import telemetry
+
+
+class TrajectoryRecorder:
+    """
+    Memory-mapped trajectory buffer.
+
+    Replaces `history.append(positions.copy())`: the whole (frames, N, 3)
+    array is preallocated in an .npy file on disk, only every `every`-th step
+    is kept and values are stored as float32 by default. RAM use stays flat
+    no matter how long the show is, and `positions` is a zero-copy view the
+    visualizers can read directly. When the show runs longer than `n_steps`
+    (a streamed video only estimates its length) the files double in size.
+    """
+
+    def __init__(self, path, n_steps, n_drones, every=RECORD_EVERY, dtype=RECORD_DTYPE,
+                 record_velocities=False, resume=False, dt=DT):
+        """
+        Args:
+            path: .npy file for the positions (velocities go to *_vel.npy).
+            n_steps: Number of simulation steps that will be recorded
+                (the initial state counts as an extra one); None when unknown.
+            every: Keep one frame every `every` steps.
+            resume: Reopen the (unclosed) files of an interrupted run instead
+                of creating new ones; call restore() to continue after its frames.
+            dt: Time step of the simulation that calls record().
+        """
+        self.path = path
+        self.every = every
+        self.frame_dt = dt * every
+        self.record_velocities = record_velocities
+        self.steps = 0       # record() calls so far
+        self.count = 0       # frames actually stored
+
+        capacity = RECORD_INITIAL_FRAMES if n_steps is None else n_steps // every + 1
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._positions = _open(path, resume, dtype, (capacity, n_drones, 3))
+        self._velocities = None
+        if record_velocities:
+            vel_path = os.path.splitext(path)[0] + "_vel.npy"
+            self._velocities = _open(vel_path, resume, dtype, (capacity, n_drones, 3))
+
+    def record(self, positions, velocities=None):
+        """
+        Called once per simulation step; stores every `every`-th state.
+        """
+        if self.steps % self.every == 0:
+            if self.count >= len(self._positions):
+                self._grow(2 * len(self._positions))
+            with telemetry.timer("recorder.record"):
+                self._positions[self.count] = positions
+                if self._velocities is not None and velocities is not None:
+                    self._velocities[self.count] = velocities
+            self.count += 1
+        self.steps += 1
+
+    def flush(self):
+        """ Writes the stored frames through to disk (before a checkpoint). """
+        self._positions.flush()
+        if self._velocities is not None:
+            self._velocities.flush()
+
+    def restore(self, steps, count, source=None):
+        """
+        Continues after the first `count` frames (`steps` record() calls) of
+        a checkpointed run. With `source` (the .npy of that run, when this
+        recorder writes another file) those frames are copied over first.
+        """
+        if count > len(self._positions):
+            self._grow(count)
+        if source is not None and os.path.abspath(source) != os.path.abspath(self.path):
+            self._positions[:count] = np.load(source, mmap_mode='r')[:count]
+            vel_source = os.path.splitext(source)[0] + "_vel.npy"
+            if self._velocities is not None and os.path.exists(vel_source):
+                self._velocities[:count] = np.load(vel_source, mmap_mode='r')[:count]
+        self.steps = steps
+        self.count = count
+
+    def _grow(self, n_frames):
+        self._positions = _grow(self._positions, n_frames)
+        if self._velocities is not None:
+            self._velocities = _grow(self._velocities, n_frames)
+
+    # Drop-in for code written against a plain `history` list
+    append = record
+
+    @property
+    def positions(self):
+        """ (frames, N, 3) view of the recorded positions (no copy) """
+        return self._positions[:self.count]
+
+    @property
+    def velocities(self):
+        return None if self._velocities is None else self._velocities[:self.count]
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        """
+        Flushes the buffers and trims the unused frames off the files, so
+        load_trajectory() sees exactly the recorded frames. The views stay
+        readable (they are re-opened read-only).
+        """
+        self._positions = _trim(self._positions, self.count)
+        if self._velocities is not None:
+            self._velocities = _trim(self._velocities, self.count)
+
+
+def _open(path, resume, dtype, shape):
+    if not resume:
+        return np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+    buffer = np.lib.format.open_memmap(path, mode='r+')
+    if buffer.shape[1:] != shape[1:] or buffer.dtype != dtype:
+        raise ValueError(f"{path} holds {buffer.shape} {buffer.dtype} frames, expected {shape[1:]} {np.dtype(dtype)}.")
+    return buffer
+
+
+def _trim(buffer, n_frames):
+    """ Rewrites the .npy header of a memmap with a shorter first axis and truncates the file. """
+    buffer.flush()
+    path, offset = buffer.filename, buffer.offset
+    shape = (n_frames,) + buffer.shape[1:]
+    descr = np.lib.format.dtype_to_descr(buffer.dtype)
+    nbytes = int(np.prod(shape)) * buffer.dtype.itemsize
+    del buffer
+
+    # Same header size as before: pad the shorter dict with spaces
+    header = repr({'descr': descr, 'fortran_order': False, 'shape': shape})
+    header = header.ljust(offset - 10 - 1) + '\n'
+    with open(path, 'r+b') as f:
+        f.seek(10)  # magic string (6) + version (2) + header length (2)
+        f.write(header.encode('latin1'))
+        f.truncate(offset + nbytes)
+    return np.load(path, mmap_mode='r')
+
+
+def _grow(buffer, n_frames):
+    """ Copies a memmap into a longer .npy file that takes its place. """
+    buffer.flush()
+    path = buffer.filename
+    larger = np.lib.format.open_memmap(path + ".grow", mode='w+', dtype=buffer.dtype,
+                                       shape=(n_frames,) + buffer.shape[1:])
+    larger[:len(buffer)] = buffer
+    larger.flush()
+    del buffer, larger
+    os.replace(path + ".grow", path)
+    return np.lib.format.open_memmap(path, mode='r+')
+
+
+def load_trajectory(path):
+    """
+    Opens a recorded .npy trajectory without reading it into RAM.
+    """
+    return np.load(path, mmap_mode='r')
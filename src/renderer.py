@@ -0,0 +1,273 @@
+import shutil
+import subprocess
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import cv2
+from .config import DT, N_WORKERS, RENDER_SIZE, RENDER_CHUNK_FRAMES
+
+# Colors are BGR (OpenCV / ffmpeg bgr24)
+_WHITE = (255, 255, 255)
+_GRID = (225, 225, 225)
+_AXES = (90, 90, 90)
+_BLUE = (200, 60, 20)
+_RED = (40, 40, 220)
+
+# Same default camera as the matplotlib 3D axes
+_ELEVATION = np.radians(30.0)
+_AZIMUTH = np.radians(-60.0)
+_BOX_ASPECT = np.array([4.0, 4.0, 3.0])
+
+_MARGIN = 60
+
+# Per-process cache of backgrounds and frame buffers: {key: (background, buffer)}
+_buffers = {}
+
+
+def _disk(radius):
+    """ Pixel offsets of a filled disk, used to splat all dots at once. """
+    r = int(np.ceil(radius))
+    dy, dx = np.mgrid[-r:r + 1, -r:r + 1]
+    inside = dx ** 2 + dy ** 2 <= radius ** 2
+    return dx[inside], dy[inside]
+
+
+def _splat(frame, px, py, color, radius):
+    """ Draws a dot of `radius` pixels at every (px, py), fully vectorized. """
+    dx, dy = _disk(radius)
+    xs = (np.rint(px).astype(np.int64)[:, np.newaxis] + dx).ravel()
+    ys = (np.rint(py).astype(np.int64)[:, np.newaxis] + dy).ravel()
+    h, w = frame.shape[:2]
+    keep = (xs >= 0) & (xs < w) & (ys >= 0) & (ys < h)
+    frame[ys[keep], xs[keep]] = color
+
+
+# --- 2D (top-down) view ---
+
+def _transform_2d(limits, size):
+    """ Maps (x, y) in meters to pixel coordinates inside the plot area. """
+    (x_min, x_max), (y_min, y_max), _ = limits
+    w, h = size
+    sx = (w - 2 * _MARGIN) / (x_max - x_min)
+    sy = (h - 2 * _MARGIN) / (y_max - y_min)
+
+    def transform(x, y):
+        return _MARGIN + (x - x_min) * sx, h - _MARGIN - (y - y_min) * sy
+    return transform
+
+
+def _background_2d(limits, size):
+    (x_min, x_max), (y_min, y_max), _ = limits
+    w, h = size
+    img = np.full((h, w, 3), _WHITE, dtype=np.uint8)
+    to_px = _transform_2d(limits, size)
+
+    # Grid every ~1/8 of the range, then the plot frame
+    for x in np.linspace(x_min, x_max, 9):
+        px, _ = to_px(x, y_min)
+        cv2.line(img, (int(px), _MARGIN), (int(px), h - _MARGIN), _GRID, 1)
+        cv2.putText(img, f"{x:.0f}", (int(px) - 15, h - _MARGIN + 20), cv2.FONT_HERSHEY_SIMPLEX, 0.4, _AXES, 1)
+    for y in np.linspace(y_min, y_max, 9):
+        _, py = to_px(x_min, y)
+        cv2.line(img, (_MARGIN, int(py)), (w - _MARGIN, int(py)), _GRID, 1)
+        cv2.putText(img, f"{y:.0f}", (5, int(py) + 4), cv2.FONT_HERSHEY_SIMPLEX, 0.4, _AXES, 1)
+    cv2.rectangle(img, (_MARGIN, _MARGIN), (w - _MARGIN, h - _MARGIN), _AXES, 1)
+    return img
+
+
+def render_frame_2d(positions, limits, size=RENDER_SIZE, title=None, out=None):
+    """
+    Rasterizes one top-down frame (H, W, 3) uint8, BGR.
+    `out` is an optional preallocated frame buffer.
+    """
+    key = ("2d", limits, size)
+    if key not in _buffers:
+        background = _background_2d(limits, size)
+        _buffers[key] = (background, np.empty_like(background))
+    background, buffer = _buffers[key]
+    frame = buffer if out is None else out
+
+    np.copyto(frame, background)
+    px, py = _transform_2d(limits, size)(positions[:, 0], positions[:, 1])
+    _splat(frame, px, py, _RED, 2.0)
+    if title:
+        cv2.putText(frame, title, (_MARGIN, _MARGIN - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 1, cv2.LINE_AA)
+    return frame
+
+
+# --- 3D view (fixed camera, orthographic) ---
+
+def _projection_3d(limits, size):
+    """
+    Returns project(points) -> (px, py): normalizes the axes box like
+    matplotlib (box aspect 4:4:3), rotates to the default camera and fits
+    the projected box into the image.
+    """
+    lows = np.array([lim[0] for lim in limits], dtype=float)
+    spans = np.array([lim[1] - lim[0] for lim in limits], dtype=float)
+
+    right = np.array([-np.sin(_AZIMUTH), np.cos(_AZIMUTH), 0.0])
+    up = np.array([-np.sin(_ELEVATION) * np.cos(_AZIMUTH),
+                   -np.sin(_ELEVATION) * np.sin(_AZIMUTH),
+                   np.cos(_ELEVATION)])
+    # (3, 2) matrix: normalized box coordinates -> screen plane
+    view = np.stack([right, up], axis=1) * (_BOX_ASPECT / _BOX_ASPECT.max())[:, np.newaxis]
+
+    corners = np.array([[i, j, k] for i in (0, 1) for j in (0, 1) for k in (0, 1)], dtype=float) - 0.5
+    screen = corners @ view
+    lo, hi = screen.min(axis=0), screen.max(axis=0)
+    w, h = size
+    scale = min((w - 2 * _MARGIN) / (hi[0] - lo[0]), (h - 2 * _MARGIN) / (hi[1] - lo[1]))
+    center = (lo + hi) / 2
+
+    def project(points):
+        normalized = (np.asarray(points, dtype=float) - lows) / spans - 0.5
+        s = normalized @ view
+        return w / 2 + (s[:, 0] - center[0]) * scale, h / 2 - (s[:, 1] - center[1]) * scale
+    return project
+
+
+def _background_3d(limits, size):
+    w, h = size
+    img = np.full((h, w, 3), _WHITE, dtype=np.uint8)
+    project = _projection_3d(limits, size)
+
+    # Wireframe of the axes box
+    lows = [lim[0] for lim in limits]
+    highs = [lim[1] for lim in limits]
+    corners = np.array([[(lows, highs)[i][0], (lows, highs)[j][1], (lows, highs)[k][2]]
+                        for i in (0, 1) for j in (0, 1) for k in (0, 1)])
+    px, py = project(corners)
+    for a in range(8):
+        for b in range(a + 1, 8):
+            # Edges connect corners that differ in exactly one axis
+            if bin(a ^ b).count("1") == 1:
+                cv2.line(img, (int(px[a]), int(py[a])), (int(px[b]), int(py[b])), _GRID, 1, cv2.LINE_AA)
+
+    # Axis labels next to the front edges, like matplotlib
+    mid = [(lo + hi) / 2 for lo, hi in limits]
+    anchors = {"X": ([mid[0], lows[1], lows[2]], (-20, 25)),
+               "Y": ([highs[0], mid[1], lows[2]], (10, 25)),
+               "Z": ([lows[0], lows[1], mid[2]], (-60, 0))}
+    for name, (point, (dx, dy)) in anchors.items():
+        tx, ty = project(np.array([point]))
+        cv2.putText(img, name, (int(tx[0]) + dx, int(ty[0]) + dy),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, _AXES, 1, cv2.LINE_AA)
+    return img
+
+
+def render_frame_3d(positions, limits, size=RENDER_SIZE, title=None, out=None):
+    """
+    Rasterizes one 3D frame (H, W, 3) uint8, BGR, seen from the default
+    matplotlib camera (elevation 30, azimuth -60).
+    """
+    key = ("3d", limits, size)
+    if key not in _buffers:
+        background = _background_3d(limits, size)
+        _buffers[key] = (background, np.empty_like(background))
+    background, buffer = _buffers[key]
+    frame = buffer if out is None else out
+
+    np.copyto(frame, background)
+    px, py = _projection_3d(limits, size)(positions)
+    _splat(frame, px, py, _BLUE, 1.5)
+    if title:
+        cv2.putText(frame, title, (_MARGIN, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 1, cv2.LINE_AA)
+    return frame
+
+
+# --- ffmpeg output ---
+
+class FFmpegWriter:
+    """ Pipes raw BGR frames into an ffmpeg subprocess (H.264 MP4). """
+
+    def __init__(self, filename, size, fps=30):
+        if shutil.which("ffmpeg") is None:
+            raise RuntimeError("ffmpeg was not found on PATH.")
+        w, h = size
+        self.process = subprocess.Popen(
+            ["ffmpeg", "-y", "-loglevel", "error",
+             "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{w}x{h}", "-r", str(fps), "-i", "-",
+             "-an", "-vcodec", "libx264", "-pix_fmt", "yuv420p", filename],
+            stdin=subprocess.PIPE)
+
+    def write(self, frame_bytes):
+        self.process.stdin.write(frame_bytes)
+
+    def close(self):
+        self.process.stdin.close()
+        if self.process.wait() != 0:
+            raise RuntimeError(f"ffmpeg exited with code {self.process.returncode}")
+
+
+def _render_chunk(job):
+    """ Worker: renders a block of frames for both views, returns raw bytes. """
+    positions, first_index, limits, size, time_step, views = job
+    frames_3d, frames_2d = [], []
+    for k, current in enumerate(positions):
+        t = (first_index + k) * time_step
+        if "3d" in views:
+            frames_3d.append(render_frame_3d(current, limits, size, f"3D View - Time: {t:.2f} s").tobytes())
+        if "2d" in views:
+            frames_2d.append(render_frame_2d(current, limits, size, f"2D View - Time: {t:.2f} s").tobytes())
+    return frames_3d, frames_2d
+
+
+def render_videos(history_positions, limits, filename_3d=None, filename_2d=None, skip_frames=5, dt=DT,
+                  fps=30, size=RENDER_SIZE, workers=N_WORKERS, chunk_frames=RENDER_CHUNK_FRAMES):
+    """
+    Writes the 3D and the 2D video in one pass over the history.
+
+    Frames are rasterized with NumPy/OpenCV in worker processes and piped to
+    ffmpeg in order. Only a few chunks are in flight at a time, so memory
+    stays bounded for any show length. Same inputs as animate_swarm.
+    """
+    frames = history_positions[::skip_frames]
+    n_frames = len(frames)
+    views = tuple(v for v, name in (("3d", filename_3d), ("2d", filename_2d)) if name)
+    if not views:
+        return
+    print(f"Rendering {n_frames} frames ({', '.join(views)}) on {workers} workers...")
+
+    writer_3d = FFmpegWriter(filename_3d, size, fps) if filename_3d else None
+    try:
+        writer_2d = FFmpegWriter(filename_2d, size, fps) if filename_2d else None
+    except Exception:
+        if writer_3d is not None:
+            writer_3d.close()
+        raise
+
+    def jobs():
+        for start in range(0, n_frames, chunk_frames):
+            block = np.asarray(frames[start:start + chunk_frames], dtype=np.float32)
+            yield block, start, limits, size, dt * skip_frames, views
+
+    def write(result):
+        frames_3d, frames_2d = result
+        for frame in frames_3d:
+            writer_3d.write(frame)
+        for frame in frames_2d:
+            writer_2d.write(frame)
+
+    try:
+        if workers <= 1:
+            for job in jobs():
+                write(_render_chunk(job))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # Keep 2 chunks per worker in flight, write results in order
+                pending = deque()
+                for job in jobs():
+                    pending.append(pool.submit(_render_chunk, job))
+                    if len(pending) >= 2 * workers:
+                        write(pending.popleft().result())
+                while pending:
+                    write(pending.popleft().result())
+    finally:
+        for writer in (writer_3d, writer_2d):
+            if writer is not None:
+                writer.close()
+
+    for name in (filename_3d, filename_2d):
+        if name:
+            print(f"Video saved to {name}")
@@ -0,0 +1,124 @@
+import numpy as np
+from .config import TARGET_SPACING, POISSON_ROUNDS
+
+SAMPLING_MODES = ("random", "blue_noise")
+
+# 5 x 5 block of cell offsets: with cells of d / sqrt(2), any point closer
+# than d lies at most 2 cells away
+_OFFSETS = np.array([(dx, dy) for dx in range(-2, 3) for dy in range(-2, 3) if (dx, dy) != (0, 0)])
+
+
+def _dart_throw(points, min_dist, rounds, rng, accepted=()):
+    """
+    Parallel Poisson-disk sampling over a fixed candidate set (Wei 2008).
+
+    The plane is cut into cells of min_dist / sqrt(2) (at most one sample per
+    cell). Cells are processed in 9 phases (cell x, y mod 3), so cells in one
+    phase are too far apart to conflict and all of them can take a dart at
+    once: the next pixel of the cell (in a random order fixed up front) is
+    tested against the samples of the 5 x 5 neighboring cells. Every round
+    costs O(cells), not O(pixels).
+
+    Returns indices into points. `accepted` are indices already placed.
+    """
+    cell = min_dist / np.sqrt(2)
+    origin = points.min(axis=0)
+    ij = ((points - origin) // cell).astype(np.int64) + 2  # 2 cells of padding
+    shape = tuple(ij.max(axis=0) + 3)
+    occupant = np.full(shape, -1, dtype=np.int64)
+    min_dist_sq = min_dist ** 2
+
+    chosen = list(accepted)
+    if chosen:
+        occupant[ij[chosen, 0], ij[chosen, 1]] = chosen
+
+    # Pixels grouped by cell, in random order inside each cell
+    cell_id = ij[:, 0] * shape[1] + ij[:, 1]
+    order = np.lexsort((rng.rand(len(points)), cell_id))
+    cells, start, count = np.unique(cell_id[order], return_index=True, return_counts=True)
+    cx, cy = cells // shape[1], cells % shape[1]
+    tried = np.zeros(len(cells), dtype=np.int64)
+    open_cells = occupant[cx, cy] < 0
+    by_phase = [np.nonzero((cx % 3) * 3 + cy % 3 == p)[0] for p in range(9)]
+
+    for _ in range(rounds):
+        darts = 0
+        for members in by_phase:
+            active = members[open_cells[members] & (tried[members] < count[members])]
+            if len(active) == 0:
+                continue
+            cand = order[start[active] + tried[active]]
+            tried[active] += 1
+            darts += len(active)
+
+            # Samples in the 5 x 5 block around every dart, (darts, 24)
+            neighbor = occupant[ij[cand, 0, None] + _OFFSETS[:, 0], ij[cand, 1, None] + _OFFSETS[:, 1]]
+            dart, slot = np.nonzero(neighbor >= 0)
+            diff = points[neighbor[dart, slot]] - points[cand[dart]]
+            ok = np.ones(len(cand), dtype=bool)
+            ok[dart[np.einsum('ij,ij->i', diff, diff) < min_dist_sq]] = False
+
+            won = cand[ok]
+            occupant[ij[won, 0], ij[won, 1]] = won
+            open_cells[active[ok]] = False
+            chosen.extend(won.tolist())
+        if darts == 0:
+            break
+    return np.array(chosen, dtype=np.int64)
+
+
+def blue_noise_sample(points, n, min_dist, pixel_size=1.0, rounds=POISSON_ROUNDS, rng=np.random, verbose=True):
+    """
+    Picks n of the candidate points (e.g. stroke pixels) so that they are
+    evenly spread and, when the shape is large enough, at least min_dist
+    apart (same units as points).
+
+    The spacing starts at what would cover the whole shape with n samples
+    and shrinks towards min_dist until enough samples fit. If even min_dist
+    is too wide, the evenly spaced samples are kept and the rest are filled
+    in at progressively tighter spacing (and with duplicates only when there
+    are fewer pixels than drones).
+    """
+    points = np.asarray(points, dtype=float)
+    area = len(points) * pixel_size ** 2
+    # Maximal Poisson-disk sets reach roughly 0.6 - 0.7 samples per d^2
+    spacing = max(min_dist, np.sqrt(0.6 * area / n))
+
+    chosen = _dart_throw(points, spacing, rounds, rng)
+    while len(chosen) < n and spacing > pixel_size:
+        if spacing == min_dist and verbose:
+            print(f"Warning: shape only fits {len(chosen)} of {n} drones {min_dist:.2f} apart; "
+                  f"the rest are placed closer.")
+        # Samples scale with 1 / d^2: aim just below the spacing that would fit n
+        guess = spacing * min(0.9, 0.95 * np.sqrt(max(len(chosen), 1) / n))
+        spacing = max(min_dist, guess) if spacing > min_dist else max(pixel_size, guess)
+        chosen = _dart_throw(points, spacing, rounds, rng, accepted=chosen)
+
+    if len(chosen) >= n:
+        # Drop the surplus at random (spacing only grows)
+        return points[chosen[rng.permutation(len(chosen))[:n]]]
+    # Fill with distinct unchosen pixels; repeats only once every pixel is taken
+    unchosen = np.setdiff1d(np.arange(len(points)), chosen)
+    missing = n - len(chosen)
+    if missing <= len(unchosen):
+        extra = rng.choice(unchosen, missing, replace=False)
+    else:
+        extra = np.concatenate((unchosen, rng.choice(len(points), missing - len(unchosen), replace=True)))
+    return points[np.concatenate((chosen, extra))]
+
+
+def sample_points(points, n, sampling="random", min_dist=TARGET_SPACING, pixel_size=1.0, rng=np.random,
+                  verbose=True):
+    """
+    Selects n target pixels out of a shape, the way the generators need it.
+
+    sampling:
+        "random":     uniform random pixels (with replacement if the shape is small).
+        "blue_noise": Poisson-disk sampling, targets >= min_dist apart where possible.
+    min_dist and pixel_size are in the same unit (pass min_dist / scale for pixels).
+    """
+    if sampling == "random":
+        return points[rng.choice(len(points), n, replace=(len(points) < n))]
+    if sampling == "blue_noise":
+        return blue_noise_sample(points, n, min_dist, pixel_size=pixel_size, rng=rng, verbose=verbose)
+    raise ValueError(f"Unknown sampling '{sampling}'. Use one of {SAMPLING_MODES}.")
@@ -0,0 +1,592 @@
+import os
+import numpy as np
+from .config import N_DRONES, DT, SOLVER, ACTIVE_SET, SAMPLING, CHECKPOINT_EVERY, DTYPE
+from .physics import PhysicsParams, count_collisions
+from .neighbors import NeighborList
+from .solver import make_stepper
+from .assignment import assignment, assign_targets
+from .convergence import ConvergenceMonitor
+from .cache import cached_target_points, cached_text_points, cached_video_stream
+from .recorder import TrajectoryRecorder
+from .telemetry import telemetry
+from .checkpoint import save_checkpoint, load_checkpoint, rng_state, set_rng_state, prefixed, unprefixed
+
+
+# --- PHASES ---
+
+class Phase:
+    """
+    One part of a show. A phase hands the engine a sequence of
+    (targets, steps) segments: fly towards `targets` for `steps` steps
+    (targets None = keep the current ones).
+
+    load() does the expensive input work (images, videos) once before the
+    show starts; first_targets() is what the phase flies to first, so a
+    Transition before it knows where to go.
+    """
+
+    duration = 0.0
+    settle = False  # end the phase early once the formation has converged
+
+    def load(self, n_drones):
+        pass
+
+    def first_targets(self, positions):
+        return None
+
+    def n_steps(self, dt):
+        """ Steps the phase takes (None when unknown until it ran, e.g. a live video). """
+        return int(round(self.duration / dt))
+
+    def segments(self, engine):
+        raise NotImplementedError
+
+    def get_state(self):
+        """ Choices made during the run (e.g. the target assignment), for checkpoints. """
+        return {}
+
+    def set_state(self, state):
+        pass
+
+    def close(self):
+        pass
+
+
+class _Formation(Phase):
+    """ A static formation, matched to where the drones are when it starts. """
+
+    def __init__(self, duration, scale, z_height, sampling, assign, settle, seed):
+        self.duration = duration
+        self.scale = scale
+        self.z_height = z_height
+        self.sampling = sampling
+        self.assign = assign
+        self.settle = settle
+        self.seed = seed
+        self._targets = None
+        self._assigned = None
+
+    def _generate(self, n_drones):
+        raise NotImplementedError
+
+    def load(self, n_drones):
+        if self._targets is None:
+            self._targets = np.asarray(self._generate(n_drones))
+            if len(self._targets) != n_drones:
+                raise ValueError(f"{self} produced {len(self._targets)} targets for {n_drones} drones.")
+
+    def first_targets(self, positions):
+        # Matched once, against the positions the drones have when they head here
+        if self._assigned is None:
+            if positions is None or not self.assign:
+                self._assigned = self._targets
+            else:
+                self._assigned = assign_targets(positions, self._targets)
+        return self._assigned
+
+    def segments(self, engine):
+        yield self.first_targets(engine.positions), self.n_steps(engine.dt)
+
+    def get_state(self):
+        return {} if self._assigned is None else {"assigned": self._assigned}
+
+    def set_state(self, state):
+        if "assigned" in state:
+            self._assigned = np.array(state["assigned"])
+
+
+class Image(_Formation):
+    """ Handwriting / drawing formation from an image file (get_target_points). """
+
+    def __init__(self, path, duration=0.0, scale=0.1, z_height=10.0, sampling=SAMPLING, assign=True,
+                 settle=False, seed=0):
+        super().__init__(duration, scale, z_height, sampling, assign, settle, seed)
+        self.path = path
+
+    def _generate(self, n_drones):
+        return cached_target_points(self.path, n_drones, z_height=self.z_height, scale=self.scale,
+                                    seed=self.seed, sampling=self.sampling)
+
+    def __repr__(self):
+        return f"Image({self.path!r}, {self.duration:g} s)"
+
+
+class Text(_Formation):
+    """ Text formation (get_text_points). """
+
+    def __init__(self, text, duration=0.0, scale=0.1, z_height=10.0, sampling=SAMPLING, assign=True,
+                 settle=False, seed=0):
+        super().__init__(duration, scale, z_height, sampling, assign, settle, seed)
+        self.text = text
+
+    def _generate(self, n_drones):
+        return cached_text_points(self.text, n_drones, z_height=self.z_height, scale=self.scale,
+                                  seed=self.seed, sampling=self.sampling)
+
+    def __repr__(self):
+        return f"Text({self.text!r}, {self.duration:g} s)"
+
+
+class Video(Phase):
+    """
+    Tracks the moving object of a video, streamed from disk (or the target
+    cache), a camera index or a stream URL. Every video frame is one segment
+    of `frame_steps` steps; with `duration` instead, the steps are spread
+    evenly over the frames (so the source has to report its length).
+    With assign=True the drones are matched to the first frame and keep
+    that order for the whole video (coherent targets follow the object).
+    """
+
+    def __init__(self, path, scale=0.1, z_height=10.0, sample_rate=5, coherent=True, frame_steps=None,
+                 duration=None, assign=True, sampling=SAMPLING, seed=0, **options):
+        if (frame_steps is None) == (duration is None):
+            raise ValueError("Give either frame_steps or duration.")
+        self.path = path
+        self.scale = scale
+        self.z_height = z_height
+        self.sample_rate = sample_rate
+        self.coherent = coherent
+        self.frame_steps = frame_steps
+        self.video_duration = duration
+        self.assign = assign
+        self.sampling = sampling
+        self.seed = seed
+        self.options = options
+        self._frames = None
+        self._iter = None
+        self._first = None
+        self._perm = None
+
+    def load(self, n_drones):
+        if self._frames is None:
+            self._frames = cached_video_stream(self.path, n_drones, scale=self.scale, z_height=self.z_height,
+                                               sample_rate=self.sample_rate, seed=self.seed,
+                                               coherent=self.coherent, sampling=self.sampling, **self.options)
+            # A cache hit knows its length; a stream only estimates it (None for live sources)
+            self.n_frames = len(self._frames) if isinstance(self._frames, np.ndarray) else self._frames.n_frames
+            if self.n_frames is None and self.frame_steps is None:
+                raise ValueError(f"{self.path} does not report its length: give frame_steps, not duration.")
+
+    def _steps_per_frame(self, dt):
+        if self.frame_steps is not None:
+            return self.frame_steps
+        return max(1, int(self.video_duration / (dt * max(self.n_frames, 1))))
+
+    def n_steps(self, dt):
+        return None if self.n_frames is None else self._steps_per_frame(dt) * self.n_frames
+
+    def first_targets(self, positions):
+        if self._iter is None:
+            self._iter = iter(self._frames)
+            self._first = next(self._iter, None)
+        if self._first is None:
+            return None
+        if self._perm is None:
+            self._perm = (assignment(positions, self._first) if positions is not None and self.assign
+                          else np.arange(len(self._first)))
+        return self._first[self._perm]
+
+    def segments(self, engine):
+        first = self.first_targets(engine.positions)
+        if first is None:
+            print(f"Warning: no moving object found in {self.path}, skipping the video.")
+            return
+        steps = self._steps_per_frame(engine.dt)
+        yield first, steps
+        for frame in self._iter:
+            yield np.asarray(frame)[self._perm], steps
+
+    def get_state(self):
+        return {} if self._perm is None else {"perm": self._perm}
+
+    def set_state(self, state):
+        if "perm" in state:
+            self._perm = np.array(state["perm"])
+
+    def close(self):
+        if self._iter is not None and hasattr(self._iter, "close"):
+            self._iter.close()
+        if hasattr(self._frames, "close"):
+            self._frames.close()
+
+    def __repr__(self):
+        return f"Video({self.path!r}, every {self.sample_rate} frames)"
+
+
+class Frames(Phase):
+    """
+    Precomputed target frames: an (F, N, 3) array (or one (N, 3) formation),
+    `frame_steps` steps each. The last frame is held until `duration` is over.
+    """
+
+    def __init__(self, frames, duration, frame_steps=None, settle=False):
+        frames = np.asarray(frames)
+        self.frames = frames[np.newaxis] if frames.ndim == 2 else frames
+        self.duration = duration
+        self.frame_steps = frame_steps
+        self.settle = settle
+
+    def first_targets(self, positions):
+        return self.frames[0]
+
+    def segments(self, engine):
+        remaining = self.n_steps(engine.dt)
+        last = len(self.frames) - 1
+        for index, frame in enumerate(self.frames):
+            steps = remaining if index == last or self.frame_steps is None else min(self.frame_steps, remaining)
+            if steps <= 0:
+                return
+            yield frame, steps
+            remaining -= steps
+
+    def __repr__(self):
+        return f"Frames({len(self.frames)} frames, {self.duration:g} s)"
+
+
+class Hold(Phase):
+    """ Keeps the current targets for `duration` seconds. """
+
+    def __init__(self, duration, settle=False):
+        self.duration = duration
+        self.settle = settle
+
+    def segments(self, engine):
+        yield None, self.n_steps(engine.dt)
+
+    def __repr__(self):
+        return f"Hold({self.duration:g} s)"
+
+
+class Transition(Phase):
+    """ Flies to where the next phase starts, for `duration` seconds. """
+
+    def __init__(self, duration, settle=False):
+        self.duration = duration
+        self.settle = settle
+
+    def segments(self, engine):
+        following = engine.next_phase
+        targets = None if following is None else following.first_targets(engine.positions)
+        yield targets, self.n_steps(engine.dt)
+
+    def __repr__(self):
+        return f"Transition({self.duration:g} s)"
+
+
+# --- ENGINE ---
+
+class ShowEngine:
+    """
+    Runs a whole show (a list of phases) as one simulation.
+
+    One set of state arrays is stepped from start to end; at phase and
+    segment boundaries only the target buffer is overwritten. The solver
+    ("rk4" / "imex" / "adaptive", or any object with step(positions,
+    velocities, targets)) and the recorder (anything with record(positions))
+    are pluggable.
+
+    start:
+        "ground": random spots on the ground in a 150 x 150 m square (task 1),
+        a Phase:  the drones start on its first formation,
+        an (N, 3) array of positions.
+    collision_every: Steps between two crash checks (1 = every step).
+    dtype: Floating point type of the state and the solver (targets are
+        cast to it once, at the segment boundaries).
+    checkpoint: .npz file the full state is saved to every `checkpoint_every`
+        steps; restore() continues a run from it bit for bit.
+    """
+
+    def __init__(self, phases, n_drones=N_DRONES, start="ground", dt=DT, solver=SOLVER, stepper=None,
+                 neighbors=None, recorder=None, collision_every=1, crash_limit=0.2, active_set=ACTIVE_SET,
+                 params=None, dtype=DTYPE, checkpoint=None, checkpoint_every=CHECKPOINT_EVERY, verbose=True):
+        self.phases = list(phases)
+        self.n_drones = n_drones
+        self.start = start
+        self.dt = dt
+        self.dtype = np.dtype(dtype)
+        self.recorder = recorder
+        self.collision_every = collision_every
+        self.crash_limit = crash_limit
+        self.checkpoint = checkpoint
+        self.checkpoint_every = checkpoint_every
+        self.verbose = verbose
+
+        # Cell-grid neighbor list, shared by the solver and the crash check
+        self.neighbors = NeighborList() if neighbors is None else neighbors
+        self.stepper = stepper if stepper is not None else make_stepper(
+            solver, n_drones, dt, self.neighbors, params=params, active_set=active_set, dtype=dtype)
+
+        self.positions = None
+        self.velocities = None
+        self.targets = None
+        self.step = 0              # steps simulated so far
+        self.phase_index = 0
+        self.segment_index = 0     # segment of the current phase
+        self.segment_step = 0      # steps done in the current segment
+        self.phase_start = 0       # step the current phase started at
+        self.crashes_total = 0     # crashing pairs summed over the checked steps
+        self.crash_steps = 0       # checked steps with at least one crash
+        self.phase_steps = []      # steps actually run per phase
+        self._monitor = None       # convergence check of a settling phase
+        self._loaded = False
+
+    @property
+    def next_phase(self):
+        following = self.phase_index + 1
+        return self.phases[following] if following < len(self.phases) else None
+
+    def load(self):
+        """ Loads every phase's inputs (cached) and sets up the start state. """
+        if self._loaded:
+            return
+        for phase in self.phases:
+            phase.load(self.n_drones)
+
+        if isinstance(self.start, str) and self.start == "ground":
+            positions = np.random.rand(self.n_drones, 3) * 150.0
+            positions[:, 0] -= 75.0
+            positions[:, 1] -= 75.0
+            positions[:, 2] = 0.0
+        elif isinstance(self.start, Phase):
+            self.start.load(self.n_drones)
+            positions = self.start.first_targets(None)
+        else:
+            positions = self.start
+
+        self.positions = np.array(positions, dtype=self.dtype)
+        self.velocities = np.zeros_like(self.positions)
+        self.targets = self.positions.copy()  # hover in place until the first targets arrive
+        self._loaded = True
+
+    def n_steps(self):
+        """
+        Steps of the whole show (before any early exits). Streamed videos
+        only estimate their length; None when a phase cannot tell (live video).
+        """
+        self.load()
+        steps = [phase.n_steps(self.dt) for phase in self.phases]
+        return None if None in steps else sum(steps)
+
+    def record_to(self, path, **options):
+        """
+        Attaches a TrajectoryRecorder sized for the whole show (at its dt) and
+        returns it. It grows if the show runs longer than estimated.
+        """
+        options.setdefault("dt", self.dt)
+        self.recorder = TrajectoryRecorder(path, self.n_steps(), self.n_drones, **options)
+        return self.recorder
+
+    # --- Checkpoints ---
+
+    def get_state(self):
+        """ Everything a restored engine needs to continue identically, as a flat dict of arrays. """
+        state = {"n_drones": self.n_drones, "n_phases": len(self.phases), "dt": self.dt,
+                 "positions": self.positions, "velocities": self.velocities, "targets": self.targets,
+                 "step": self.step, "phase_index": self.phase_index, "segment_index": self.segment_index,
+                 "segment_step": self.segment_step, "phase_start": self.phase_start,
+                 "crashes_total": self.crashes_total, "crash_steps": self.crash_steps,
+                 "phase_steps": np.array(self.phase_steps, dtype=np.int64)}
+        state.update(rng_state())
+        state.update(prefixed("neighbors", self.neighbors.get_state()))
+        if hasattr(self.stepper, "get_state"):
+            state.update(prefixed("stepper", self.stepper.get_state()))
+        for index, phase in enumerate(self.phases):
+            state.update(prefixed(f"phase{index}", phase.get_state()))
+        if self._monitor is not None:
+            state["monitor.steps"] = self._monitor.steps
+            state["monitor.settled_since"] = -1 if self._monitor.settled_since is None else self._monitor.settled_since
+        if isinstance(self.recorder, TrajectoryRecorder):
+            state.update({"recorder.path": self.recorder.path, "recorder.every": self.recorder.every,
+                          "recorder.steps": self.recorder.steps, "recorder.count": self.recorder.count,
+                          "recorder.velocities": self.recorder.record_velocities})
+        return state
+
+    def save_checkpoint(self, path=None):
+        """ Writes the current state to `path` (default: the engine's checkpoint file). """
+        if isinstance(self.recorder, TrajectoryRecorder):
+            self.recorder.flush()  # the frames the checkpoint counts are on disk
+        save_checkpoint(path or self.checkpoint, self.get_state())
+
+    def restore(self, path, reopen_recorder=False):
+        """
+        Loads a checkpoint written by a run of the same show, so run()
+        continues from there. The phases, dt and drone count have to match;
+        solver parameters may differ (branching variants off a warm start).
+
+        A recorder attached beforehand continues after the checkpoint's
+        frames (copied over from the checkpointed run's file if it writes
+        another one). With reopen_recorder=True and none attached, the
+        checkpointed run's own trajectory file is reopened and continued.
+        """
+        state = load_checkpoint(path)
+        if (int(state["n_drones"]) != self.n_drones or int(state["n_phases"]) != len(self.phases)
+                or float(state["dt"]) != self.dt):
+            raise ValueError(f"{path} was saved by another show ({int(state['n_drones'])} drones, "
+                             f"{int(state['n_phases'])} phases, dt {float(state['dt'])}).")
+        self.load()  # inputs are needed anyway; the start state is overwritten below
+
+        self.positions = np.array(state["positions"], dtype=self.dtype)
+        self.velocities = np.array(state["velocities"], dtype=self.dtype)
+        self.targets = np.array(state["targets"], dtype=self.dtype)
+        for name in ("step", "phase_index", "segment_index", "segment_step", "phase_start",
+                     "crashes_total", "crash_steps"):
+            setattr(self, name, int(state[name]))
+        self.phase_steps = [int(n) for n in state["phase_steps"]]
+        set_rng_state(state)
+        self.neighbors.set_state(unprefixed("neighbors", state))
+        if hasattr(self.stepper, "set_state"):
+            self.stepper.set_state(unprefixed("stepper", state))
+        for index, phase in enumerate(self.phases):
+            phase.set_state(unprefixed(f"phase{index}", state))
+
+        self._monitor = None
+        if "monitor.steps" in state:
+            self._monitor = ConvergenceMonitor(dt=self.dt, neighbors=self.neighbors)
+            self._monitor.steps = int(state["monitor.steps"])
+            since = int(state["monitor.settled_since"])
+            self._monitor.settled_since = None if since < 0 else since
+
+        if "recorder.path" in state:
+            source = str(state["recorder.path"])
+            if self.recorder is None and reopen_recorder:
+                self.recorder = TrajectoryRecorder(source, self.n_steps(), self.n_drones,
+                                                   every=int(state["recorder.every"]),
+                                                   record_velocities=bool(state["recorder.velocities"]),
+                                                   resume=True, dt=self.dt)
+            if isinstance(self.recorder, TrajectoryRecorder):
+                self.recorder.restore(int(state["recorder.steps"]), int(state["recorder.count"]), source)
+        if self.verbose:
+            print(f"Restored {path}: step {self.step} (t = {self.step * self.dt:.1f} s), "
+                  f"phase {self.phase_index + 1}/{len(self.phases)}.")
+        return self
+
+    # --- Simulation ---
+
+    def _check_collisions(self):
+        crashes = count_collisions(self.positions, limit=self.crash_limit, neighbors=self.neighbors)
+        if crashes > 0:
+            self.crashes_total += crashes
+            self.crash_steps += 1
+            if self.verbose:
+                print(f"CRASH: {crashes} pairs collided at step {self.step} "
+                      f"(phase {self.phase_index + 1}, {self.phases[self.phase_index]})!")
+
+    def _record(self):
+        # Velocities only go to recorders opened for them (record(positions) is enough otherwise)
+        if getattr(self.recorder, "record_velocities", False):
+            self.recorder.record(self.positions, self.velocities)
+        else:
+            self.recorder.record(self.positions)
+
+    def _run_phase(self, phase):
+        if phase.settle and self._monitor is None:
+            self._monitor = ConvergenceMonitor(dt=self.dt, neighbors=self.neighbors)
+        monitor = self._monitor
+        for index, (targets, n_steps) in enumerate(phase.segments(self)):
+            if index < self.segment_index:
+                continue  # simulated before the checkpoint this run was restored from
+            if targets is not None:
+                np.copyto(self.targets, targets)  # target swap at the segment boundary
+            while self.segment_step < n_steps:
+                self.stepper.step(self.positions, self.velocities, self.targets)
+                self.step += 1
+                self.segment_step += 1
+                if self.recorder is not None:
+                    self._record()
+                if self.step % self.collision_every == 0:
+                    self._check_collisions()
+                telemetry.sample(self.step, self.positions, self.velocities, self.neighbors)
+
+                if monitor is not None and monitor.update(self.positions, self.velocities, self.targets):
+                    if self.verbose:
+                        print(f"Settled after {(self.step - self.phase_start) * self.dt:.1f} s "
+                              f"({monitor.report()}), next phase.")
+                    return
+                if self.checkpoint is not None and self.step % self.checkpoint_every == 0:
+                    self.save_checkpoint()
+                if self.verbose and self.step % self._progress_every == 0:
+                    if self._total_steps is None:
+                        print(f"Progress: {self.step * self.dt:.1f} s simulated")
+                    else:
+                        print(f"Progress: {self.step / self._total_steps * 100:.0f}%")
+            self.segment_index += 1
+            self.segment_step = 0
+
+    def run(self):
+        """
+        Simulates every phase in order (from the restored state, if any).
+        Returns a summary dict (steps, simulated time, crash counters, steps per phase).
+        """
+        total = self.n_steps()
+        self._total_steps = None if total is None else max(total, 1)
+        # Unknown length: report every 10 simulated seconds
+        self._progress_every = max(self._total_steps // 10, 1) if total is not None else max(int(10.0 / self.dt), 1)
+        if self.recorder is not None and self.step == 0:
+            self._record()
+
+        while self.phase_index < len(self.phases):
+            phase = self.phases[self.phase_index]
+            if self.verbose:
+                print(f"Phase {self.phase_index + 1}/{len(self.phases)}: {phase} "
+                      f"(t = {self.step * self.dt:.1f} s)")
+            try:
+                self._run_phase(phase)
+            finally:
+                phase.close()
+            self.phase_steps.append(self.step - self.phase_start)
+            self.phase_index += 1
+            self.segment_index = self.segment_step = 0
+            self.phase_start = self.step
+            self._monitor = None
+        if self.checkpoint is not None:
+            self.save_checkpoint()  # a finished run resumes straight to the output stage
+
+        if self.verbose:
+            if self.crash_steps == 0:
+                print("No crashes detected during the show.")
+            else:
+                print(f"Total crashes: {self.crashes_total} (on {self.crash_steps} checked steps)")
+        return {"steps": self.step, "time": self.step * self.dt, "crashes_total": self.crashes_total,
+                "crash_steps": self.crash_steps, "phase_steps": list(self.phase_steps)}
+
+
+def run_show(phases, **options):
+    """ ShowEngine(phases, **options).run(), returning (summary, engine). """
+    engine = ShowEngine(phases, **options)
+    return engine.run(), engine
+
+
+def resume_show(phases, checkpoint, **options):
+    """
+    Continues an interrupted run of the show from its checkpoint file
+    (and keeps checkpointing to it). Its trajectory file is reopened and
+    continued unless a recorder is passed. Returns (summary, engine).
+    """
+    engine = ShowEngine(phases, checkpoint=checkpoint, **options)
+    engine.restore(checkpoint, reopen_recorder=True)
+    return engine.run(), engine
+
+
+def branch_show(checkpoint, make_phases, variants, record_dir=None, **options):
+    """
+    Runs several parameter variants on from one warm-started checkpoint
+    instead of simulating the shared prefix again for each.
+
+    make_phases: Callable returning a fresh list of the show's phases.
+    variants: {name: dict of PhysicsParams fields}.
+    record_dir: If given, each variant records to <record_dir>/<name>.npy,
+        starting with the prefix frames of the checkpointed run.
+    Returns {name: summary}.
+    """
+    summaries = {}
+    for name, fields in variants.items():
+        engine = ShowEngine(make_phases(), params=PhysicsParams(**fields), **options)
+        if record_dir is not None:
+            engine.record_to(os.path.join(record_dir, f"{name}.npy"))
+        engine.restore(checkpoint)
+        if engine.verbose:
+            print(f"--- Variant {name}: {fields} ---")
+        summaries[name] = engine.run()
+        if engine.recorder is not None:
+            engine.recorder.close()
+    return summaries
@@ -1,40 +1,47 @@
 import numpy as np
-from .physics import compute_forces, velocity_saturation
+from .config import (IMEX_SUBSTEPS, ADAPTIVE_RTOL, ADAPTIVE_ATOL, ADAPTIVE_DT_MIN, ADAPTIVE_DT_MAX,
+                     SLEEP_POS_TOL, SLEEP_SPEED_TOL, SLEEP_CHECK_EVERY, DTYPE)
+from .physics import compute_forces, saturate_velocities, DEFAULT_PARAMS
+from .neighbors import NeighborList
+from .backends import get_backend
+from .telemetry import telemetry
+from .checkpoint import prefixed, unprefixed
 
-def rk4_step(positions, velocities, targets, dt):
+def rk4_step(positions, velocities, targets, dt, neighbors=None, params=None):
     """
     Performs one time step of integration using Runge-Kutta 4 (RK4).
+    An optional NeighborList is shared by all four force evaluations.
+    Works on (N, 3) or batched (B, N, 3) states (see PhysicsParams).
     """
-    # Helper to apply saturation to a whole array of velocities
-    def saturate_all(vel_array):
-        return np.array([velocity_saturation(v) for v in vel_array])
+    if params is None:
+        params = DEFAULT_PARAMS
 
     # 1. Calculate k1 (Slope at the beginning)
-    k1_v = compute_forces(positions, velocities, targets)
+    k1_v = compute_forces(positions, velocities, targets, neighbors, params=params)
     k1_x = velocities
 
     # 2. Calculate k2 (Slope at the midpoint, using k1)
     v_k1 = velocities + k1_v * 0.5 * dt
     x_k1 = positions + k1_x * 0.5 * dt
-    v_k1 = saturate_all(v_k1) # Enforce speed limit
-    
-    k2_v = compute_forces(x_k1, v_k1, targets)
+    v_k1 = saturate_velocities(v_k1, v_max=params.v_max) # Enforce speed limit
+
+    k2_v = compute_forces(x_k1, v_k1, targets, neighbors, params=params)
     k2_x = v_k1
 
     # 3. Calculate k3 (Another slope at the midpoint, using k2)
     v_k2 = velocities + k2_v * 0.5 * dt
     x_k2 = positions + k2_x * 0.5 * dt
-    v_k2 = saturate_all(v_k2)
-    
-    k3_v = compute_forces(x_k2, v_k2, targets)
+    v_k2 = saturate_velocities(v_k2, v_max=params.v_max)
+
+    k3_v = compute_forces(x_k2, v_k2, targets, neighbors, params=params)
     k3_x = v_k2
 
     # 4. Calculate k4 (Slope at the end, using k3)
     v_k3 = velocities + k3_v * dt
     x_k3 = positions + k3_x * dt
-    v_k3 = saturate_all(v_k3)
-    
-    k4_v = compute_forces(x_k3, v_k3, targets)
+    v_k3 = saturate_velocities(v_k3, v_max=params.v_max)
+
+    k4_v = compute_forces(x_k3, v_k3, targets, neighbors, params=params)
     k4_x = v_k3
 
     # 5. Weighted Average of slopes to get final state
@@ -43,6 +50,629 @@ def rk4_step(positions, velocities, targets, dt):
     new_positions = positions + (dt / 6.0) * (k1_x + 2*k2_x + 2*k3_x + k4_x)
 
     # Final speed check
-    new_velocities = saturate_all(new_velocities)
+    new_velocities = saturate_velocities(new_velocities, v_max=params.v_max)
+
+    return new_positions, new_velocities
+
+
+class RK4Stepper:
+    """
+    Same scheme as rk4_step, but the stepper owns all workspace buffers and
+    updates positions / velocities in place. After construction a step
+    allocates no state-sized arrays of its own.
+
+    With batch=B the stepper advances a (B, N, 3) ensemble in one go.
+    The buffers are `dtype` (config.DTYPE), which has to match the state's.
+    """
+
+    def __init__(self, n_drones, dt, neighbors=None, params=None, batch=None, dtype=DTYPE):
+        self.dt = dt
+        self.neighbors = neighbors
+        self.params = DEFAULT_PARAMS if params is None else params
+        self.dtype = np.dtype(dtype)
+
+        shape = (n_drones, 3) if batch is None else (batch, n_drones, 3)
+        self._x_stage = np.empty(shape, dtype)   # stage positions (also used as scratch)
+        self._v_stage = np.empty(shape, dtype)   # stage velocities
+        self._k = np.empty(shape, dtype)         # stage accelerations
+        self._k_sum = np.empty(shape, dtype)     # k1 + 2k2 + 2k3 + k4 (velocity update)
+        self._v_sum = np.empty(shape, dtype)     # same weighted sum of stage velocities
+        self._speed = np.empty(shape[:-1], dtype)  # scratch for the speed limit
+
+    def get_state(self):
+        # Only the neighbor list carries state from one step to the next
+        if hasattr(self.neighbors, "get_state"):
+            return prefixed("neighbors", self.neighbors.get_state())
+        return {}
+
+    def set_state(self, state):
+        if hasattr(self.neighbors, "set_state"):
+            self.neighbors.set_state(unprefixed("neighbors", state))
+
+    def step(self, positions, velocities, targets):
+        """
+        Advances the state by one dt. Returns the (updated) input arrays.
+        """
+        if positions.dtype != self.dtype or velocities.dtype != self.dtype:
+            raise TypeError(f"{positions.dtype} state passed to a {self.dtype} stepper.")
+        dt = self.dt
+        x_s, v_s, k = self._x_stage, self._v_stage, self._k
+        k_sum, v_sum = self._k_sum, self._v_sum
+
+        # 1. k1 (Slope at the beginning)
+        with telemetry.timer("solver.forces.k1"):
+            compute_forces(positions, velocities, targets, self.neighbors, out=k, params=self.params)
+        np.copyto(k_sum, k)
+        np.copyto(v_sum, velocities)
+
+        # 2. k2, k3, k4: (stage length, weight in the final average)
+        stage_velocities = velocities
+        for stage, h, weight in (("k2", 0.5 * dt, 2.0), ("k3", 0.5 * dt, 2.0), ("k4", dt, 1.0)):
+            # Stage position uses the previous stage velocity...
+            np.multiply(stage_velocities, h, out=x_s)
+            x_s += positions
+            # ...and the stage velocity uses the previous slope
+            np.multiply(k, h, out=v_s)
+            v_s += velocities
+            with telemetry.timer("solver.saturate"):
+                saturate_velocities(v_s, out=v_s, speed=self._speed, v_max=self.params.v_max)
+
+            with telemetry.timer("solver.forces." + stage):
+                compute_forces(x_s, v_s, targets, self.neighbors, out=k, params=self.params)
+            stage_velocities = v_s
+
+            # Accumulate the weighted slopes (x_s is free again as scratch)
+            np.multiply(v_s, weight, out=x_s)
+            v_sum += x_s
+            np.multiply(k, weight, out=x_s)
+            k_sum += x_s
+
+        # 3. new = old + (dt/6) * (k1 + 2k2 + 2k3 + k4)
+        k_sum *= dt / 6.0
+        velocities += k_sum
+        v_sum *= dt / 6.0
+        positions += v_sum
+
+        # Final speed check
+        with telemetry.timer("solver.saturate"):
+            saturate_velocities(velocities, out=velocities, speed=self._speed, v_max=self.params.v_max)
+
+        return positions, velocities
+
+
+
+class IMEXStepper:
+    """
+    Semi-implicit (IMEX Euler) stepper for the stiff parts of the model.
+
+    Attraction and damping are linear, so they are solved implicitly and stay
+    stable for any dt. Repulsion is explicit: only drones that can get within
+    R_SAFE of a neighbor during the step are sub-stepped with dt / substeps,
+    everybody else takes a single step. Same step() interface as RK4Stepper,
+    including batched (B, N, 3) states, which have to be `dtype` (config.DTYPE).
+    """
+
+    def __init__(self, n_drones, dt, substeps=IMEX_SUBSTEPS, params=None, dtype=DTYPE):
+        self.dt = dt
+        self.substeps = substeps
+        self.dtype = np.dtype(dtype)
+        self.params = DEFAULT_PARAMS if params is None else params
+        # A drone moves at most V_MAX * dt per step, so pairs further apart
+        # than this can't start repelling each other before the step ends
+        self.contacts = NeighborList(cutoff=self.params.max_r_safe + 2.0 * self.params.max_v_max * dt)
+        self.near_drones = 0
+
+    def get_state(self):
+        return prefixed("contacts", self.contacts.get_state())
+
+    def set_state(self, state):
+        self.contacts.set_state(unprefixed("contacts", state))
+
+    def _coefficients(self, n_per_member, idx, dtype):
+        """
+        Physics constants for the drones idx of the flattened state: plain
+        floats, or per-drone arrays (in the state's dtype) when the batch
+        members differ (columns for the force constants, flat for r_safe and v_max).
+        """
+        coeffs = {}
+        for name in ("mass", "k_p", "k_d", "k_rep", "r_safe", "v_max"):
+            value = np.asarray(getattr(self.params, name))
+            if value.ndim == 0:
+                coeffs[name] = value.item()
+            else:
+                value = np.repeat(value.astype(dtype, copy=False), n_per_member)[idx]
+                coeffs[name] = value if name in ("r_safe", "v_max") else value[:, np.newaxis]
+        return coeffs
+
+    def _reach(self, n_per_member, i):
+        """
+        Distance below which a pair can get within R_SAFE during one step:
+        the list cutoff, or one value per pair (from its own batch member's
+        r_safe and v_max) when the members differ, so every member is split
+        into near / far drones exactly as if it ran alone.
+        """
+        reach = np.asarray(self.params.r_safe) + 2.0 * np.asarray(self.params.v_max) * self.dt
+        if reach.ndim == 0:
+            return self.contacts.cutoff
+        return reach[i // n_per_member]
+
+    @staticmethod
+    def _implicit_update(positions, velocities, targets, h, c, repulsion=None):
+        """
+        Solves v' = v + h * (K_P * (T - (x + h * v')) - K_D * v') / m + h * a_rep
+        for v', then moves x by h * v'. Updates the arrays in place.
+        """
+        rhs = targets - positions
+        rhs *= c["k_p"] / c["mass"]
+        if repulsion is not None:
+            rhs += repulsion
+        rhs *= h
+        rhs += velocities
+
+        np.divide(rhs, 1.0 + h * c["k_d"] / c["mass"] + h * h * c["k_p"] / c["mass"], out=velocities)
+        saturate_velocities(velocities, out=velocities, v_max=c["v_max"])
+        positions += h * velocities
+
+    def step(self, positions, velocities, targets):
+        """
+        Advances the state by one dt. Returns the (updated) input arrays.
+        """
+        if positions.dtype != self.dtype or velocities.dtype != self.dtype:
+            raise TypeError(f"{positions.dtype} state passed to a {self.dtype} stepper.")
+        n_per_member = positions.shape[-2]
+        i, j = self.contacts.update(positions)
+
+        # Work on flat (B * N, 3) views so batches and single swarms look the same
+        flat_x = positions.reshape(-1, 3)
+        flat_v = velocities.reshape(-1, 3)
+        flat_t = np.broadcast_to(targets, positions.shape).reshape(-1, 3)
+        n = len(flat_x)
+
+        # Keep only the pairs that really are within reach this step
+        diff = flat_x[i] - flat_x[j]
+        reach = np.einsum('ij,ij->i', diff, diff) < self._reach(n_per_member, i) ** 2
+        i, j = i[reach], j[reach]
+
+        near = np.zeros(n, dtype=bool)
+        near[i] = True
+        near[j] = True
+        self.near_drones = int(np.count_nonzero(near))
+
+        telemetry.count("imex.near_drones", self.near_drones)
+
+        # 1. Free drones: no repulsion possible during this step -> one implicit step
+        if self.near_drones < n:
+            far = np.nonzero(~near)[0]
+            x, v = flat_x[far], flat_v[far]
+            self._implicit_update(x, v, flat_t[far], self.dt, self._coefficients(n_per_member, far, positions.dtype))
+            flat_x[far], flat_v[far] = x, v
+
+        # 2. Drones with close neighbors: explicit repulsion, local sub-steps
+        if self.near_drones > 0:
+            idx = np.nonzero(near)[0]
+            local = np.full(n, -1, dtype=np.int64)
+            local[idx] = np.arange(len(idx))
+            pairs = (local[i], local[j])
+
+            c = self._coefficients(n_per_member, idx, positions.dtype)
+            # Per-pair safety radius when batch members differ
+            r_safe = c["r_safe"] if np.ndim(c["r_safe"]) == 0 else c["r_safe"][pairs[0]]
+
+            x, v, t = flat_x[idx], flat_v[idx], flat_t[idx]
+            h = self.dt / self.substeps
+            for _ in range(self.substeps):
+                repulsion = get_backend().repulsion_pairs(x, pairs, r_safe)
+                repulsion *= c["k_rep"] / c["mass"]
+                self._implicit_update(x, v, t, h, c, repulsion)
+            flat_x[idx], flat_v[idx] = x, v
+
+        return positions, velocities
+
+
+class _FixedPairs:
+    """ Stand-in for a NeighborList that hands out pairs found elsewhere. """
+
+    def __init__(self, cutoff, pairs):
+        self.cutoff = cutoff
+        self.pairs = pairs
+
+    def update(self, positions):
+        return self.pairs
+
+
+class ActiveSetStepper:
+    """
+    Wraps a fixed-step solver and skips drones that have settled.
+
+    A drone falls asleep when it is within pos_tol of its target, slower
+    than speed_tol and no other drone is in reach (R_SAFE plus what two
+    drones can travel in one step). Sleeping drones are frozen at their
+    position with zero velocity and are not passed to compute_forces at all.
+    They wake up as soon as an awake drone comes within reach or their
+    target changes. Since sleepers keep everybody out of their repulsion
+    range, the awake drones can be integrated on their own.
+
+    Same step() interface as RK4Stepper, for single (N, 3) swarms.
+    """
+
+    def __init__(self, name, n_drones, dt, neighbors=None, params=None, pos_tol=SLEEP_POS_TOL,
+                 speed_tol=SLEEP_SPEED_TOL, check_every=SLEEP_CHECK_EVERY, dtype=DTYPE):
+        self.name = name
+        self.dt = dt
+        self.dtype = dtype
+        self.params = DEFAULT_PARAMS if params is None else params
+        self.pos_tol = pos_tol
+        self.speed_tol = speed_tol
+        self.check_every = check_every
+
+        # Everybody awake: the plain stepper on the full swarm
+        self._full = make_stepper(name, n_drones, dt, neighbors, params=params, dtype=dtype)
+        # Otherwise a stepper for the awake drones, rebuilt when they change
+        self._subset = None
+        self._subset_idx = None
+        # Pairs that can come within R_SAFE during one step. The same list
+        # drives waking up and the repulsion of the awake drones; a shared
+        # NeighborList is reused (its cutoff widened to this reach if needed).
+        reach = self.params.max_r_safe + 2.0 * self.params.max_v_max * dt
+        self.contacts = NeighborList(cutoff=reach) if neighbors is None else neighbors
+        self.contacts.cutoff = max(self.contacts.cutoff, reach)
+        self._pairs = _FixedPairs(self.contacts.cutoff, None)
+
+        self.asleep = np.zeros(n_drones, dtype=bool)
+        self._frozen_targets = np.zeros((n_drones, 3), dtype)
+        self._local = np.full(n_drones, -1, dtype=np.int64)
+        self._steps = 0
+        self.skipped = 0  # drone-steps not integrated so far
+
+    @property
+    def sleeping(self):
+        return int(np.count_nonzero(self.asleep))
+
+    def get_state(self):
+        """ Who is asleep (and on which targets), plus the wrapped stepper's state. """
+        state = {"asleep": self.asleep, "frozen_targets": self._frozen_targets, "steps": self._steps,
+                 "skipped": self.skipped}
+        state.update(prefixed("contacts", self.contacts.get_state()))
+        if hasattr(self._full, "get_state"):
+            state.update(prefixed("full", self._full.get_state()))
+        return state
+
+    def set_state(self, state):
+        self.asleep[:] = state["asleep"]
+        self._frozen_targets[:] = state["frozen_targets"]
+        self._steps = int(state["steps"])
+        self.skipped = int(state["skipped"])
+        self.contacts.set_state(unprefixed("contacts", state))
+        if hasattr(self._full, "set_state"):
+            self._full.set_state(unprefixed("full", state))
+        self._subset_idx = None  # the awake subset's stepper is rebuilt on the next step
+
+    def _update_sleep(self, positions, velocities, targets, pairs):
+        asleep = self.asleep
+        if asleep.any():
+            # Moved targets wake their drones
+            asleep &= np.all(targets == self._frozen_targets, axis=1)
+
+        i, j = pairs
+        diff = positions[i] - positions[j]
+        close = np.einsum('ij,ij->i', diff, diff) < self.contacts.cutoff ** 2
+        i, j = i[close], j[close]
+
+        # Awake drones in reach wake sleepers (and those in turn wake theirs)
+        while True:
+            wake = np.concatenate((i[asleep[i] & ~asleep[j]], j[asleep[j] & ~asleep[i]]))
+            if len(wake) == 0:
+                break
+            asleep[wake] = False
+
+        if self._steps % self.check_every == 0:
+            error = positions - targets
+            calm = ((np.einsum('ij,ij->i', error, error) < self.pos_tol ** 2)
+                    & (np.einsum('ij,ij->i', velocities, velocities) < self.speed_tol ** 2))
+            calm[i] = False
+            calm[j] = False
+            calm &= ~asleep
+            if calm.any():
+                asleep[calm] = True
+                velocities[calm] = 0.0
+                self._frozen_targets[calm] = targets[calm]
+
+    def step(self, positions, velocities, targets):
+        """
+        Advances the awake drones by one dt. Returns the (updated) input arrays.
+        """
+        targets = np.broadcast_to(targets, positions.shape)
+        if self.asleep.any() or self._steps % self.check_every == 0:
+            pairs = self.contacts.update(positions)
+            self._update_sleep(positions, velocities, targets, pairs)
+        self._steps += 1
+
+        n_asleep = self.sleeping
+        self.skipped += n_asleep
+        telemetry.count("active_set.skipped", n_asleep)
+        if n_asleep == 0:
+            return self._full.step(positions, velocities, targets)
+        if n_asleep == len(positions):
+            return positions, velocities
+
+        idx = np.nonzero(~self.asleep)[0]
+        if self._subset_idx is None or not np.array_equal(idx, self._subset_idx):
+            self._subset = make_stepper(self.name, len(idx), self.dt, self._pairs, params=self.params,
+                                        dtype=self.dtype)
+            if self.name == "imex":
+                self._subset.contacts = self._pairs
+            self._subset_idx = idx
+            self._local[:] = -1
+            self._local[idx] = np.arange(len(idx))
+
+        # Pairs between awake drones, in subset indices
+        i, j = pairs
+        keep = ~(self.asleep[i] | self.asleep[j])
+        self._pairs.pairs = (self._local[i[keep]], self._local[j[keep]])
+
+        x, v = positions[idx], velocities[idx]
+        self._subset.step(x, v, targets[idx])
+        positions[idx], velocities[idx] = x, v
+        return positions, velocities
+
+
+def make_stepper(name, n_drones, dt, neighbors=None, params=None, batch=None, active_set=False, dtype=DTYPE):
+    """
+    Builds the stepper selected by name ("rk4", "imex" or "adaptive") for
+    a `dtype` state. With active_set=True settled drones are put to sleep
+    (see ActiveSetStepper).
+    """
+    if active_set:
+        if batch is not None:
+            raise ValueError("The active set works on single swarms, not batches.")
+        return ActiveSetStepper(name, n_drones, dt, neighbors, params=params, dtype=dtype)
+    if name == "rk4":
+        return RK4Stepper(n_drones, dt, neighbors, params=params, batch=batch, dtype=dtype)
+    if name == "imex":
+        return IMEXStepper(n_drones, dt, params=params, dtype=dtype)
+    if name == "adaptive":
+        if batch is not None:
+            raise ValueError("The adaptive solver works on single swarms, not batches.")
+        return AdaptiveStepper(n_drones, dt, neighbors, params=params, dtype=dtype)
+    raise ValueError(f"Unknown solver: {name}")
+
+
+# --- Dormand-Prince 5(4) tableau ---
+_DP_A = (
+    (),
+    (1/5,),
+    (3/40, 9/40),
+    (44/45, -56/15, 32/9),
+    (19372/6561, -25360/2187, 64448/6561, -212/729),
+    (9017/3168, -355/33, 46732/5247, 49/176, -5103/18656),
+    (35/384, 0.0, 500/1113, 125/192, -2187/6784, 11/84),  # = 5th order weights
+)
+# Difference between the 5th and the embedded 4th order weights
+_DP_E = (71/57600, 0.0, -71/16695, 71/1920, -17253/339200, 22/525, -1/40)
+
+
+def dopri5_step(positions, velocities, targets, dt, neighbors=None, k1=None, params=None):
+    """
+    One Dormand-Prince 5(4) step with the same speed limit as rk4_step
+    (every stage velocity is saturated).
+
+    Args:
+        k1: Accelerations at the start of the step, if already known
+            (the last stage of the previous step, "first same as last").
+    Returns:
+        new_positions, new_velocities, pos_error, vel_error, k_last
+    """
+    if params is None:
+        params = DEFAULT_PARAMS
+    if k1 is None:
+        k1 = compute_forces(positions, velocities, targets, neighbors, params=params)
+
+    k_v = [k1]            # stage accelerations
+    k_x = [velocities]    # stage velocities (slopes of the positions)
+
+    for weights in _DP_A[1:]:
+        x_s = positions.copy()
+        v_s = velocities.copy()
+        for w, kx, kv in zip(weights, k_x, k_v):
+            if w != 0.0:
+                x_s += (w * dt) * kx
+                v_s += (w * dt) * kv
+        v_s = saturate_velocities(v_s, v_max=params.v_max)
+
+        k_v.append(compute_forces(x_s, v_s, targets, neighbors, params=params))
+        k_x.append(v_s)
+
+    # The last stage is evaluated at the 5th order solution itself
+    new_positions, new_velocities = x_s, v_s
+
+    pos_error = np.zeros_like(positions)
+    vel_error = np.zeros_like(velocities)
+    for e, kx, kv in zip(_DP_E, k_x, k_v):
+        if e != 0.0:
+            pos_error += (e * dt) * kx
+            vel_error += (e * dt) * kv
+
+    return new_positions, new_velocities, pos_error, vel_error, k_v[-1]
+
+
+class AdaptiveIntegrator:
+    """
+    Dormand-Prince 5(4) with error control: the step grows during calm
+    hovering and shrinks during dense transitions. Output is still sampled
+    on a fixed time grid (cubic Hermite interpolation between steps), so
+    `history` keeps the same layout as with the fixed-step RK4 loop.
+    """
+
+    def __init__(self, rtol=ADAPTIVE_RTOL, atol=ADAPTIVE_ATOL,
+                 dt_min=ADAPTIVE_DT_MIN, dt_max=ADAPTIVE_DT_MAX, neighbors=None, params=None):
+        self.rtol = rtol
+        self.atol = atol
+        self.dt_min = dt_min
+        self.dt_max = dt_max
+        self.neighbors = neighbors
+        self.params = params
+
+        self.dt = dt_min
+        self.accepted = 0
+        self.rejected = 0
+
+    def _error_norm(self, positions, new_positions, velocities, new_velocities, pos_error, vel_error):
+        # RMS of error / (atol + rtol * |state|) over all drones (Hairer's norm)
+        pos_scale = self.atol + self.rtol * np.maximum(np.abs(positions), np.abs(new_positions))
+        vel_scale = self.atol + self.rtol * np.maximum(np.abs(velocities), np.abs(new_velocities))
+        return np.sqrt(0.5 * (np.mean((pos_error / pos_scale) ** 2) + np.mean((vel_error / vel_scale) ** 2)))
+
+    def accepted_step(self, positions, velocities, targets, max_dt, k1=None):
+        """
+        Takes one step of at most max_dt seconds, shrinking it until the
+        error is within tolerance (or dt_min is reached), and adapts the
+        next step size. Returns new_positions, new_velocities, dt, k_last.
+        """
+        while True:
+            dt = min(self.dt, max_dt)
+            new_x, new_v, pos_err, vel_err, k_last = dopri5_step(
+                positions, velocities, targets, dt, self.neighbors, k1, self.params)
+            err = self._error_norm(positions, new_x, velocities, new_v, pos_err, vel_err)
+
+            # Standard step size controller (safety 0.9, growth limited to [0.2, 5])
+            factor = 5.0 if err == 0.0 else min(5.0, max(0.2, 0.9 * err ** -0.2))
+
+            if err > 1.0 and dt > self.dt_min:
+                self.rejected += 1
+                self.dt = max(self.dt_min, dt * factor)
+                continue
+
+            self.accepted += 1
+            self.dt = min(self.dt_max, max(self.dt_min, dt * factor))
+            return new_x, new_v, dt, k_last
+
+    def advance(self, positions, velocities, targets, duration, sample_dt, history=None):
+        """
+        Integrates for `duration` seconds towards fixed `targets`.
+
+        Every sample_dt seconds the interpolated positions are appended to
+        `history` (if given), exactly like one entry per step of the RK4 loop.
+        Returns the final positions and velocities.
+        """
+        t = 0.0
+        n_samples = 1
+        k1 = None
+
+        while t < duration - 1e-12:
+            new_x, new_v, dt, k1 = self.accepted_step(positions, velocities, targets, duration - t, k1)
+
+            # Emit every grid sample inside (t, t + dt]
+            if history is not None:
+                while n_samples * sample_dt <= t + dt + 1e-12:
+                    s = (n_samples * sample_dt - t) / dt
+                    history.append(_hermite(positions, velocities, new_x, new_v, dt, s))
+                    n_samples += 1
+
+            positions, velocities = new_x, new_v
+            t += dt
+
+        return positions, velocities
+
+
+class AdaptiveStepper:
+    """
+    The adaptive Dormand-Prince solver behind the fixed-step interface, so
+    ShowEngine can drive it (solver="adaptive"): every step() returns the
+    state `dt` seconds later, interpolated (cubic Hermite) inside the
+    current adaptive step, which may be much longer or shorter than dt.
+    Recorders therefore still get one frame per dt.
+
+    New targets (a segment boundary) or a state changed by the caller
+    between two steps restart the integration from the state passed in.
+    """
+
+    def __init__(self, n_drones, dt, neighbors=None, params=None, dtype=DTYPE, **tolerances):
+        self.dt = dt
+        self.neighbors = neighbors
+        self.params = DEFAULT_PARAMS if params is None else params
+        self.dtype = np.dtype(dtype)
+        self.integrator = AdaptiveIntegrator(neighbors=neighbors, params=self.params, **tolerances)
+
+        # Current adaptive step: (x0, v0) -> (x1, v1) over h seconds, t seconds into it
+        self._x0 = self._v0 = self._x1 = self._v1 = self._k1 = None
+        self._h = 0.0
+        self._t = 0.0
+        self._targets = np.empty((n_drones, 3), dtype)
+        self._last = (np.empty((n_drones, 3), dtype), np.empty((n_drones, 3), dtype))  # state returned last
+
+    def get_state(self):
+        state = {"dt": self.integrator.dt, "accepted": self.integrator.accepted,
+                 "rejected": self.integrator.rejected, "started": self._x1 is not None}
+        if self._x1 is not None:
+            state.update({"x0": self._x0, "v0": self._v0, "x1": self._x1, "v1": self._v1, "k1": self._k1,
+                          "h": self._h, "t": self._t, "targets": self._targets,
+                          "last_x": self._last[0], "last_v": self._last[1]})
+        if hasattr(self.neighbors, "get_state"):
+            state.update(prefixed("neighbors", self.neighbors.get_state()))
+        return state
+
+    def set_state(self, state):
+        self.integrator.dt = float(state["dt"])
+        self.integrator.accepted = int(state["accepted"])
+        self.integrator.rejected = int(state["rejected"])
+        self._x0 = self._v0 = self._x1 = self._v1 = self._k1 = None
+        self._h = self._t = 0.0
+        if bool(state["started"]):
+            self._x0, self._v0 = np.array(state["x0"]), np.array(state["v0"])
+            self._x1, self._v1, self._k1 = np.array(state["x1"]), np.array(state["v1"]), np.array(state["k1"])
+            self._h, self._t = float(state["h"]), float(state["t"])
+            np.copyto(self._targets, state["targets"])
+            np.copyto(self._last[0], state["last_x"])
+            np.copyto(self._last[1], state["last_v"])
+        if hasattr(self.neighbors, "set_state"):
+            self.neighbors.set_state(unprefixed("neighbors", state))
+
+    def step(self, positions, velocities, targets):
+        """
+        Advances the state by one dt. Returns the (updated) input arrays.
+        """
+        if positions.dtype != self.dtype or velocities.dtype != self.dtype:
+            raise TypeError(f"{positions.dtype} state passed to a {self.dtype} stepper.")
+        if (self._x1 is None or not np.array_equal(targets, self._targets)
+                or not np.array_equal(positions, self._last[0]) or not np.array_equal(velocities, self._last[1])):
+            # (Re)start from the current state
+            self._x1, self._v1, self._k1 = positions.copy(), velocities.copy(), None
+            self._h = self._t = 0.0
+            np.copyto(self._targets, targets)
+
+        self._t += self.dt
+        while self._t > self._h + 1e-12:
+            self._t -= self._h
+            self._x0, self._v0 = self._x1, self._v1
+            self._x1, self._v1, self._h, self._k1 = self.integrator.accepted_step(
+                self._x0, self._v0, self._targets, self.integrator.dt_max, self._k1)
+
+        if self._h - self._t <= 1e-12:
+            # Sample at the end of the step: the solution itself, not an interpolation
+            np.copyto(positions, self._x1)
+            np.copyto(velocities, self._v1)
+        else:
+            s = self._t / self._h
+            np.copyto(positions, _hermite(self._x0, self._v0, self._x1, self._v1, self._h, s))
+            np.copyto(velocities, _hermite_velocity(self._x0, self._v0, self._x1, self._v1, self._h, s))
+        np.copyto(self._last[0], positions)
+        np.copyto(self._last[1], velocities)
+        return positions, velocities
+
+
+def _hermite(x0, v0, x1, v1, dt, s):
+    """ Cubic Hermite interpolation of positions at fraction s of a step. """
+    h00 = 2 * s**3 - 3 * s**2 + 1
+    h10 = s**3 - 2 * s**2 + s
+    h01 = -2 * s**3 + 3 * s**2
+    h11 = s**3 - s**2
+    return h00 * x0 + (h10 * dt) * v0 + h01 * x1 + (h11 * dt) * v1
+
 
-    return new_positions, new_velocities
\ No newline at end of file
+def _hermite_velocity(x0, v0, x1, v1, dt, s):
+    """ Time derivative of _hermite (the interpolated velocities). """
+    d00 = (6 * s**2 - 6 * s) / dt
+    d10 = 3 * s**2 - 4 * s + 1
+    d01 = -d00
+    d11 = 3 * s**2 - 2 * s
+    return d00 * x0 + d10 * v0 + d01 * x1 + d11 * v1
@@ -0,0 +1,201 @@
+import csv
+import itertools
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .config import N_DRONES, DT, SOLVER, N_WORKERS, DTYPE
+from .physics import PhysicsParams, min_separation
+from .neighbors import NeighborList
+from .backends import set_kernel_threads
+from .show import ShowEngine, Frames
+from .cache import cached_target_points, cached_text_points, cached_video_targets
+from .assignment import assignment
+
+# Inputs of the three standard shows (same as the main_task*.py scripts)
+SCENARIOS = {
+    "task1": {"image": "Data/input/name2.jpg", "scale": 0.35},
+    "task2": {"image": "Data/input/name.jpg", "text": "Happy New Year!", "scale": 0.4},
+    "task3": {"video": "Data/input/video.mp4", "text": "Happy New Year!", "scale": 0.8, "sample_rate": 3, "coherent": True},
+}
+
+# Columns of the summary table, after the swept parameters
+METRICS = ("steps", "time_to_converge", "total_crashes", "crash_steps",
+           "min_separation", "final_error", "wall_time")
+
+# Per-process memo of decoded scenario inputs (the video is expensive)
+_inputs = {}
+
+
+def param_grid(**values):
+    """
+    Cartesian product of parameter lists.
+    param_grid(k_p=[1.0, 2.0], k_d=[4.0]) -> [{'k_p': 1.0, 'k_d': 4.0}, {'k_p': 2.0, 'k_d': 4.0}]
+    """
+    names = list(values)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(values[name] for name in names))]
+
+
+def _load_scenario(scenario, n_drones, seed):
+    """
+    Returns (start_positions, target_frames) for one of the standard shows.
+    Targets come from the on-disk target cache, so only the first run decodes the video.
+    Task 1 and 2 have a single target frame, task 3 one per video frame. The
+    drones are matched to the first frame and keep that order, as the Image,
+    Text and Video phases of the main_task*.py scripts do.
+    """
+    key = (scenario, n_drones, seed)
+    if key not in _inputs:
+        spec = SCENARIOS[scenario]
+        np.random.seed(seed)
+
+        if scenario == "task1":
+            targets = cached_target_points(spec["image"], n_drones=n_drones, z_height=10.0, scale=spec["scale"], seed=seed)
+            start = np.random.rand(len(targets), 3) * 150.0
+            start[:, :2] -= 75.0
+            start[:, 2] = 0.0
+            frames = targets[np.newaxis]
+        elif scenario == "task2":
+            start = cached_target_points(spec["image"], n_drones=n_drones, z_height=10.0, scale=spec["scale"], seed=seed)
+            frames = cached_text_points(spec["text"], n_drones=len(start), z_height=10.0, scale=spec["scale"],
+                                        seed=seed)[np.newaxis]
+        elif scenario == "task3":
+            frames = cached_video_targets(spec["video"], n_drones=n_drones, scale=spec["scale"],
+                                          sample_rate=spec["sample_rate"], coherent=spec["coherent"], seed=seed)
+            start = cached_text_points(spec["text"], n_drones=n_drones, scale=spec["scale"], seed=seed)
+        else:
+            raise ValueError(f"Unknown scenario: {scenario}")
+        frames = np.asarray(frames)[:, assignment(start, frames[0])]
+
+        _inputs[key] = (start, frames)
+    return _inputs[key]
+
+
+class _RunMetrics:
+    """
+    Per-step numbers of one sweep run the engine does not keep itself
+    (closest approach, time to converge). Attached as the engine's recorder,
+    so it sees every step's positions.
+    """
+
+    def __init__(self, engine, converge_tol):
+        self.engine = engine
+        self.converge_tol = converge_tol
+        self.closest = np.inf
+        self.time_to_converge = np.nan
+
+    def record(self, positions, velocities=None):
+        engine = self.engine
+        if engine.step == 0:
+            return  # the start state
+        self.closest = min(self.closest, min_separation(positions, engine.neighbors))
+        if np.isnan(self.time_to_converge):
+            error = np.linalg.norm(positions - engine.targets, axis=1)
+            if np.percentile(error, 95) < self.converge_tol:
+                self.time_to_converge = engine.step * engine.dt
+
+
+def run_scenario(scenario, params=None, seed=0, n_drones=N_DRONES, total_time=20.0, dt=DT,
+                 solver=SOLVER, frame_time=1.0, crash_limit=0.15, converge_tol=1.0, dtype=DTYPE):
+    """
+    Simulates one show with the given physics parameters and returns a summary dict.
+
+    Args:
+        params: dict of PhysicsParams fields (mass, k_p, k_d, k_rep, r_safe, v_max);
+            missing ones come from config.py.
+        frame_time: Seconds spent on each video frame (task 3 only).
+        converge_tol: The swarm counts as converged once 95% of the drones are
+            within this distance (meters) of their targets.
+        dtype: Floating point type of the state and the solver.
+    """
+    params = dict(params or {})
+    physics = PhysicsParams(**params)
+    start, frames = _load_scenario(scenario, n_drones, seed)
+
+    phase = Frames(frames, total_time, frame_steps=max(1, int(round(frame_time / dt))))
+    engine = ShowEngine([phase], n_drones=len(start), start=start, dt=dt, solver=solver,
+                        neighbors=NeighborList(cutoff=max(physics.max_r_safe, crash_limit)),
+                        crash_limit=crash_limit, params=physics, dtype=dtype, verbose=False)
+    metrics = engine.recorder = _RunMetrics(engine, converge_tol)
+
+    t0 = time.perf_counter()
+    result = engine.run()
+    wall_time = time.perf_counter() - t0
+
+    error = engine.positions - engine.targets
+    summary = {"scenario": scenario, "seed": seed, "solver": solver, "dt": dt}
+    summary.update(params)
+    summary.update({
+        "steps": result["steps"],
+        "time_to_converge": metrics.time_to_converge,
+        "total_crashes": result["crashes_total"],
+        "crash_steps": result["crash_steps"],
+        "min_separation": metrics.closest,
+        "final_error": float(np.mean(np.linalg.norm(error, axis=1))),
+        "wall_time": wall_time,
+    })
+    return summary
+
+
+def _init_worker():
+    """ Process-pool initializer: the pool already uses every core, one kernel thread per worker. """
+    set_kernel_threads(1)
+
+
+def _run_job(job):
+    """ Process-pool entry point (must be a top-level function to pickle). """
+    return run_scenario(**job)
+
+
+def run_sweep(grid, scenarios=("task1", "task2"), seeds=(0,), out_path=None, workers=N_WORKERS, **run_kwargs):
+    """
+    Runs every (scenario, parameter set, seed) combination on a process pool.
+
+    Each worker gets its parameters explicitly, so nothing depends on the
+    module constants in config.py. Results are written as one CSV row per run
+    (if out_path is given) and returned as a list of dicts.
+    """
+    jobs = [dict(scenario=scenario, params=params, seed=seed, **run_kwargs)
+            for scenario in scenarios for params in grid for seed in seeds]
+    print(f"Running {len(jobs)} simulations on {workers} worker processes...")
+
+    results = []
+    # Spawned, not forked: a fork of a process that already ran the Numba
+    # kernels inherits their thread pool in a broken state and hangs
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker) as pool:
+        for done, summary in enumerate(pool.map(_run_job, jobs), start=1):
+            results.append(summary)
+            converge = summary["time_to_converge"]
+            converge = f"{converge:.2f}s" if np.isfinite(converge) else "not converged"
+            print(f"[{done}/{len(jobs)}] {summary['scenario']} {summary_label(summary)}: "
+                  f"crashes={summary['total_crashes']}, converge={converge}")
+
+    if out_path:
+        write_table(results, out_path)
+        print(f"Sweep results saved to {out_path}")
+    return results
+
+
+def summary_label(summary):
+    """ Short 'k_p=1.0 k_d=4.0' label of the swept parameters of a run. """
+    fields = ("mass", "k_p", "k_d", "k_rep", "r_safe", "v_max")
+    return " ".join(f"{name}={summary[name]}" for name in fields if name in summary)
+
+
+def write_table(results, out_path):
+    """ Writes run summaries to a CSV file (union of all columns). """
+    columns = []
+    for summary in results:
+        for name in summary:
+            if name not in columns:
+                columns.append(name)
+    # Metrics last, in a fixed order
+    columns = [c for c in columns if c not in METRICS] + [c for c in METRICS if c in columns]
+
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    with open(out_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(results)
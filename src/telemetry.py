@@ -0,0 +1,204 @@
+import json
+import os
+import time
+import numpy as np
+from .config import TELEMETRY_EVERY
+
+# Latency histogram bins: powers of two from 1 us up to ~8 s
+_HIST_BASE = 1e-6
+_HIST_BINS = 24
+
+
+class _NullTimer:
+    """ What timer() hands out while telemetry is off: does nothing. """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    def __init__(self, telemetry, name):
+        self.telemetry = telemetry
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.telemetry.add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Histogram:
+    """ Log2-binned latency histogram (1 us ... 8 s) with exact count / total / max. """
+
+    def __init__(self):
+        self.bins = np.zeros(_HIST_BINS, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        index = int(np.log2(max(seconds, _HIST_BASE) / _HIST_BASE))
+        self.bins[min(index, _HIST_BINS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """ Upper edge of the bin holding the q-quantile (within a factor of 2). """
+        if self.count == 0:
+            return 0.0
+        index = int(np.searchsorted(np.cumsum(self.bins), q * self.count))
+        return min(_HIST_BASE * 2.0 ** (index + 1), self.max)
+
+    def summary(self):
+        return {"count": self.count, "mean": self.total / max(self.count, 1), "max": self.max,
+                "p50": self.quantile(0.5), "p95": self.quantile(0.95), "p99": self.quantile(0.99),
+                "bins_us": {f"<{_HIST_BASE * 2.0 ** (i + 1) * 1e6:.0f}": int(n)
+                            for i, n in enumerate(self.bins) if n}}
+
+
+class Telemetry:
+    """
+    Named timers, counters and latency histograms for the hot paths.
+
+    Disabled by default: timer() then returns a shared no-op context manager
+    and count() / observe() return right away, so the instrumented code pays
+    one attribute check per call. Once enabled with a path, sample() writes
+    one JSON line every `every` steps (timer totals since the last line,
+    counters and physics metrics) and close() appends a summary line.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self.every = TELEMETRY_EVERY
+        self._file = None
+        self.reset()
+
+    def reset(self):
+        self.timers = {}      # name -> [calls, total seconds, max seconds]
+        self.counters = {}
+        self.histograms = {}
+        self._interval = {}   # timer totals since the last written line
+        self._last_sample = None
+        self._started = time.perf_counter()
+
+    def enable(self, path=None, every=TELEMETRY_EVERY):
+        """ Starts collecting; with a path, also writes JSON lines to it. """
+        self.reset()
+        self.enabled = True
+        self.every = every
+        self.path = path
+        if path is not None:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._file = open(path, "w")
+        return self
+
+    def disable(self):
+        self.enabled = False
+
+    # --- Recording (hot path) ---
+
+    def timer(self, name):
+        """ with telemetry.timer("solver.k1"): ... """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def add_time(self, name, seconds):
+        entry = self.timers.get(name)
+        if entry is None:
+            entry = self.timers[name] = [0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+        self._interval[name] = self._interval.get(name, 0.0) + seconds
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name, seconds):
+        """ Adds one latency sample to a histogram. """
+        if self.enabled:
+            if name not in self.histograms:
+                self.histograms[name] = Histogram()
+            self.histograms[name].add(seconds)
+
+    # --- Output ---
+
+    def _write(self, record):
+        if self._file is not None:
+            self._file.write(json.dumps(record) + "\n")
+
+    def sample(self, step, positions=None, velocities=None, neighbors=None):
+        """
+        Called once per loop iteration. Feeds the "step" latency histogram
+        (time between two calls) and every `every` steps writes a line with
+        the interval timings and the swarm's physics metrics.
+        """
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self._last_sample is not None:
+            self.observe("step", now - self._last_sample)
+        self._last_sample = now
+        if step % self.every != 0:
+            return
+
+        record = {"type": "step", "step": step, "wall_time": now - self._started,
+                  "timers_ms": {name: 1e3 * total for name, total in self._interval.items()},
+                  "counters": dict(self.counters)}
+        if positions is not None:
+            # Imported here: physics itself reports to this module
+            from .physics import swarm_metrics
+            record.update(swarm_metrics(positions, velocities, neighbors))
+        self._write(record)
+        self._interval = {}
+        # The metrics themselves are not part of the next step's latency
+        self._last_sample = time.perf_counter()
+
+    def summary(self):
+        return {"type": "summary", "wall_time": time.perf_counter() - self._started,
+                "timers": {name: {"calls": calls, "total": total, "mean": total / calls, "max": peak}
+                           for name, (calls, total, peak) in self.timers.items()},
+                "counters": dict(self.counters),
+                "histograms": {name: hist.summary() for name, hist in self.histograms.items()}}
+
+    def report(self):
+        """
+        Timer table (share of the wall time per name) for the console.
+        Timers nest (solver.forces.* contain physics.*), so shares overlap.
+        """
+        summary = self.summary()
+        lines = [f"{'timer':<28} {'calls':>8} {'total s':>9} {'mean ms':>9} {'share':>7}"]
+        for name, t in sorted(summary["timers"].items(), key=lambda item: -item[1]["total"]):
+            lines.append(f"{name:<28} {t['calls']:>8} {t['total']:>9.2f} {t['mean'] * 1e3:>9.3f} "
+                         f"{t['total'] / summary['wall_time']:>7.1%}")
+        if "step" in summary["histograms"]:
+            h = summary["histograms"]["step"]
+            lines.append(f"step latency: mean {h['mean'] * 1e3:.2f} ms, p50 <= {h['p50'] * 1e3:.2f} ms, "
+                         f"p99 <= {h['p99'] * 1e3:.2f} ms, max {h['max'] * 1e3:.2f} ms")
+        return "\n".join(lines)
+
+    def close(self):
+        """ Writes the summary line, closes the file and disables collection. """
+        if self.enabled:
+            self._write(self.summary())
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.enabled = False
+
+
+# Process-wide instance used by the instrumented modules
+telemetry = Telemetry()
@@ -1,77 +1,373 @@
 import cv2
 import numpy as np
 import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from scipy.spatial import cKDTree
+from .config import (N_WORKERS, VIDEO_SNAP_RADIUS, VIDEO_PREFETCH, VIDEO_DOWNSCALE,
+                     VIDEO_ROI_MARGIN, VIDEO_WARMUP, SAMPLING, TARGET_SPACING, DTYPE)
+from .assignment import assignment
+from .sampling import sample_points
 
-def extract_video_targets(video_path, n_drones, scale=0.1, z_height=10.0, sample_rate=5):
+
+def is_video_file(source):
+    """ True for a video file path; camera indices (int) and stream URLs ("rtsp://...") are live sources. """
+    return not isinstance(source, (int, np.integer)) and "://" not in str(source)
+
+
+def _open_capture(source):
+    if is_video_file(source) and not os.path.exists(source):
+        raise FileNotFoundError(f"Video not found: {source}")
+    return cv2.VideoCapture(source)
+
+
+def _track_targets(previous, previous_center, points, snap_radius, rng=np.random, sampling=SAMPLING,
+                   min_dist=TARGET_SPACING, pixel_size=1.0):
     """
-    Reads a video and converts the moving object in each frame into drone targets.
-    
-    Args:
-        sample_rate: Only process every X frames (to match simulation speed).
-    Returns:
-        np.array: Shape (num_frames, n_drones, 3)
+    Moves last frame's targets (pixels) along with the object instead of
+    drawing a fresh random sample, so every drone keeps "its" spot on the blob.
+
+    1. Shift all targets by the motion of the blob centroid.
+    2. Targets that are still on the blob (a foreground pixel within
+       snap_radius) stay where the shift put them.
+    3. The ones that fell off (the blob changed shape) are resampled on the
+       part of the blob that is least covered, with the same sampler as a
+       fresh frame (sample_points: `sampling`, `min_dist`, `pixel_size`).
     """
-    if not os.path.exists(video_path):
-        raise FileNotFoundError(f"Video not found: {video_path}")
+    center = points.mean(axis=0)
+    tracked = previous + (center - previous_center)
 
-    cap = cv2.VideoCapture(video_path)
+    dist, _ = cKDTree(points).query(tracked)
+    lost = dist > snap_radius
+    n_lost = int(lost.sum())
+    if n_lost:
+        # Candidates: pixels far from every kept target (fall back to any pixel)
+        pool = points
+        if n_lost < len(tracked):
+            gap, _ = cKDTree(tracked[~lost]).query(points)
+            spacing = np.sqrt(len(points) / len(tracked))  # pixels per drone along one axis
+            if np.any(gap > spacing):
+                pool = points[gap > spacing]
+        tracked[lost] = sample_points(pool, n_lost, sampling, min_dist=min_dist, pixel_size=pixel_size,
+                                      rng=rng, verbose=False)
+    return tracked, center
+
+
+def _foreground_points(fg_mask, kernel, box):
+    """
+    (x, y) pixels of the cleaned-up foreground mask.
+    With a bounding box, the morphology and the pixel search only run inside
+    it; if the object is not found there or touches its edge, the whole mask
+    is searched instead.
+    """
+    if box is not None:
+        x0, y0, x1, y1 = box
+        sub = cv2.morphologyEx(fg_mask[y0:y1, x0:x1], cv2.MORPH_OPEN, kernel)
+        y_coords, x_coords = np.nonzero(sub > 200)
+        if len(x_coords) >= 10:
+            h, w = fg_mask.shape
+            clipped = ((x_coords.min() == 0 and x0 > 0) or (y_coords.min() == 0 and y0 > 0) or
+                       (x_coords.max() == x1 - x0 - 1 and x1 < w) or (y_coords.max() == y1 - y0 - 1 and y1 < h))
+            if not clipped:
+                return np.column_stack((x_coords + x0, y_coords + y0))
+
+    cleaned = cv2.morphologyEx(fg_mask, cv2.MORPH_OPEN, kernel)
+    y_coords, x_coords = np.where(cleaned > 200) # Threshold for white pixels
+    return np.column_stack((x_coords, y_coords))
+
+
+def _next_box(points, previous_center, shape, margin):
+    """ Bounding box of the object, padded by margin + the last motion. """
+    center = points.mean(axis=0)
+    pad = margin + (0 if previous_center is None else int(np.ceil(np.abs(center - previous_center).max())))
+    h, w = shape
+    x0, y0 = np.maximum(points.min(axis=0) - pad, 0)
+    x1, y1 = np.minimum(points.max(axis=0) + pad + 1, (w, h))
+    return (int(x0), int(y0), int(x1), int(y1)), center
+
+
+def _segment_targets(video_path, n_drones, scale, z_height, sample_rate, coherent, snap_radius,
+                     downscale=1.0, roi=False, start=0, stop=None, warmup=0, rng=np.random,
+                     sampling=SAMPLING):
+    """
+    Targets of the sampled frames with index in [start, stop), or None for
+    frames without a moving object. The background model first sees `warmup`
+    sampled frames before `start`, so segments can be processed independently.
+    `rng` draws the random samples (np.random or a RandomState).
+    """
+    cap = _open_capture(video_path)
     
     # Background subtractor learns the background and masks moving objects
     back_sub = cv2.createBackgroundSubtractorMOG2(history=500, varThreshold=50, detectShadows=False)
+    kernel = np.ones((3,3), np.uint8)
+
+    frame_index = max(start - warmup * sample_rate, 0)
+    if frame_index > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+
+    tracked = None  # coherent mode: last targets (pixels) and blob center
+    box, box_center = None, None  # ROI mode: where to look in the next frame
     
-    all_frame_targets = []
-    frame_count = 0
-    
-    print("Processing video frames (this may take a moment)...")
-    
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
+    try:
+        while stop is None or frame_index < stop:
+            # Skipped frames are only grabbed, never converted to BGR
+            if not cap.grab():
+                break
+            frame_index += 1
+            if frame_index % sample_rate != 0:
+                continue
+            ret, frame = cap.retrieve()
+            if not ret:
+                break
+                
+            # 1. Get the Moving Object Mask (optionally on a smaller image)
+            small = frame if downscale == 1.0 else cv2.resize(frame, None, fx=downscale, fy=downscale,
+                                                              interpolation=cv2.INTER_AREA)
+            fg_mask = back_sub.apply(small)
+            if frame_index <= start:
+                continue  # warm-up only
+            
+            # 2. Extract Points from the Mask (clean up noise first)
+            points = _foreground_points(fg_mask, kernel, box if roi else None)
             
-        frame_count += 1
-        if frame_count % sample_rate != 0:
-            continue
+            total_points = points.shape[0]
             
-        # 1. Get the Moving Object Mask
-        fg_mask = back_sub.apply(frame)
-        
-        # Clean up noise
-        kernel = np.ones((3,3), np.uint8)
-        fg_mask = cv2.morphologyEx(fg_mask, cv2.MORPH_OPEN, kernel)
-        
-        # 2. Extract Points from the Mask
-        y_coords, x_coords = np.where(fg_mask > 200) # Threshold for white pixels
-        points = np.column_stack((x_coords, y_coords))
-        
-        total_points = points.shape[0]
-        
-        # If no object is found in this frame, use the previous frame's targets
-        # (Or zeros if it's the first frame)
-        if total_points < 10:
-            if len(all_frame_targets) > 0:
-                all_frame_targets.append(all_frame_targets[-1])
-            continue
-
-        # 3. Downsample to N drones
-        # Use replacement if the object is small (fewer pixels than drones)
-        indices = np.random.choice(total_points, n_drones, replace=(total_points < n_drones))
-        selected = points[indices]
-        
-        # 4. Center and Scale
-        # We center based on the FRAME size, not the object center, 
-        # so movement across the screen is preserved.
-        h, w = frame.shape[:2]
-        x_centered = selected[:, 0] - (w / 2)
-        y_centered = selected[:, 1] - (h / 2)
-        
-        frame_targets = np.zeros((n_drones, 3))
-        frame_targets[:, 0] = x_centered * scale
-        frame_targets[:, 1] = -y_centered * scale
-        frame_targets[:, 2] = z_height
-        
-        all_frame_targets.append(frame_targets)
-        
+            # If no object is found in this frame, the caller reuses the previous targets
+            if total_points < 10:
+                yield None
+                continue
+
+            if roi:
+                box, box_center = _next_box(points, box_center, fg_mask.shape, VIDEO_ROI_MARGIN)
+            if downscale != 1.0:
+                # Back to full-resolution pixels, spread over the pixels each small one covers
+                points = (points + 0.5) / downscale - 0.5
+                points = points + rng.uniform(-0.5, 0.5, points.shape) / downscale
+
+            # 3. Downsample to N drones
+            if coherent and tracked is not None:
+                selected, center = _track_targets(tracked[0], tracked[1], points, snap_radius, rng, sampling,
+                                                  min_dist=TARGET_SPACING / scale, pixel_size=1.0 / downscale)
+            else:
+                # Use replacement if the object is small (fewer pixels than drones)
+                selected = sample_points(points, n_drones, sampling, min_dist=TARGET_SPACING / scale,
+                                         pixel_size=1.0 / downscale, rng=rng, verbose=False)
+                center = points.mean(axis=0)
+            tracked = (selected, center)
+            
+            # 4. Center and Scale
+            # We center based on the FRAME size, not the object center, 
+            # so movement across the screen is preserved.
+            h, w = frame.shape[:2]
+            x_centered = selected[:, 0] - (w / 2)
+            y_centered = selected[:, 1] - (h / 2)
+            
+            frame_targets = np.zeros((n_drones, 3), dtype=DTYPE)
+            frame_targets[:, 0] = x_centered * scale
+            frame_targets[:, 1] = -y_centered * scale
+            frame_targets[:, 2] = z_height
+            
+            yield frame_targets
+    finally:
+        cap.release()
+
+
+def _fill_forward(frames):
+    """
+    Frames without an object reuse the previous targets
+    (and are skipped until the object first appears).
+    """
+    previous_targets = None
+    for frame_targets in frames:
+        if frame_targets is not None:
+            previous_targets = frame_targets
+        if previous_targets is not None:
+            yield previous_targets
+
+
+def iter_video_targets(video_path, n_drones, scale=0.1, z_height=10.0, sample_rate=5,
+                       coherent=False, snap_radius=VIDEO_SNAP_RADIUS, downscale=1.0, roi=False, rng=np.random,
+                       sampling=SAMPLING):
+    """
+    Generator version of extract_video_targets: decodes the video lazily and
+    yields one (n_drones, 3) target array per processed frame.
+    Same arguments as extract_video_targets (minus the process pool); `rng`
+    can be a private np.random.RandomState when running on another thread.
+    """
+    frames = _segment_targets(video_path, n_drones, scale, z_height, sample_rate, coherent, snap_radius,
+                              downscale=downscale, roi=roi, rng=rng, sampling=sampling)
+    try:
+        yield from _fill_forward(frames)
+    finally:
+        frames.close()
+
+
+def _run_segment(job):
+    """ Process-pool entry point: all targets (or None) of one video segment. """
+    rng = np.random.RandomState(job.pop("seed"))
+    return list(_segment_targets(rng=rng, **job))
+
+
+def _extract_parallel(video_path, n_drones, scale, z_height, sample_rate, coherent, snap_radius,
+                      downscale, roi, workers, warmup, sampling):
+    """
+    Splits the video into one segment per worker. Each segment re-learns the
+    background over `warmup` sampled frames before its first frame. With
+    coherent targets, every segment is re-ordered so that its first frame
+    continues the last one of the previous segment. The tracking itself
+    still starts over in each segment (the segments run at the same time):
+    the targets are resampled on the blob there, so they jump once at every
+    segment boundary. Use workers=1 where that matters.
+    """
+    cap = cv2.VideoCapture(video_path)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
     cap.release()
+
+    # Segment bounds on multiples of sample_rate, so the same frames are sampled
+    n_sampled = total // sample_rate
+    bounds = np.linspace(0, n_sampled, min(workers, max(n_sampled, 1)) + 1).astype(int) * sample_rate
+    bounds[-1] = max(total, bounds[-1])
+    seeds = np.random.randint(0, 2 ** 31 - 1, size=len(bounds) - 1)
+    jobs = [dict(video_path=video_path, n_drones=n_drones, scale=scale, z_height=z_height,
+                 sample_rate=sample_rate, coherent=coherent, snap_radius=snap_radius,
+                 downscale=downscale, roi=roi, start=int(start), stop=int(stop),
+                 warmup=warmup if start > 0 else 0, seed=int(seed), sampling=sampling)
+            for start, stop, seed in zip(bounds[:-1], bounds[1:], seeds)]
+
+    frames = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for segment in pool.map(_run_segment, jobs):
+            if coherent and frames:
+                first = next((f for f in segment if f is not None), None)
+                last = next((f for f in reversed(frames) if f is not None), None)
+                if first is not None and last is not None:
+                    perm = assignment(last, first, objective="sum_sq")
+                    segment = [None if f is None else f[perm] for f in segment]
+            frames.extend(segment)
+    return list(_fill_forward(frames))
+
+
+def extract_video_targets(video_path, n_drones, scale=0.1, z_height=10.0, sample_rate=5,
+                          coherent=False, snap_radius=VIDEO_SNAP_RADIUS, fast=False,
+                          downscale=None, roi=None, workers=None, warmup=VIDEO_WARMUP, sampling=SAMPLING):
+    """
+    Reads a video and converts the moving object in each frame into drone targets.
+    
+    Args:
+        sample_rate: Only process every X frames (to match simulation speed).
+        coherent: Keep each drone's target on the same part of the object
+            between frames (follows the blob motion) instead of resampling
+            the whole blob every frame. Target jumps then match the object motion.
+        snap_radius: Pixels a tracked target may be off the blob before it is resampled.
+        fast: Shortcut for downscale=VIDEO_DOWNSCALE, roi=True, workers=N_WORKERS.
+        downscale: Run the background subtraction on frames resized by this factor.
+        roi: Only clean up / search the mask around the last object position.
+        workers: Process the video as this many segments in parallel. Coherent
+            targets are resampled (jump) once at every segment boundary.
+        warmup: Sampled frames each segment feeds the background model first.
+        sampling: "random" or "blue_noise" pixels whenever the blob is (re)sampled.
+    Returns:
+        np.array: Shape (num_frames, n_drones, 3)
+    """
+    _open_capture(video_path).release()
+    downscale = (VIDEO_DOWNSCALE if fast else 1.0) if downscale is None else downscale
+    roi = fast if roi is None else roi
+    workers = (N_WORKERS if fast else 1) if workers is None else workers
+    if not is_video_file(video_path):
+        workers = 1  # a live source cannot be split into segments
+
+    print("Processing video frames (this may take a moment)...")
+    if workers > 1:
+        all_frame_targets = _extract_parallel(video_path, n_drones, scale, z_height, sample_rate, coherent,
+                                              snap_radius, downscale, roi, workers, warmup, sampling)
+    else:
+        all_frame_targets = list(iter_video_targets(video_path, n_drones, scale, z_height, sample_rate,
+                                                    coherent, snap_radius, downscale, roi,
+                                                    sampling=sampling))
     print(f"Extracted {len(all_frame_targets)} frames of target data.")
-    return np.array(all_frame_targets)
\ No newline at end of file
+    return np.array(all_frame_targets)
+
+
+class VideoTargetStream:
+    """
+    Decodes the video on a background thread while the simulation runs.
+    `video_path` may also be a camera index or a stream URL.
+
+    Frames are produced by iter_video_targets and handed over through a
+    bounded queue (`prefetch` frames), so memory stays constant for any video
+    length and decoding / MOG2 overlap with the physics. Iterate over it
+    like a list of target frames; `n_frames` is the expected count (None
+    when the source does not report its length). Samples come from the
+    stream's own RandomState, never the global np.random; a `seed` makes
+    them reproducible.
+    """
+
+    _DONE = object()
+
+    def __init__(self, video_path, n_drones, scale=0.1, z_height=10.0, sample_rate=5,
+                 coherent=False, snap_radius=VIDEO_SNAP_RADIUS, downscale=1.0, roi=False,
+                 prefetch=VIDEO_PREFETCH, seed=None, sampling=SAMPLING):
+        total = 0
+        if is_video_file(video_path):
+            cap = _open_capture(video_path)
+            total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            cap.release()
+        # Only an estimate from the container; None for live sources (cameras, streams)
+        self.n_frames = total // sample_rate if total > 0 else None
+
+        # Always a private RandomState: the decoder thread must not share np.random
+        # with the simulation (seed None = fresh entropy)
+        rng = np.random.RandomState(seed)
+        self._frames = iter_video_targets(video_path, n_drones, scale, z_height, sample_rate,
+                                          coherent, snap_radius, downscale, roi, rng, sampling)
+        self._queue = queue.Queue(maxsize=prefetch)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._produce, daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        # Wait for room, but give up if the consumer went away
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _produce(self):
+        try:
+            for targets in self._frames:
+                if not self._put(targets):
+                    break
+        except Exception as e:
+            self._put(e)
+        finally:
+            self._frames.close()
+            self._put(self._DONE)
+
+    def __len__(self):
+        if self.n_frames is None:
+            raise TypeError("Video source does not report its length.")
+        return self.n_frames
+
+    def __iter__(self):
+        while True:
+            item = self._queue.get()
+            if item is self._DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def close(self):
+        """ Stops the decoder thread (for consumers that quit early). """
+        self._stop.set()
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
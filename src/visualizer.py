@@ -4,10 +4,13 @@ from matplotlib.animation import FuncAnimation
 from .config import DT
 
 
-def animate_swarm(history_positions, limits, filename=None):
-    """ Standard 3D Animation with custom limits """
+def animate_swarm(history_positions, limits, filename=None, skip_frames=5, dt=DT):
+    """
+    Standard 3D Animation with custom limits.
+    history_positions may be a list or a (frames, N, 3) array / recorder view;
+    dt is the time between two entries of it.
+    """
     print(f"Preparing 3D animation...")
-    skip_frames = 5
     frames = history_positions[::skip_frames]
     
     fig = plt.figure(figsize=(10, 8))
@@ -31,7 +34,7 @@ def animate_swarm(history_positions, limits, filename=None):
     def update(frame_idx):
         current_pos = frames[frame_idx]
         scatter._offsets3d = (current_pos[:, 0], current_pos[:, 1], current_pos[:, 2])
-        ax.set_title(f"3D View - Time: {frame_idx * DT * skip_frames:.2f} s")
+        ax.set_title(f"3D View - Time: {frame_idx * dt * skip_frames:.2f} s")
         return scatter,
 
     ani = FuncAnimation(fig, update, frames=len(frames), init_func=init, blit=False, interval=30)
@@ -41,10 +44,9 @@ def animate_swarm(history_positions, limits, filename=None):
         ani.save(filename, writer='ffmpeg', fps=30)
         print("3D Video saved!")
 
-def animate_swarm_2d(history_positions, limits, filename=None):
-    """ Top-Down 2D Animation with custom limits """
+def animate_swarm_2d(history_positions, limits, filename=None, skip_frames=5, dt=DT):
+    """ Top-Down 2D Animation with custom limits (same inputs as animate_swarm) """
     print(f"Preparing 2D animation...")
-    skip_frames = 5
     frames = history_positions[::skip_frames]
     
     fig, ax = plt.subplots(figsize=(10, 8))
@@ -66,7 +68,7 @@ def animate_swarm_2d(history_positions, limits, filename=None):
     def update(frame_idx):
         current_pos = frames[frame_idx]
         scatter.set_offsets(current_pos[:, :2])
-        ax.set_title(f"2D View - Time: {frame_idx * DT * skip_frames:.2f} s")
+        ax.set_title(f"2D View - Time: {frame_idx * dt * skip_frames:.2f} s")
         return scatter,
 
     ani = FuncAnimation(fig, update, frames=len(frames), init_func=init, blit=True, interval=30)
@@ -0,0 +1,45 @@
+import importlib
+import itertools
+import numpy as np
+import pytest
+from scipy.spatial.distance import cdist
+from src import assignment
+from src.assignment import OBJECTIVES
+
+# The package re-exports the assignment() function under the module's name
+assignment_module = importlib.import_module("src.assignment")
+
+
+def _cost(dist, perm, objective):
+    flights = dist[np.arange(len(perm)), perm]
+    if objective == "sum_sq":
+        return np.sum(flights ** 2)
+    return np.max(flights) if objective == "max" else np.sum(flights)
+
+
+@pytest.mark.parametrize("objective", OBJECTIVES)
+def test_small_swarms_get_the_optimal_assignment(objective):
+    rng = np.random.RandomState(0)
+    for n_drones, n_targets in [(5, 5), (6, 7), (7, 7)]:
+        positions, targets = rng.uniform(0, 10, (n_drones, 3)), rng.uniform(0, 10, (n_targets, 3))
+        dist = cdist(positions, targets)
+        best = min(_cost(dist, np.array(perm), objective)
+                   for perm in itertools.permutations(range(n_targets), n_drones))
+
+        perm = assignment(positions, targets, objective=objective)
+        assert len(np.unique(perm)) == n_drones
+        assert _cost(dist, perm, objective) == pytest.approx(best, rel=1e-12)
+
+
+def test_greedy_leaves_at_most_exact_limit_drones_to_the_hungarian(monkeypatch):
+    sizes = []
+    hungarian = assignment_module._hungarian
+    monkeypatch.setattr(assignment_module, "_hungarian", lambda cost: sizes.append(len(cost)) or hungarian(cost))
+
+    # Everyone starts in a clump far from the formation: all drones want the same targets
+    rng = np.random.RandomState(1)
+    positions = rng.normal(0.0, 0.1, (2000, 3))
+    targets = rng.uniform(50, 60, (2100, 3))
+    perm = assignment(positions, targets, exact_limit=50)
+    assert len(np.unique(perm)) == 2000
+    assert max(sizes, default=0) <= 50
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+from src import check_backend, set_backend, NeighborList
+
+pytest.importorskip("numba")
+
+
+@pytest.mark.parametrize("dtype, tol", [(np.float64, 1e-12), (np.float32, 1e-5)])
+def test_numba_matches_numpy(dtype, tol):
+    for n, error, counts_match in check_backend("numba", sizes=(2, 100, 2000), dtype=dtype):
+        assert error <= tol, n
+        assert counts_match, n
+
+
+def test_numba_neighbor_list_finds_the_numpy_pairs():
+    rng = np.random.RandomState(0)
+    positions = rng.uniform(0.0, 30.0, (1000, 3))
+    try:
+        found = {}
+        for name in ("numpy", "numba"):
+            set_backend(name)
+            i, j = NeighborList().rebuild(positions)
+            found[name] = set(zip(i.tolist(), j.tolist()))
+    finally:
+        set_backend()
+    assert found["numba"] == found["numpy"]
+    assert all(i < j for i, j in found["numba"])
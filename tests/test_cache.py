@@ -0,0 +1,60 @@
+import os
+import numpy as np
+import pytest
+from src import ShowEngine, Video
+from src.benchmark import synthetic_swarm, synthetic_video
+from src.cache import TargetCache, cached_video_stream
+from src.config import VIDEO_DOWNSCALE
+from src.video_processing import VideoTargetStream
+
+
+def test_stream_of_unknown_length_is_cached(tmp_path):
+    path = synthetic_video(os.path.join(tmp_path, "clip.mp4"), (160, 120), n_frames=150)
+    cache = TargetCache(directory=os.path.join(tmp_path, "cache"))
+    stream = cached_video_stream(path, 20, sample_rate=1, cache=cache)
+    stream.n_frames = None  # as for a source without a frame count
+    streamed = np.array(list(stream))
+
+    cached = cached_video_stream(path, 20, sample_rate=1, cache=cache)
+    assert len(streamed) > 64  # the buffer had to grow
+    assert np.array_equal(np.asarray(cached), streamed)
+    assert os.listdir(os.path.join(tmp_path, "cache")) == [os.path.basename(cache.path(stream.key))]
+
+
+class _LiveLengthStream(VideoTargetStream):
+    """ A stream whose source does not report its frame count. """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.n_frames = None
+
+
+def test_show_caches_a_video_of_unknown_length(tmp_path, monkeypatch):
+    path = synthetic_video(os.path.join(tmp_path, "clip.mp4"), (160, 120), n_frames=80)
+    monkeypatch.setattr("src.cache._default_cache", TargetCache(directory=os.path.join(tmp_path, "cache")))
+    monkeypatch.setattr("src.cache.VideoTargetStream", _LiveLengthStream)
+
+    start = synthetic_swarm(20, seed=0)[0]
+    streamed = ShowEngine([Video(path, sample_rate=1, frame_steps=2)], n_drones=20, start=start, verbose=False)
+    assert streamed.n_steps() is None
+    first = streamed.run()
+
+    cached = ShowEngine([Video(path, sample_rate=1, frame_steps=2)], n_drones=20, start=start, verbose=False)
+    assert cached.n_steps() == first["steps"]  # the cache entry knows the length
+    assert cached.run()["steps"] == first["steps"]
+    assert np.array_equal(cached.positions, streamed.positions)
+
+
+def test_fast_video_streams_with_downscale_and_roi(tmp_path, monkeypatch):
+    path = synthetic_video(os.path.join(tmp_path, "clip.mp4"), (160, 120), n_frames=20)
+    cache = TargetCache(directory=os.path.join(tmp_path, "cache"))
+    monkeypatch.setattr("src.cache._default_cache", cache)
+
+    fast = list(cached_video_stream(path, 20, sample_rate=1, fast=True, cache=cache))
+    explicit = cached_video_stream(path, 20, sample_rate=1, downscale=VIDEO_DOWNSCALE, roi=True, cache=cache)
+    assert isinstance(explicit, np.ndarray)  # same entry
+    assert np.array_equal(explicit, fast)
+    assert ShowEngine([Video(path, sample_rate=1, frame_steps=1, fast=True)], n_drones=20, verbose=False).run()
+
+    with pytest.raises(ValueError):
+        cached_video_stream(path, 20, sample_rate=1, workers=4, cache=cache)
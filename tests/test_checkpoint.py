@@ -0,0 +1,48 @@
+import os
+import numpy as np
+import pytest
+from src import ShowEngine, Video, Hold
+from src.benchmark import synthetic_swarm, synthetic_video
+from src.cache import TargetCache
+
+
+class _Interrupt:
+    """ Recorder that stops the run (like Ctrl+C) after `steps` steps. """
+
+    def __init__(self, steps):
+        self.steps = steps
+
+    def record(self, positions):
+        self.steps -= 1
+        if self.steps < 0:
+            raise KeyboardInterrupt
+
+
+@pytest.mark.parametrize("active_set", [False, True])
+@pytest.mark.parametrize("solver", ["rk4", "imex", "adaptive"])
+def test_resumed_run_matches_an_uninterrupted_one(tmp_path, monkeypatch, solver, active_set):
+    path = synthetic_video(os.path.join(tmp_path, "clip.mp4"), (160, 120), n_frames=30)
+    monkeypatch.setattr("src.cache._default_cache", TargetCache(directory=os.path.join(tmp_path, "cache")))
+    start = synthetic_swarm(40, seed=0)[0]
+    checkpoint = os.path.join(tmp_path, "show.npz")
+
+    def engine(**options):
+        phases = [Video(path, sample_rate=1, frame_steps=20), Hold(0.5)]
+        return ShowEngine(phases, n_drones=40, start=start, solver=solver, active_set=active_set,
+                          verbose=False, **options)
+
+    # Stopped halfway through the video, 100 steps after the last checkpoint
+    interrupted = engine(checkpoint=checkpoint, checkpoint_every=200, recorder=_Interrupt(300))
+    with pytest.raises(KeyboardInterrupt):
+        interrupted.run()
+    assert interrupted.phase_index == 0
+
+    resumed = engine()
+    resumed.restore(checkpoint)
+    assert resumed.step == 200
+    resumed_summary = resumed.run()
+
+    reference = engine()
+    assert resumed_summary == reference.run()
+    assert np.array_equal(resumed.positions, reference.positions)
+    assert np.array_equal(resumed.velocities, reference.velocities)
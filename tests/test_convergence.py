@@ -0,0 +1,27 @@
+import numpy as np
+from src import ConvergenceMonitor
+
+
+def _grid(n, spacing=2.0):
+    side = int(np.ceil(np.sqrt(n)))
+    xy = np.stack(np.meshgrid(np.arange(side), np.arange(side)), -1).reshape(-1, 2)[:n] * spacing
+    return np.column_stack((xy, np.full(n, 10.0)))
+
+
+def test_monitor_triggers_once_the_swarm_held_still():
+    targets = _grid(100)
+    positions = targets + 0.1
+    monitor = ConvergenceMonitor(hold=1.0, every=10, dt=0.05)
+    hold_steps = int(round(1.0 / 0.05))
+
+    results = [monitor.update(positions, np.zeros_like(positions), targets) for _ in range(hold_steps + 10)]
+    assert results[-1] and not results[hold_steps - 1]
+    assert monitor.max_error < monitor.pos_tol
+
+
+def test_monitor_waits_for_stragglers():
+    targets = _grid(100)
+    positions = targets.copy()
+    positions[42] += 1.0  # one drone still on its way
+    monitor = ConvergenceMonitor(hold=1.0, every=10, dt=0.05)
+    assert not any(monitor.update(positions, np.zeros_like(positions), targets) for _ in range(100))
@@ -0,0 +1,34 @@
+import json
+import numpy as np
+import pytest
+from src import (min_separation, swarm_metrics, compute_forces, NeighborList, set_backend,
+                 available_backends)
+from src.benchmark import synthetic_swarm
+
+
+def test_separation_conventions_without_close_pairs():
+    positions = np.array([[0.0, 0.0, 0.0], [10.0, 0.0, 0.0]])
+    assert min_separation(positions) == np.inf
+    metrics = swarm_metrics(positions, np.zeros_like(positions))
+    assert "min_separation" not in metrics
+    json.dumps(metrics, allow_nan=False)
+
+
+def test_separation_conventions_with_close_pairs():
+    positions = np.array([[0.0, 0.0, 0.0], [0.5, 0.0, 0.0], [10.0, 0.0, 0.0]])
+    assert min_separation(positions) == swarm_metrics(positions)["min_separation"] == 0.5
+
+
+@pytest.mark.parametrize("backend", ["numpy", "numba"])
+def test_neighbor_list_forces_match_the_dense_ones(backend):
+    if backend not in available_backends():
+        pytest.skip(f"{backend} backend not available")
+    positions, velocities, targets = synthetic_swarm(2000, seed=0)
+    try:
+        set_backend(backend)
+        dense = compute_forces(positions, velocities, targets)
+        sparse = compute_forces(positions, velocities, targets, neighbors=NeighborList())
+    finally:
+        set_backend()
+    # Same pairs, summed in another order
+    assert np.max(np.abs(sparse - dense)) <= 1e-12 * np.max(np.abs(dense))
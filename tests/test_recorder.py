@@ -0,0 +1,55 @@
+import os
+import numpy as np
+import pytest
+from src import ShowEngine, Hold, FlightLogWriter, open_flight_log
+from src.config import FLIGHTLOG_RESOLUTION
+
+
+def test_engine_records_at_its_own_dt_with_velocities(tmp_path):
+    engine = ShowEngine([Hold(1.0)], n_drones=20, dt=0.05, solver="imex", verbose=False)
+    engine.load()
+    engine.velocities[:] = 1.0
+    recorder = engine.record_to(os.path.join(tmp_path, "t.npy"), every=2, dtype=np.float64,
+                                record_velocities=True)
+    summary = engine.run()
+    recorder.close()
+
+    assert recorder.frame_dt == 0.1
+    assert len(recorder) == summary["steps"] // 2 + 1
+    assert np.array_equal(recorder.velocities[0], np.ones((20, 3)))
+    assert np.array_equal(recorder.velocities[-1], engine.velocities)
+
+
+def test_flight_log_header_keeps_the_frame_time(tmp_path):
+    path = os.path.join(tmp_path, "show.dsw")
+    writer = FlightLogWriter(path, 5, every=4, dt=0.05)
+    writer.record(np.zeros((5, 3)))
+    writer.close()
+    with open_flight_log(path) as log:
+        assert log.frame_dt == 0.2
+
+
+def test_flight_log_round_trip_within_its_resolution(tmp_path):
+    path = os.path.join(tmp_path, "show.dsw")
+    rng = np.random.RandomState(0)
+    frames = np.cumsum(rng.normal(0.0, 0.3, (150, 30, 3)), axis=0) + np.array([0.0, 0.0, 10.0])
+    with FlightLogWriter(path, 30, every=1, dt=0.1) as writer:
+        for positions in frames:
+            writer.record(positions)
+
+    tolerance = FLIGHTLOG_RESOLUTION / 2 + 1e-5  # quantization + float32
+    drones = np.array([0, 7, 29])
+    with open_flight_log(path) as log:
+        assert len(log) == 150
+        assert np.allclose(log.read(drones=drones), frames[:, drones], rtol=0, atol=tolerance)
+        assert np.allclose(log.read(10, 140, 13), frames[10:140:13], rtol=0, atol=tolerance)
+        assert np.allclose(log.frame_at(7.0, drones=drones), frames[70, drones], rtol=0, atol=tolerance)
+
+
+def test_empty_flight_log_has_no_frame_at_any_time(tmp_path):
+    path = os.path.join(tmp_path, "empty.dsw")
+    FlightLogWriter(path, 5).close()
+    with open_flight_log(path) as log:
+        assert len(log) == 0
+        with pytest.raises(IndexError):
+            log.frame_at(0.0)
@@ -0,0 +1,14 @@
+import numpy as np
+from src.sampling import blue_noise_sample
+
+
+def test_blue_noise_fill_only_repeats_pixels_when_short_of_them():
+    # Candidates closer together than a pixel: the dart throwing stops before taking them all
+    points = np.random.RandomState(1).uniform(0, 5, (200, 2))
+    for n in (100, 200):
+        targets = blue_noise_sample(points, n, 3.0, rng=np.random.RandomState(0), verbose=False)
+        assert len(np.unique(targets, axis=0)) == n
+
+    targets = blue_noise_sample(points, 250, 3.0, rng=np.random.RandomState(0), verbose=False)
+    assert len(targets) == 250
+    assert len(np.unique(targets, axis=0)) == 200
@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+from src import (PhysicsParams, NeighborList, make_stepper, rk4_step, RK4Stepper, dopri5_step, AdaptiveIntegrator,
+                 AdaptiveStepper, ShowEngine, Hold)
+from src.benchmark import synthetic_swarm
+from src.config import SLEEP_POS_TOL
+
+# Three batch members with different radii, speed limits and repulsion
+MEMBER_PARAMS = {"r_safe": np.array([0.8, 1.2, 1.6]), "v_max": np.array([2.0, 5.0, 3.0]),
+                 "k_rep": np.array([100.0, 200.0, 300.0])}
+
+
+def _crowded_batch(batch=3, n=200, seed=0):
+    rng = np.random.RandomState(seed)
+    positions = rng.rand(batch, n, 3) * np.array([20.0, 20.0, 2.0])
+    targets = positions[:, ::-1].copy()  # everybody crosses the swarm
+    return positions, targets
+
+
+@pytest.mark.parametrize("solver, dt", [("rk4", 0.01), ("imex", 0.05)])
+def test_batched_members_match_single_runs(solver, dt):
+    positions, targets = _crowded_batch()
+    batch, n = positions.shape[:2]
+    x, v = positions.copy(), np.zeros_like(positions)
+    stepper = make_stepper(solver, n, dt, NeighborList(cutoff=MEMBER_PARAMS["r_safe"].max()),
+                           params=PhysicsParams(**MEMBER_PARAMS), batch=batch)
+    for _ in range(50):
+        stepper.step(x, v, targets)
+
+    for b in range(batch):
+        params = PhysicsParams(**{name: value[b] for name, value in MEMBER_PARAMS.items()})
+        x_b, v_b = positions[b].copy(), np.zeros((n, 3))
+        single = make_stepper(solver, n, dt, NeighborList(cutoff=params.r_safe), params=params)
+        for _ in range(50):
+            single.step(x_b, v_b, targets[b])
+        # Same physics, only the summation order of the repulsion differs
+        assert np.abs(x_b - x[b]).max() < 1e-9
+
+
+def test_dopri5_applies_params_speed_limit():
+    rng = np.random.RandomState(0)
+    x = rng.rand(50, 3) * 100.0
+    v = np.zeros_like(x)
+    params = PhysicsParams(v_max=1.0)
+    for _ in range(20):
+        x, v, _, _, _ = dopri5_step(x, v, x + 50.0, 0.05, params=params)
+    assert np.linalg.norm(v, axis=1).max() <= 1.0 + 1e-9
+
+
+def test_adaptive_stepper_samples_the_integrator_on_the_dt_grid():
+    positions, targets = _crowded_batch(batch=1, n=100)
+    x, v = positions[0].copy(), np.zeros((100, 3))
+    history = []
+    AdaptiveIntegrator().advance(x.copy(), v.copy(), targets[0], 2.0, 0.01, history)
+
+    stepper = make_stepper("adaptive", 100, 0.01)
+    for sample in history[:100]:  # before advance() shortens its last step to end on time
+        stepper.step(x, v, targets[0])
+        assert np.abs(x - sample).max() < 1e-12
+
+
+def test_show_engine_records_every_step_of_the_adaptive_solver():
+    class Frames:
+        def __init__(self):
+            self.count = 0
+
+        def record(self, positions):
+            self.count += 1
+
+    frames = Frames()
+    engine = ShowEngine([Hold(1.0)], n_drones=50, solver="adaptive", recorder=frames, verbose=False)
+    summary = engine.run()
+    assert isinstance(engine.stepper, AdaptiveStepper)
+    assert frames.count == summary["steps"] + 1
+
+
+@pytest.mark.parametrize("solver", ["rk4", "imex", "adaptive"])
+def test_steppers_keep_and_check_their_dtype(solver):
+    positions, targets = _crowded_batch(batch=1)
+    positions, targets = positions[0].astype(np.float32), targets[0].astype(np.float32)
+    velocities = np.zeros_like(positions)
+    stepper = make_stepper(solver, len(positions), 0.05, NeighborList(), dtype=np.float32)
+
+    stepper.step(positions, velocities, targets)
+    assert positions.dtype == velocities.dtype == np.float32
+    with pytest.raises(TypeError):
+        stepper.step(positions.astype(np.float64), velocities.astype(np.float64), targets)
+
+
+@pytest.mark.parametrize("solver, dt", [("rk4", 0.01), ("imex", 0.05)])
+def test_active_set_matches_the_plain_stepper(solver, dt):
+    start, start_velocities, targets = synthetic_swarm(300, seed=0)
+    final = []
+    for active_set in (False, True):
+        positions, velocities = start.copy(), start_velocities.copy()
+        stepper = make_stepper(solver, len(positions), dt, NeighborList(), active_set=active_set)
+        for _ in range(int(round(20.0 / dt))):
+            stepper.step(positions, velocities, targets)
+        final.append(positions)
+    assert stepper.asleep.any()
+    # Sleepers are frozen within SLEEP_POS_TOL of where the plain run settles
+    assert np.max(np.abs(final[1] - final[0])) < 2 * SLEEP_POS_TOL
+
+
+@pytest.mark.parametrize("use_neighbors", [False, True])
+def test_rk4_stepper_matches_rk4_step(use_neighbors):
+    positions, velocities, targets = synthetic_swarm(500, seed=1)
+    x, v = positions.copy(), velocities.copy()
+    stepper = RK4Stepper(len(x), 0.01, NeighborList() if use_neighbors else None)
+    neighbors = NeighborList() if use_neighbors else None
+    for _ in range(50):
+        positions, velocities = rk4_step(positions, velocities, targets, 0.01, neighbors)
+        stepper.step(x, v, targets)
+    # Same scheme, only the in-place buffers round differently
+    assert np.max(np.abs(x - positions)) < 1e-12
+    assert np.max(np.abs(v - velocities)) < 1e-12
@@ -0,0 +1,57 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pytest
+from src import ShowEngine, Frames, Text, get_backend
+from src import kernels
+from src.cache import TargetCache
+from src.config import TOTAL_TIME
+from src.sweep import SCENARIOS, run_scenario, _init_worker, _load_scenario
+
+
+def _kernel_threads():
+    threads = [kernels._workers]
+    if get_backend().name == "numba":
+        import numba
+        threads.append(numba.get_num_threads())
+    return threads
+
+
+def test_pool_workers_use_one_kernel_thread():
+    # Same pool as run_sweep
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker) as pool:
+        assert pool.submit(_kernel_threads).result() in ([1], [1, 1])
+
+
+def test_frames_phase_holds_the_last_frame():
+    frames = np.arange(3)[:, np.newaxis, np.newaxis] * np.ones((3, 4, 3))
+    seen = []
+
+    class Targets:
+        def record(self, positions):
+            seen.append(engine.targets[0, 0])
+
+    engine = ShowEngine([Frames(frames, duration=1.0, frame_steps=30)], n_drones=4, start=np.zeros((4, 3)),
+                        dt=0.01, verbose=False)
+    engine.recorder = Targets()
+    assert engine.run()["steps"] == 100
+    assert seen[1:] == [0.0] * 30 + [1.0] * 30 + [2.0] * 40
+
+
+def test_task2_sweep_assigns_targets_like_the_show(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.cache._default_cache", TargetCache(directory=str(tmp_path)))
+    start, frames = _load_scenario("task2", 200, seed=0)
+
+    greeting = Text(SCENARIOS["task2"]["text"], scale=SCENARIOS["task2"]["scale"])
+    greeting.load(200)
+    assert np.array_equal(frames[0], greeting.first_targets(start))
+
+
+@pytest.mark.parametrize("dt", [0.05, 0.1])
+def test_imex_flies_task2_without_crashes_at_large_steps(tmp_path, monkeypatch, dt):
+    monkeypatch.setattr("src.cache._default_cache", TargetCache(directory=str(tmp_path)))
+    summary = run_scenario("task2", solver="imex", dt=dt, total_time=TOTAL_TIME)
+    assert summary["total_crashes"] == 0
+    assert summary["min_separation"] > 0.15  # the crash limit
+    assert summary["final_error"] < 2.0
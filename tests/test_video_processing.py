@@ -0,0 +1,55 @@
+import os
+import numpy as np
+import pytest
+from scipy.spatial.distance import pdist
+from src.benchmark import synthetic_video
+from src import ShowEngine, Video
+from src.video_processing import VideoTargetStream, is_video_file, _track_targets
+
+
+def test_lost_targets_are_refilled_with_the_configured_sampler():
+    # A 100 x 100 pixel blob; all previous targets are far off it after the shift
+    points = np.argwhere(np.ones((100, 100), dtype=bool))[:, ::-1].astype(float)
+    angle = np.linspace(0.0, 2 * np.pi, 50, endpoint=False)
+    previous = 500.0 * np.column_stack((np.cos(angle), np.sin(angle)))
+
+    tracked, _ = _track_targets(previous, previous.mean(axis=0), points, snap_radius=2.0,
+                                rng=np.random.RandomState(0), sampling="blue_noise", min_dist=8.0)
+    assert np.all((tracked >= 0) & (tracked < 100))
+    assert pdist(tracked).min() >= 8.0
+
+
+def test_unseeded_stream_leaves_the_global_rng_alone(tmp_path):
+    path = synthetic_video(os.path.join(tmp_path, "clip.mp4"), (160, 120), n_frames=20)
+    np.random.seed(0)
+    before = np.random.get_state()[1].copy()
+    with VideoTargetStream(path, 50, sample_rate=1, coherent=True) as stream:
+        frames = list(stream)
+    assert len(frames) > 0
+    assert np.array_equal(np.random.get_state()[1], before)
+
+
+def test_live_sources_are_recognized():
+    assert is_video_file("Data/input/video.mp4")
+    assert not is_video_file(0)
+    assert not is_video_file("rtsp://192.168.0.10/stream")
+
+
+def test_show_runs_a_video_of_unknown_length(tmp_path, monkeypatch):
+    path = synthetic_video(os.path.join(tmp_path, "clip.mp4"), (160, 120), n_frames=40)
+    # Treat the file like a camera: no frame count, no cache entry
+    monkeypatch.setattr("src.video_processing.is_video_file", lambda source: False)
+    monkeypatch.setattr("src.cache.is_video_file", lambda source: False)
+    monkeypatch.setattr("src.recorder.RECORD_INITIAL_FRAMES", 8)
+
+    with pytest.raises(ValueError):
+        ShowEngine([Video(path, sample_rate=1, duration=2.0)], n_drones=20, verbose=False).load()
+
+    engine = ShowEngine([Video(path, sample_rate=1, frame_steps=2)], n_drones=20, dt=0.05, verbose=False)
+    assert engine.n_steps() is None
+    recorder = engine.record_to(os.path.join(tmp_path, "t.npy"), every=1)
+    summary = engine.run()
+    recorder.close()
+    assert summary["steps"] > 2 * 8  # the recorder had to grow
+    assert len(recorder) == summary["steps"] + 1
+    assert np.array_equal(recorder.positions[-1], engine.positions.astype(np.float32))